@@ -4,9 +4,10 @@ import os
 from logger import logger
 import config
 from core.auth import get_user_id, get_tenant_id, get_user_role, get_tenant_branding
-from core.usage_tracker import get_usage_summary, check_quota
+from core.usage_tracker import get_usage_summary, check_quota, get_usage_report
 from utils.file_utils import clean_temp_dir
 from core.security import redact_log
+from core.cache_utils import get_cache_stats, invalidate_cache
 
 # === Setup ===
 clean_temp_dir()
@@ -63,11 +64,75 @@ with st.sidebar.expander("📊 Usage Summary"):
         logger.warning(f"Usage summary failed: {e}")
         st.write("⚠️ Unable to load usage summary.")
 
+with st.sidebar.expander("💵 Cost & Usage (30 days)"):
+    try:
+        report = get_usage_report(tenant_id, days=30)
+        totals = report["totals"]
+        st.write("💰 Estimated Cost:", f"${totals['cost_usd']:,.2f}")
+        st.write("🧠 Tokens:", f"{totals['total_tokens']:,}", f"({totals['requests']} requests)")
+        if totals["p95_latency_ms"] is not None:
+            st.write("⏱️ Latency p50 / p95:", f"≤{totals['p50_latency_ms']} ms / ≤{totals['p95_latency_ms']} ms")
+        if report["by_model"]:
+            st.caption("By model")
+            st.dataframe(
+                [
+                    {"Model": model, "Cost ($)": row["cost_usd"], "Tokens": row["total_tokens"]}
+                    for model, row in sorted(report["by_model"].items(), key=lambda kv: -kv[1]["cost_usd"])
+                ],
+                hide_index=True,
+            )
+        if report["by_section"]:
+            st.caption("Top sections by cost")
+            st.dataframe(
+                [
+                    {"Section": section, "Cost ($)": row["cost_usd"], "p95 (ms)": row["p95_latency_ms"]}
+                    for section, row in sorted(report["by_section"].items(), key=lambda kv: -kv[1]["cost_usd"])[:5]
+                ],
+                hide_index=True,
+            )
+    except Exception as e:
+        logger.warning(f"Cost panel failed: {e}")
+        st.write("⚠️ Unable to load cost summary.")
+
 with st.sidebar.expander("📈 System Health"):
     try:
         st.write("⏱️ Uptime:", f"{round(time.perf_counter(), 2)}s")
         st.write("👤 User Role:", get_user_role())
         st.write("Tenant:", tenant_id)
+
+        if get_user_role() == "admin":
+            st.markdown("**🗃️ Cache**")
+            stats = get_cache_stats()
+            st.write("Memory:", f"{stats['memory_bytes'] / 1_048_576:.1f} MB")
+            if stats["disk"]:
+                st.write("Disk:", f"{sum(size for _, size in stats['disk'].values()) / 1_048_576:.1f} MB")
+            rows = [
+                {
+                    "Tenant": tenant,
+                    "Namespace": namespace,
+                    "Hit rate": row["hit_rate"],
+                    "Hits (L1/L2)": f"{row['hits']}/{row['l2_hits']}",
+                    "Misses": row["misses"],
+                    "Evictions": row["evictions"],
+                    "Entries": row["entries"],
+                    "KB": round(row["bytes"] / 1024, 1),
+                    "Tokens saved": row["tokens_saved"],
+                }
+                for (tenant, namespace), row in sorted(stats["namespaces"].items())
+            ]
+            if rows:
+                st.dataframe(rows, hide_index=True)
+                tenants = sorted({row["Tenant"] for row in rows})
+                target_tenant = st.selectbox("Tenant", tenants, key="cache_invalidate_tenant")
+                namespaces = sorted({row["Namespace"] for row in rows if row["Tenant"] == target_tenant})
+                target_namespace = st.selectbox("Namespace", ["(all)"] + namespaces, key="cache_invalidate_namespace")
+                if st.button("🧹 Invalidate", key="cache_invalidate"):
+                    removed = invalidate_cache(
+                        target_tenant, None if target_namespace == "(all)" else target_namespace
+                    )
+                    st.success(f"Cleared {removed} cached entries.")
+            else:
+                st.caption("Cache is empty.")
     except Exception as e:
         logger.warning(f"System health panel failed: {e}")
         st.write("⚠️ Unable to load system health.")
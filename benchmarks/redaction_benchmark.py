@@ -0,0 +1,88 @@
+"""
+PHI masking + secret redaction cost per log line: original per-field re.sub calls vs. the
+compiled single-alternation engine, and the lazy Redacted wrapper on a disabled level.
+
+The corpus mimics production logs: mostly clean metric/status lines, some lines carrying
+PHI fields or secrets, and occasional whole prompts.
+
+    python benchmarks/redaction_benchmark.py --lines 50000
+"""
+import argparse
+import logging
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+LEGACY_PHI_FIELDS = ["client", "email", "phone", "narrative", "summary"]
+
+
+def legacy_mask_phi(text: str) -> str:
+    """The original mask_phi: one uncompiled substitution per field."""
+    for field in LEGACY_PHI_FIELDS:
+        text = re.sub(rf"({field}\s*[:=].*?)(?=,|$)", "[REDACTED]", text, flags=re.IGNORECASE)
+    return text
+
+
+def legacy_redact_log(text: str) -> str:
+    return re.sub(r"(api|key|token|secret)[^\s\"']+", "***REDACTED***", text, flags=re.IGNORECASE)
+
+
+def build_corpus(lines: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    prompt = (
+        "You are drafting a demand letter. Summary of incident: the claimant was rear-ended at a "
+        "stoplight on Main Street and transported to County General. " * 40
+    )
+    templates = [
+        (0.55, lambda i: f"[METRIC] OpenAI latency: {rng.random() * 4:.2f}s for tenant=firm-{i % 7}"),
+        (0.20, lambda i: f"✅ DOCX replace completed for data/tmp/s{i}/Demand_{i}.docx, version: {i:08x}"),
+        (0.10, lambda i: f"🧾 FOIA form data payload: {{'client_id': 'C{i}', 'email': 'j{i}@example.com', 'phone': '555-01{i % 100:02d}'}}"),
+        (0.10, lambda i: f"⚠️ Key Vault lookup failed for OPENAI_API_KEY: token=sk-{i:032x}"),
+        (0.05, lambda i: f"[STYLE_TRANSFER] Prompt being sent to OpenAI: {prompt}"),
+    ]
+    weights = [w for w, _ in templates]
+    return [rng.choices(templates, weights)[0][1](i) for i in range(lines)]
+
+
+def timed(fn, corpus: list) -> float:
+    start = time.perf_counter()
+    for line in corpus:
+        fn(line)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=50000)
+    args = parser.parse_args()
+
+    from core.security import Redacted, mask_phi, redact_log
+
+    corpus = build_corpus(args.lines)
+    mismatches = sum(
+        legacy_redact_log(legacy_mask_phi(line)) != redact_log(mask_phi(line)) for line in corpus
+    )
+
+    legacy = timed(lambda line: legacy_redact_log(legacy_mask_phi(line)), corpus)
+    compiled = timed(lambda line: redact_log(mask_phi(line)), corpus)
+
+    quiet = logging.getLogger("redaction-benchmark")
+    quiet.setLevel(logging.INFO)
+    eager_debug = timed(lambda line: quiet.debug(redact_log(mask_phi(line))), corpus)
+    lazy_debug = timed(lambda line: quiet.debug(Redacted(line)), corpus)
+
+    per_line = lambda seconds: seconds / len(corpus) * 1e6
+    print(f"{len(corpus)} log lines, {mismatches} output mismatches")
+    print(f"  per-field re.sub        : {per_line(legacy):8.2f} µs/line")
+    print(f"  compiled alternation    : {per_line(compiled):8.2f} µs/line  ({legacy / compiled:.1f}x)")
+    print(f"  disabled level, eager   : {per_line(eager_debug):8.2f} µs/line")
+    print(f"  disabled level, lazy    : {per_line(lazy_debug):8.2f} µs/line  ({eager_debug / lazy_debug:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,237 @@
 from core.auth import get_user_id, get_tenant_id, get_user_role
 from core.security import sanitize_text, mask_phi, redact_log
 from core.error_handling import handle_error
-from core.db import insert_audit_event, get_audit_events
-import hashlib
+from core.audit_archive import (
+    archive_closed_months,
+    iter_archived_rows,
+    read_archived_events,
+    search_archived_events,
+)
+from core.db import (
+    insert_audit_event,
+    insert_audit_events,
+    get_audit_events,
+    get_audit_tenants,
+    check_audit_row,
+    get_verification_watermark,
+    iter_audit_rows,
+    search_audit_events as db_search_audit_events,
+    verify_audit_chain,
+)
+import atexit
+import csv
+import gzip
+import heapq
+import io
+import json
 import datetime
+import queue
+import threading
+import time
 from logger import logger
 
-def _hash_audit_entry(tenant_id: str, user_id: str, action: str, metadata: dict) -> str:
+# === Background audit writer ===
+# Events are queued by the caller and committed by one writer thread in batched
+# transactions, so audit logging adds no database latency to hot paths.
+AUDIT_FLUSH_INTERVAL_SECONDS = 0.05
+AUDIT_BATCH_SIZE = 500
+AUDIT_QUEUE_MAXSIZE = 10000
+# When the queue is full the caller waits this long, then writes synchronously.
+AUDIT_ENQUEUE_TIMEOUT_SECONDS = 0.5
+AUDIT_WRITE_RETRIES = 3
+
+# === Background chain verifier ===
+AUDIT_VERIFY_INTERVAL_SECONDS = 30
+# Closed months are moved to cold storage at most this often.
+AUDIT_ARCHIVE_INTERVAL_SECONDS = 6 * 60 * 60
+
+# === Export ===
+AUDIT_EXPORT_FORMATS = ("csv", "jsonl.gz")
+AUDIT_EXPORT_COLUMNS = ["id", "timestamp", "tenant_id", "user_id", "action", "metadata", "hash", "prev_hash"]
+AUDIT_EXPORT_VERIFICATION_COLUMNS = ["archived", "hash_valid", "chain_linked", "verified"]
+
+
+def _clean_event(event: dict) -> dict:
+    """Sanitize an event's action and metadata (done on the writer thread)."""
+    clean_metadata = {}
+    for k, v in event["metadata"].items():
+        clean_metadata[sanitize_text(k)] = sanitize_text(v)
+    # Include user role inside metadata for traceability
+    clean_metadata["role"] = event["role"]
+    return {
+        "tenant_id": event["tenant_id"],
+        "user_id": event["user_id"],
+        "action": sanitize_text(event["action"]),
+        "metadata": clean_metadata,
+        "timestamp": event["timestamp"],
+    }
+
+
+class AuditWriter:
+    """
+    Bounded queue drained by a daemon thread that commits every
+    AUDIT_FLUSH_INTERVAL_SECONDS or every AUDIT_BATCH_SIZE events, whichever comes first.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=AUDIT_QUEUE_MAXSIZE)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, event: dict):
+        self._ensure_started()
+        try:
+            self._queue.put(event, timeout=AUDIT_ENQUEUE_TIMEOUT_SECONDS)
+        except queue.Full:
+            # Backpressure: the writer is behind, so persist this event on the caller's thread.
+            logger.warning("[AUDIT_QUEUE] ⚠️ Audit queue full, writing synchronously")
+            insert_audit_event(**_clean_event(event))
+
+    def _drain(self, first) -> list:
+        batch = [first]
+        deadline = time.monotonic() + AUDIT_FLUSH_INTERVAL_SECONDS
+        while len(batch) < AUDIT_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: list):
+        events = [_clean_event(e) for e in batch]
+        for attempt in range(1, AUDIT_WRITE_RETRIES + 1):
+            try:
+                insert_audit_events(events)
+                return
+            except Exception as e:
+                if attempt == AUDIT_WRITE_RETRIES:
+                    safe_error = redact_log(mask_phi(f"❌ Dropped {len(events)} audit events: {e}"))
+                    handle_error(safe_error, code="AUDIT_LOG_003")
+                else:
+                    time.sleep(AUDIT_FLUSH_INTERVAL_SECONDS * attempt)
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=AUDIT_FLUSH_INTERVAL_SECONDS)
+            except queue.Empty:
+                continue
+            batch = self._drain(first)
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Block until every queued event has been committed."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def stop(self):
+        """Flush outstanding events and stop the writer thread."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+_writer = AuditWriter()
+atexit.register(_writer.stop)
+
+
+class AuditVerifier:
     """
-    Creates a tamper-proof SHA256 hash for each audit entry using tenant, user, action, metadata, and UTC timestamp.
+    Daemon thread that periodically extends every tenant's verified watermark.
+    Each pass only hashes rows appended since the tenant's last checkpoint.
     """
-    data = f"{tenant_id}|{user_id}|{action}|{metadata}|{datetime.datetime.utcnow().isoformat()}"
-    return hashlib.sha256(data.encode()).hexdigest()
+
+    def __init__(self):
+        self._thread = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._last_archive = 0.0
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-verifier", daemon=True)
+                self._thread.start()
+
+    def request(self):
+        """Ask for a verification pass soon (e.g. when someone opens the audit viewer)."""
+        self.start()
+        self._wake.set()
+
+    def run_once(self):
+        _writer.flush()
+        for tenant_id in get_audit_tenants():
+            try:
+                watermark = verify_audit_chain(tenant_id)
+                if watermark["broken_at_id"] is not None:
+                    logger.error(
+                        f"[AUDIT_VERIFY] ❌ tenant={tenant_id} chain broken at id={watermark['broken_at_id']}"
+                    )
+            except Exception as e:
+                handle_error(e, code="AUDIT_LOG_004")
+
+        # Archiving only moves verified rows, so it runs right after a verification pass.
+        if time.monotonic() - self._last_archive >= AUDIT_ARCHIVE_INTERVAL_SECONDS:
+            self._last_archive = time.monotonic()
+            try:
+                archive_closed_months()
+            except Exception as e:
+                handle_error(e, code="AUDIT_LOG_006")
+
+    def _run(self):
+        while True:
+            self._wake.wait(timeout=AUDIT_VERIFY_INTERVAL_SECONDS)
+            self._wake.clear()
+            self.run_once()
+
+
+_verifier = AuditVerifier()
+
+
+def flush_audit_events():
+    """Wait until all queued audit events are durable in the database."""
+    _writer.flush()
+
 
 def log_audit_event(action: str, metadata: dict = None):
     """
     Log a structured audit event to the database with user and tenant context.
-    Includes tamper-proof hashing, tenant isolation, and full error resilience.
+    Tenant, user and role are captured immediately; sanitizing, hashing and the
+    INSERT happen on the background audit writer.
     """
     try:
         tenant_id = get_tenant_id()
         user_id = get_user_id()
         user_role = get_user_role()
 
-        # Ensure metadata is clean and safe
-        clean_metadata = {}
-        if metadata:
-            for k, v in metadata.items():
-                clean_metadata[sanitize_text(str(k))] = sanitize_text(str(v))
-
-        # Include user role inside metadata for traceability
-        clean_metadata["role"] = user_role
-
-        audit_hash = _hash_audit_entry(tenant_id, user_id, action, clean_metadata)
-
-        # Write to DB with metadata JSON stored as a string
-        insert_audit_event(
-            tenant_id=tenant_id,
-            user_id=user_id,
-            action=sanitize_text(action),
-            metadata=clean_metadata,    
-        )
+        _writer.submit({
+            "tenant_id": tenant_id,
+            "user_id": user_id,
+            "role": user_role,
+            "action": str(action),
+            # Stringify now so later mutation of the caller's objects cannot change the record.
+            "metadata": {str(k): str(v) for k, v in (metadata or {}).items()},
+            "timestamp": datetime.datetime.utcnow().isoformat(),
+        })
 
         try:
             logger.info(f"[AUDIT] tenant={tenant_id} user={user_id} action={action}")
@@ -51,11 +242,32 @@ def log_audit_event(action: str, metadata: dict = None):
         safe_error = redact_log(mask_phi(f"❌ Failed to write audit log: {e}"))
         handle_error(safe_error, code="AUDIT_LOG_001")
 
-def fetch_audit_events(user_id: str = None, action: str = None, limit: int = 50):
+def get_audit_watermark() -> dict:
+    """
+    Return how far the current tenant's audit chain has been verified.
+    Keys: verified_through_id, verified_at, broken_at_id.
+    """
+    try:
+        _verifier.request()
+        return get_verification_watermark(get_tenant_id())
+    except Exception as e:
+        handle_error(e, code="AUDIT_LOG_005", raise_it=True)
+
+
+def fetch_audit_events(
+    user_id: str = None,
+    action: str = None,
+    limit: int = 50,
+    before_timestamp: str = None,
+    before_id: int = None,
+    start: str = None,
+    end: str = None,
+):
     """
     Retrieve audit events for the current tenant with optional filters.
     Validates tenant isolation and enforces role-based access control.
     Non-admins can only see their own events.
+    Pages are keyed on the (timestamp, id) of the previous page's last row.
     """
     try:
         tenant_id = get_tenant_id()
@@ -66,13 +278,39 @@ def fetch_audit_events(user_id: str = None, action: str = None, limit: int = 50)
         if current_role.lower() != "admin":
             user_id = get_user_id()
 
+        # Make queued events visible before reading
+        flush_audit_events()
+
         events = get_audit_events(
             tenant_id=tenant_id,
             user_id=user_id,
             action=action,
-            limit=limit
+            limit=limit,
+            before_timestamp=before_timestamp,
+            before_id=before_id,
+            start=start,
+            end=end
         )
 
+        # Route across partitions: closed months live in compressed cold segments.
+        # Cold segments older than a full hot page cannot contribute and are skipped.
+        newer_than = events[-1]["timestamp"] if len(events) >= limit else None
+        archived = read_archived_events(
+            tenant_id=tenant_id,
+            user_id=user_id,
+            action=action,
+            limit=limit,
+            before_timestamp=before_timestamp,
+            before_id=before_id,
+            start=start,
+            end=end,
+            newer_than=newer_than
+        )
+        if archived:
+            merged = {e["id"]: e for e in archived}
+            merged.update({e["id"]: e for e in events})
+            events = sorted(merged.values(), key=lambda e: (e["timestamp"], e["id"]), reverse=True)[:limit]
+
         # Hard-verify tenant isolation on fetched events
         safe_events = [e for e in events if e.get("tenant_id") == tenant_id]
 
@@ -86,3 +324,116 @@ def fetch_audit_events(user_id: str = None, action: str = None, limit: int = 50)
     except Exception as e:
         safe_error = redact_log(mask_phi(f"❌ Failed to fetch audit events: {e}"))
         handle_error(safe_error, code="AUDIT_LOG_002", raise_it=True)
+
+
+def search_audit_events(
+    text: str,
+    user_id: str = None,
+    action: str = None,
+    limit: int = 50,
+    before_id: int = None,
+    start: str = None,
+    end: str = None,
+):
+    """
+    Full-text search of the current tenant's audit events (action and metadata).
+    Same access rules as fetch_audit_events; pages are keyed on the previous page's last id.
+    """
+    try:
+        tenant_id = get_tenant_id()
+        if get_user_role().lower() != "admin":
+            user_id = get_user_id()
+
+        flush_audit_events()
+
+        filters = dict(user_id=user_id, action=action, limit=limit, before_id=before_id, start=start, end=end)
+        events = db_search_audit_events(tenant_id, text, **filters)
+        if len(events) < limit:
+            # Only dig into cold storage when the hot index cannot fill the page.
+            archived = search_archived_events(tenant_id, text, **filters)
+            merged = {e["id"]: e for e in archived}
+            merged.update({e["id"]: e for e in events})
+            events = sorted(merged.values(), key=lambda e: e["id"], reverse=True)[:limit]
+
+        safe_events = [e for e in events if e.get("tenant_id") == tenant_id]
+        logger.info(f"[AUDIT_SEARCH] tenant={tenant_id} matched {len(safe_events)} events")
+        return safe_events
+
+    except Exception as e:
+        safe_error = redact_log(mask_phi(f"❌ Failed to search audit events: {e}"))
+        handle_error(safe_error, code="AUDIT_LOG_007", raise_it=True)
+
+
+def _export_rows(tenant_id: str, start: str, end: str, include_verification: bool):
+    """Hot and archived rows merged by id, optionally annotated with chain checks."""
+    archived = ({**row, "archived": True} for row in iter_archived_rows(tenant_id, start, end))
+    hot = ({**row, "archived": False} for row in iter_audit_rows(tenant_id, start, end))
+    rows = heapq.merge(archived, hot, key=lambda r: r["id"])
+    if not include_verification:
+        yield from rows
+        return
+
+    watermark = get_verification_watermark(tenant_id)
+    # The first row's predecessor is unknown when the export starts mid-history.
+    previous_hash = None if start else ""
+    for row in rows:
+        hash_valid, linked = check_audit_row(row, previous_hash)
+        row["hash_valid"] = hash_valid
+        row["chain_linked"] = linked
+        row["verified"] = row["archived"] or row["id"] <= watermark["verified_through_id"]
+        previous_hash = row["hash"]
+        yield row
+
+
+def export_audit_events(
+    target,
+    fmt: str = "csv",
+    include_verification: bool = False,
+    start: str = None,
+    end: str = None,
+    user_id: str = None,
+) -> int:
+    """
+    Stream the current tenant's full audit history (hot and archived) into a binary file
+    object as CSV or gzip JSONL. Rows are written as they are read, so memory use does not
+    depend on history size. Returns the number of rows written.
+    """
+    try:
+        if fmt not in AUDIT_EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+
+        tenant_id = get_tenant_id()
+        if get_user_role().lower() != "admin":
+            user_id = get_user_id()
+
+        flush_audit_events()
+
+        columns = AUDIT_EXPORT_COLUMNS + (AUDIT_EXPORT_VERIFICATION_COLUMNS if include_verification else [])
+        sink = gzip.GzipFile(fileobj=target, mode="wb") if fmt == "jsonl.gz" else target
+        text = io.TextIOWrapper(sink, encoding="utf-8", newline="")
+        writer = csv.DictWriter(text, fieldnames=columns, extrasaction="ignore") if fmt == "csv" else None
+        if writer:
+            writer.writeheader()
+
+        count = 0
+        for row in _export_rows(tenant_id, start, end, include_verification):
+            # Chain checks need every row; the user filter is applied afterwards.
+            if user_id and row.get("user_id") != user_id:
+                continue
+            if writer:
+                writer.writerow(row)
+            else:
+                text.write(json.dumps({c: row.get(c) for c in columns}) + "\n")
+            count += 1
+
+        text.flush()
+        text.detach()
+        if sink is not target:
+            sink.close()
+
+        log_audit_event("Audit Export", {"format": fmt, "rows": count, "verification": include_verification})
+        return count
+
+    except Exception as e:
+        safe_error = redact_log(mask_phi(f"❌ Failed to export audit events: {e}"))
+        handle_error(safe_error, code="AUDIT_LOG_008", raise_it=True)
@@ -0,0 +1,313 @@
+import gzip
+import hashlib
+import heapq
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from functools import lru_cache
+from core.db import (
+    acquire_lease,
+    get_archivable_audit_months,
+    get_audit_rows_for_archive,
+    get_verification_watermark,
+    purge_audit_rows,
+    release_lease,
+)
+from core.error_handling import handle_error
+from logger import logger
+
+# === Cold storage for closed months ===
+# Each archive run writes immutable gzip JSONL segments, one per tenant-month, under
+# data/audit_archive/<tenant>/<YYYY-MM>/<first_id>-<last_id>.jsonl.gz, and records them
+# in a small JSON index. The hot audit_log table only keeps recent months.
+ARCHIVE_DIR = os.path.join("data", "audit_archive")
+ARCHIVE_INDEX_FILE = "index.json"
+
+# Months kept in the hot table, counting the current one.
+AUDIT_HOT_MONTHS = 1
+
+# Every app process runs its own verifier; the lease lets only one of them archive at a time.
+# It is renewed per segment, so a crashed holder blocks others for at most this long.
+ARCHIVE_LEASE = "audit_archive"
+ARCHIVE_LEASE_SECONDS = 10 * 60
+
+_archive_lock = threading.Lock()
+
+
+def _tenant_dir(tenant_id: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", tenant_id).strip(".") or "_"
+
+
+def _month_bounds(month: str) -> tuple:
+    """"2024-03" -> ("2024-03", "2024-04"); ISO timestamps compare correctly against these prefixes."""
+    year, mon = (int(x) for x in month.split("-"))
+    year, mon = (year + 1, 1) if mon == 12 else (year, mon + 1)
+    return month, f"{year:04d}-{mon:02d}"
+
+
+def _hot_cutoff(now: datetime = None) -> str:
+    """"YYYY-MM" of the oldest month that stays hot."""
+    now = now or datetime.utcnow()
+    year, mon = now.year, now.month - (AUDIT_HOT_MONTHS - 1)
+    while mon < 1:
+        year, mon = year - 1, mon + 12
+    return f"{year:04d}-{mon:02d}"
+
+
+def _index_path() -> str:
+    return os.path.join(ARCHIVE_DIR, ARCHIVE_INDEX_FILE)
+
+
+def load_archive_index() -> list:
+    """Return every archived segment entry (empty if nothing has been archived yet)."""
+    path = _index_path()
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_archive_index(entries: list):
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    path = _index_path()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _write_segment(path: str, rows: list) -> str:
+    """Write rows as gzip JSONL (atomically) and return the file's sha256."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    payload = "".join(json.dumps(row, separators=(",", ":")) + "\n" for row in rows).encode("utf-8")
+    data = gzip.compress(payload, compresslevel=9, mtime=0)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return hashlib.sha256(data).hexdigest()
+
+
+def _purge_pending(entries: list):
+    """Finish segments whose hot rows were not deleted (e.g. the process died mid-run)."""
+    for entry in entries:
+        if not entry.get("purged"):
+            start, end = _month_bounds(entry["month"])
+            purge_audit_rows(entry["tenant_id"], start, end, entry["first_id"], entry["last_id"])
+            entry["purged"] = True
+            _save_archive_index(entries)
+
+
+def archive_closed_months(now: datetime = None) -> dict:
+    """
+    Move chain-verified rows from closed months into compressed cold segments.
+    Tenants with a broken chain are left untouched so the evidence stays in place.
+    Runs under a cross-process lease; if another process holds it, this call does nothing.
+    """
+    try:
+        owner = uuid.uuid4().hex
+        with _archive_lock:
+            if not acquire_lease(ARCHIVE_LEASE, owner, ARCHIVE_LEASE_SECONDS, time.time()):
+                logger.info("[AUDIT_ARCHIVE] ⏭️ Another process is archiving; skipping this run")
+                return {"segments": 0, "rows": 0}
+            try:
+                return _archive_under_lease(owner, now)
+            finally:
+                release_lease(ARCHIVE_LEASE, owner)
+    except Exception as e:
+        handle_error(e, code="AUDIT_ARCHIVE_001", raise_it=True)
+
+
+def _archive_under_lease(owner: str, now: datetime = None) -> dict:
+    # The index is only read and written while holding the lease, so it is never stale here.
+    entries = load_archive_index()
+    _purge_pending(entries)
+    indexed = {(e["tenant_id"], e["month"], e["first_id"]) for e in entries}
+
+    archived_rows, segments = 0, 0
+    for tenant_id, month in get_archivable_audit_months(_hot_cutoff(now)):
+        watermark = get_verification_watermark(tenant_id)
+        if watermark["broken_at_id"] is not None or not watermark["verified_through_id"]:
+            continue
+
+        start, end = _month_bounds(month)
+        # The checkpoint row itself stays hot: the verifier anchors on it.
+        rows = get_audit_rows_for_archive(tenant_id, start, end, watermark["verified_through_id"])
+        if not rows or (tenant_id, month, rows[0]["id"]) in indexed:
+            continue
+        if not acquire_lease(ARCHIVE_LEASE, owner, ARCHIVE_LEASE_SECONDS, time.time()):
+            logger.warning("[AUDIT_ARCHIVE] ⚠️ Archive lease lost; stopping this run")
+            break
+
+        first_id, last_id = rows[0]["id"], rows[-1]["id"]
+        relative = os.path.join(_tenant_dir(tenant_id), month, f"{first_id}-{last_id}.jsonl.gz")
+        sha256 = _write_segment(os.path.join(ARCHIVE_DIR, relative), rows)
+        entry = {
+            "tenant_id": tenant_id,
+            "month": month,
+            "file": relative,
+            "first_id": first_id,
+            "last_id": last_id,
+            "count": len(rows),
+            "min_timestamp": min(r["timestamp"] for r in rows),
+            "max_timestamp": max(r["timestamp"] for r in rows),
+            "sha256": sha256,
+            "purged": False,
+        }
+        entries.append(entry)
+        indexed.add((tenant_id, month, first_id))
+        _save_archive_index(entries)
+
+        purge_audit_rows(tenant_id, start, end, first_id, last_id)
+        entry["purged"] = True
+        _save_archive_index(entries)
+
+        archived_rows += len(rows)
+        segments += 1
+
+    if segments:
+        logger.info(f"[AUDIT_ARCHIVE] 🗄️ Archived {archived_rows} events into {segments} segments")
+    return {"segments": segments, "rows": archived_rows}
+
+
+@lru_cache(maxsize=16)
+def _load_segment(path: str, sha256: str) -> tuple:
+    """Decode a segment (immutable, so cached by path + digest). Returns (rows, intact)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    intact = hashlib.sha256(data).hexdigest() == sha256
+    rows = tuple(json.loads(line) for line in gzip.decompress(data).decode("utf-8").splitlines() if line)
+    return rows, intact
+
+
+def read_archived_events(
+    tenant_id: str,
+    user_id: str = None,
+    action: str = None,
+    limit: int = 50,
+    before_timestamp: str = None,
+    before_id: int = None,
+    start: str = None,
+    end: str = None,
+    newer_than: str = None,
+) -> list:
+    """
+    Return up to `limit` archived events, newest first, with the same filters as get_audit_events.
+    Segments entirely older than `newer_than` are skipped (the caller already has a full page above it).
+    """
+    try:
+        candidates = [
+            e for e in load_archive_index()
+            if e["tenant_id"] == tenant_id
+            and (not start or e["max_timestamp"] >= start)
+            and (not end or e["min_timestamp"] < end)
+            and (before_timestamp is None or e["min_timestamp"] <= before_timestamp)
+            and (newer_than is None or e["max_timestamp"] >= newer_than)
+        ]
+        candidates.sort(key=lambda e: e["max_timestamp"], reverse=True)
+
+        events = []
+        for entry in candidates:
+            if len(events) >= limit and entry["max_timestamp"] < events[limit - 1]["timestamp"]:
+                break
+            rows, intact = _load_segment(os.path.join(ARCHIVE_DIR, entry["file"]), entry["sha256"])
+            if not intact:
+                logger.error(f"[AUDIT_ARCHIVE] ❌ Segment {entry['file']} does not match its recorded digest")
+            for row in rows:
+                if user_id and row["user_id"] != user_id:
+                    continue
+                if action and row["action"] != action:
+                    continue
+                if (start and row["timestamp"] < start) or (end and row["timestamp"] >= end):
+                    continue
+                if before_timestamp is not None and before_id is not None and \
+                        (row["timestamp"], row["id"]) >= (before_timestamp, before_id):
+                    continue
+                events.append({**row, "verified": intact, "tampered": not intact, "archived": True})
+            events.sort(key=lambda r: (r["timestamp"], r["id"]), reverse=True)
+            del events[limit:]
+        return events
+    except Exception as e:
+        handle_error(e, code="AUDIT_ARCHIVE_002", raise_it=True)
+
+
+def search_archived_events(
+    tenant_id: str,
+    text: str,
+    user_id: str = None,
+    action: str = None,
+    limit: int = 50,
+    before_id: int = None,
+    start: str = None,
+    end: str = None,
+) -> list:
+    """
+    Case-insensitive substring search over archived action/metadata, newest id first.
+    Cold segments have no full-text index, so only segments that can still contribute are scanned.
+    """
+    try:
+        terms = [t.lower() for t in text.split()]
+        if not terms:
+            return []
+        candidates = [
+            e for e in load_archive_index()
+            if e["tenant_id"] == tenant_id
+            and (before_id is None or e["first_id"] < before_id)
+            and (not start or e["max_timestamp"] >= start)
+            and (not end or e["min_timestamp"] < end)
+        ]
+        candidates.sort(key=lambda e: e["last_id"], reverse=True)
+
+        events = []
+        for entry in candidates:
+            if len(events) >= limit and entry["last_id"] < events[limit - 1]["id"]:
+                break
+            rows, intact = _load_segment(os.path.join(ARCHIVE_DIR, entry["file"]), entry["sha256"])
+            for row in rows:
+                if before_id is not None and row["id"] >= before_id:
+                    continue
+                if (user_id and row["user_id"] != user_id) or (action and row["action"] != action):
+                    continue
+                if (start and row["timestamp"] < start) or (end and row["timestamp"] >= end):
+                    continue
+                haystack = f"{row['action']} {row['metadata']}".lower()
+                if all(term in haystack for term in terms):
+                    events.append({**row, "verified": intact, "tampered": not intact, "archived": True})
+            events.sort(key=lambda r: r["id"], reverse=True)
+            del events[limit:]
+        return events
+    except Exception as e:
+        handle_error(e, code="AUDIT_ARCHIVE_003", raise_it=True)
+
+
+def _stream_segment(path: str):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_archived_rows(tenant_id: str, start: str = None, end: str = None):
+    """
+    Yield a tenant's archived rows oldest first, reading segments line by line.
+    Segments are merged by id, so memory stays constant however much is archived.
+    """
+    segments = [
+        e for e in load_archive_index()
+        if e["tenant_id"] == tenant_id
+        and (not start or e["max_timestamp"] >= start)
+        and (not end or e["min_timestamp"] < end)
+    ]
+    streams = [_stream_segment(os.path.join(ARCHIVE_DIR, e["file"])) for e in segments]
+    for row in heapq.merge(*streams, key=lambda r: r["id"]):
+        if (start and row["timestamp"] < start) or (end and row["timestamp"] >= end):
+            continue
+        yield row
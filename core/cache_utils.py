@@ -1,45 +1,470 @@
 # core/cache_utils.py
 
 import streamlit as st
+import atexit
+import hashlib
+import json
+import os
+import pickle
+import queue
+import sqlite3
+import sys
 import time
+import threading
+import zlib
+from collections import Counter, OrderedDict
 from core.auth import get_tenant_id
 from core.session_utils import get_session_id
 from core.error_handling import handle_error
 from core.security import redact_log, mask_phi
+from logger import logger, log_metric
+from utils.token_utils import estimate_tokens
 
 # Expiration window for caches (in seconds)
 CACHE_EXPIRY_SECONDS = 3600  # 1 hour
 
+# Process-wide bounds; least recently used entries are evicted first.
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+CACHE_MAX_ENTRIES = 4096
+
+# Legacy per-session keys still dropped by clear_caches().
+LEGACY_SESSION_KEYS = ["demand_cache", "foia_cache", "memo_cache", "party_edits"]
+
+# Namespace for entries shared by every session of a tenant.
+SHARED_NAMESPACE = "*"
+
+# Second-level tier: shared entries are also persisted (zlib-compressed pickles) in a
+# local SQLite file so a restart or deploy can serve recent artifacts without regenerating.
+CACHE_L2_ENABLED = True
+CACHE_L2_PATH = os.path.join("data", "cache_l2.db")
+CACHE_L2_MAX_BYTES = 1024 * 1024 * 1024  # compressed bytes on disk
+CACHE_L2_QUEUE_MAXSIZE = 1000
+CACHE_L2_FLUSH_INTERVAL_SECONDS = 0.2
+
+# Counters are emitted through log_metric at most this often (as deltas).
+CACHE_METRICS_INTERVAL_SECONDS = 60
+CACHE_COUNTERS = ["hits", "l2_hits", "misses", "sets", "evictions", "expirations", "tokens_saved"]
+
 
 def _now() -> float:
     return time.time()
 
 
-def _is_expired(entry: dict) -> bool:
+def _cache_namespace(key) -> str:
+    """"demand::<digest>" -> "demand"; keys without a prefix are grouped under "default"."""
+    return key.split("::", 1)[0] if isinstance(key, str) and "::" in key else "default"
+
+
+def _estimate_value_tokens(value) -> int:
+    """Rough tokens of generated text inside a cached value (binary documents count as 0)."""
+    if isinstance(value, str):
+        return estimate_tokens(value)
+    if isinstance(value, dict):
+        return sum(_estimate_value_tokens(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_estimate_value_tokens(v) for v in value)
+    return 0
+
+
+class CacheMetrics:
+    """Per (tenant, namespace) counters, periodically flushed to log_metric."""
+
+    def __init__(self):
+        self._counters = {}
+        self._emitted = {}
+        self._lock = threading.Lock()
+        self._last_emit = time.monotonic()
+
+    def record(self, tenant_id: str, namespace: str, counter: str, value: int = 1):
+        with self._lock:
+            self._counters.setdefault((tenant_id, namespace), Counter())[counter] += value
+        if time.monotonic() - self._last_emit >= CACHE_METRICS_INTERVAL_SECONDS:
+            self.emit()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {key: dict(counts) for key, counts in self._counters.items()}
+
+    def emit(self):
+        """Log counter deltas since the previous emit."""
+        with self._lock:
+            self._last_emit = time.monotonic()
+            deltas = []
+            for (tenant_id, namespace), counts in self._counters.items():
+                previous = self._emitted.setdefault((tenant_id, namespace), Counter())
+                for counter, value in counts.items():
+                    if value != previous[counter]:
+                        deltas.append((f"cache.{counter}", value - previous[counter], tenant_id, namespace))
+                        previous[counter] = value
+        for metric, value, tenant_id, namespace in deltas:
+            log_metric(metric, value, {"tenant_id": tenant_id, "namespace": namespace})
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._emitted.clear()
+
+
+def _sizeof(value) -> int:
+    """Approximate in-memory size of a cached value (bytes payloads dominate)."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8", "ignore"))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(_sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with per-entry TTL and byte accounting.
+    Keys are (tenant_id, namespace, key) tuples; each entry remembers the session that wrote it.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Optional callback(key, reason) for "evicted" / "expired" drops.
+        self.on_drop = None
+
+    def _drop(self, key, reason: str = None):
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry["size"]
+        if reason and self.on_drop is not None:
+            self.on_drop(key, reason)
+
+    def get(self, key):
+        hit = self.get_entry(key)
+        return hit[0] if hit else None
+
+    def get_entry(self, key):
+        """(value, tokens) for a live entry in one locked lookup, or None; refreshes recency."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["expires"] <= _now():
+                self._drop(key, "expired")
+                return None
+            self._entries.move_to_end(key)
+            return entry["value"], entry["tokens"]
+
+    def peek(self, key):
+        """Return the raw entry (value, size, tokens, ...) without touching recency."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return dict(entry) if entry else None
+
+    def set(self, key, value, ttl: float = None, owner: str = None, tokens: int = 0) -> bool:
+        """Store a value; returns False if it is larger than the whole cache."""
+        size = _sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if size > self.max_bytes:
+                return False
+            self._entries[key] = {
+                "value": value,
+                "ts": _now(),
+                "expires": _now() + (CACHE_EXPIRY_SECONDS if ttl is None else ttl),
+                "size": size,
+                "owner": owner,
+                "tokens": tokens,
+            }
+            self.total_bytes += size
+            self._evict()
+            return True
+
+    def _evict(self):
+        now = _now()
+        for key in [k for k, e in self._entries.items() if e["expires"] <= now]:
+            self._drop(key, "expired")
+        while self._entries and (self.total_bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            self._drop(next(iter(self._entries)), "evicted")
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+    def clear(self, predicate=None) -> int:
+        """Drop every entry, or only those where predicate(key, entry) is true."""
+        with self._lock:
+            keys = [k for k, e in self._entries.items() if predicate is None or predicate(k, e)]
+            for key in keys:
+                self._drop(key)
+            return len(keys)
+
+    def items(self, predicate=None) -> list:
+        with self._lock:
+            return [(k, dict(e)) for k, e in self._entries.items() if predicate is None or predicate(k, e)]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskCache:
+    """
+    SQLite-backed L2 tier. Reads are synchronous (read-through); writes and access-time
+    touches go through a bounded queue drained by a daemon thread (write-behind), which
+    also enforces CACHE_L2_MAX_BYTES by evicting the least recently accessed entries.
+    """
+
+    def __init__(self, path: str = CACHE_L2_PATH, max_bytes: int = CACHE_L2_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._conn_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=CACHE_L2_QUEUE_MAXSIZE)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                tenant_id TEXT NOT NULL,
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                owner TEXT,
+                expires REAL NOT NULL,
+                accessed REAL NOT NULL,
+                PRIMARY KEY (tenant_id, namespace, key)
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed ON cache_entries(accessed)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: tuple):
+        """Return (value, expires) for a live entry, or None."""
+        with self._conn_lock:
+            row = self._connection().execute(
+                "SELECT value, expires FROM cache_entries WHERE tenant_id = ? AND namespace = ? AND key = ?",
+                key
+            ).fetchone()
+        if row is None or row[1] <= _now():
+            return None
+        self._submit(("touch", key, _now()))
+        return pickle.loads(zlib.decompress(row[0])), row[1]
+
+    def put(self, key: tuple, value, expires: float, owner: str = None):
+        try:
+            blob = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception as e:
+            # Not every cached object pickles; it simply stays memory-only.
+            logger.debug(f"[CACHE_L2] Skipping unpicklable entry {key[2]}: {e}")
+            return
+        self._submit(("put", key, blob, owner, expires))
+
+    def delete_where(self, tenant_id: str, owner: str = None, key_prefix: str = None, unprefixed: bool = False):
+        """
+        Drop a tenant's entries, optionally only those written by `owner`, whose key starts
+        with `key_prefix`, or (`unprefixed`) that have no "namespace::" prefix at all.
+        Pending writes land first.
+        """
+        self.flush()
+        query = "DELETE FROM cache_entries WHERE tenant_id = ?"
+        params = [tenant_id]
+        if owner is not None:
+            query += " AND owner = ?"
+            params.append(owner)
+        if key_prefix:
+            query += " AND substr(key, 1, ?) = ?"
+            params.extend([len(key_prefix), key_prefix])
+        if unprefixed:
+            query += " AND instr(key, '::') = 0"
+        with self._conn_lock:
+            return self._connection().execute(query, params).rowcount
+
+    def _submit(self, op: tuple):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(op)
+        except queue.Full:
+            logger.debug("[CACHE_L2] Write-behind queue full, dropping update")
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="cache-l2-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + CACHE_L2_FLUSH_INTERVAL_SECONDS
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                handle_error(e, "CACHE_L2_WRITE_001")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: list):
+        now = _now()
+        with self._conn_lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for op in batch:
+                    if op[0] == "put":
+                        _, key, blob, owner, expires = op
+                        conn.execute("""
+                        INSERT OR REPLACE INTO cache_entries
+                            (tenant_id, namespace, key, value, size, owner, expires, accessed)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        """, (*key, blob, len(blob), owner, expires, now))
+                    else:
+                        _, key, accessed = op
+                        conn.execute(
+                            "UPDATE cache_entries SET accessed = ? WHERE tenant_id = ? AND namespace = ? AND key = ?",
+                            (accessed, *key)
+                        )
+                conn.execute("DELETE FROM cache_entries WHERE expires <= ?", (now,))
+                self._evict(conn)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        doomed = []
+        for rowid, size in conn.execute("SELECT rowid, size FROM cache_entries ORDER BY accessed"):
+            doomed.append((rowid,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM cache_entries WHERE rowid = ?", doomed)
+
+    def flush(self):
+        """Block until queued writes have been committed."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def total_bytes(self) -> int:
+        with self._conn_lock:
+            return self._connection().execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+
+    def usage_by_tenant(self) -> dict:
+        """{tenant_id: (entries, compressed bytes)} for live entries."""
+        with self._conn_lock:
+            rows = self._connection().execute(
+                "SELECT tenant_id, COUNT(*), SUM(size) FROM cache_entries WHERE expires > ? GROUP BY tenant_id",
+                (_now(),)
+            ).fetchall()
+        return {tenant_id: (count, size) for tenant_id, count, size in rows}
+
+    def close(self):
+        self.flush()
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_metrics = CacheMetrics()
+
+
+def _record_drop(key, reason: str):
+    if isinstance(key, tuple) and len(key) == 3:
+        _metrics.record(key[0], _cache_namespace(key[2]), "evictions" if reason == "evicted" else "expirations")
+
+
+_cache = LRUCache()
+_cache.on_drop = _record_drop
+_disk = None
+_disk_lock = threading.Lock()
+
+
+def get_cache_store() -> LRUCache:
+    return _cache
+
+
+def get_disk_cache():
+    """The process-wide L2 tier, or None when disabled."""
+    global _disk
+    if not CACHE_L2_ENABLED:
+        return None
+    if _disk is None:
+        with _disk_lock:
+            if _disk is None:
+                _disk = DiskCache()
+    return _disk
+
+
+def get_cache_metrics() -> CacheMetrics:
+    return _metrics
+
+
+def _flush_disk_cache():
+    _metrics.emit()
+    if _disk is not None:
+        _disk.flush()
+
+
+atexit.register(_flush_disk_cache)
+
+
+def _scoped_key(key: str, session_scoped: bool) -> tuple:
+    namespace = get_session_id() if session_scoped else SHARED_NAMESPACE
+    return (get_tenant_id(), namespace, key)
+
+
+def content_key(namespace: str, inputs: dict) -> str:
     """
-    Check if a cache entry is expired.
-    Each cache entry is stored as: {"value": ..., "ts": timestamp}
+    Build a shared cache key from every input that shapes a generated artifact.
+    Shared entries are reused tenant-wide and persisted to disk, so a key that
+    omits an input would hand one case's document to another.
     """
-    return (_now() - entry.get("ts", 0)) > CACHE_EXPIRY_SECONDS
+    payload = json.dumps(inputs, sort_keys=True, default=str)
+    return f"{namespace}::" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
 
 def clear_caches():
     """
-    Clear all tenant/session-level caches for demand, FOIA, memo, and party edits.
-    Scopes by tenant_id + session_id to prevent accidental cross-tenant leaks.
+    Clear the current session's cache entries: its private namespace plus the shared
+    entries it wrote. Other sessions' artifacts and other tenants are never touched.
     """
     try:
         tenant_id = get_tenant_id()
         session_id = get_session_id()
 
-        cache_keys = [
-            f"{tenant_id}_{session_id}_demand_cache",
-            f"{tenant_id}_{session_id}_foia_cache",
-            f"{tenant_id}_{session_id}_memo_cache",
-            f"{tenant_id}_{session_id}_party_edits"
-        ]
+        _cache.clear(
+            lambda k, e: k[0] == tenant_id and (k[1] == session_id or e["owner"] == session_id)
+        )
+        disk = get_disk_cache()
+        if disk is not None:
+            disk.delete_where(tenant_id, owner=session_id)
 
-        for key in cache_keys:
+        for key in LEGACY_SESSION_KEYS:
             if key in st.session_state:
                 del st.session_state[key]
 
@@ -47,40 +472,55 @@ def clear_caches():
         handle_error(e, "CACHE_CLEAR_001")
 
 
-def get_cache(key: str):
+def get_cache(key: str, session_scoped: bool = False):
     """
-    Get a value from the tenant/session-scoped cache, respecting expiration.
+    Get a value from the tenant-scoped cache, respecting expiration.
+    Entries are shared by all sessions of the tenant unless `session_scoped` is set.
+    Shared misses fall through to the disk tier and are promoted back into memory.
     """
     try:
-        tenant_id = get_tenant_id()
-        session_id = get_session_id()
-        scoped_key = f"{tenant_id}_{session_id}_{key}"
-
-        entry = st.session_state.get(scoped_key)
-        if entry and not _is_expired(entry):
-            return entry["value"]
+        scoped_key = _scoped_key(key, session_scoped)
+        tenant_id, namespace = scoped_key[0], _cache_namespace(key)
+        hit = _cache.get_entry(scoped_key)
+        if hit is not None:
+            value, tokens = hit
+            _metrics.record(tenant_id, namespace, "hits")
+            _metrics.record(tenant_id, namespace, "tokens_saved", tokens)
+            return value
 
-        # Clear expired cache
-        if scoped_key in st.session_state:
-            del st.session_state[scoped_key]
-
-        return None
+        disk = get_disk_cache()
+        hit = disk.get(scoped_key) if disk is not None and not session_scoped else None
+        if hit is None:
+            _metrics.record(tenant_id, namespace, "misses")
+            return None
+        value, expires = hit
+        tokens = _estimate_value_tokens(value)
+        _cache.set(scoped_key, value, ttl=expires - _now(), tokens=tokens)
+        _metrics.record(tenant_id, namespace, "l2_hits")
+        _metrics.record(tenant_id, namespace, "tokens_saved", tokens)
+        return value
 
     except Exception as e:
         handle_error(e, "CACHE_GET_001")
         return None
 
 
-def set_cache(key: str, value):
+def set_cache(key: str, value, ttl: float = None, session_scoped: bool = False, tokens: int = None):
     """
-    Set a tenant/session-scoped cache entry with timestamp for expiry tracking.
+    Set a tenant-scoped cache entry (expires after `ttl` seconds, default CACHE_EXPIRY_SECONDS).
+    `tokens` is what regenerating the value would cost; it defaults to an estimate from its text.
     """
     try:
-        tenant_id = get_tenant_id()
-        session_id = get_session_id()
-        scoped_key = f"{tenant_id}_{session_id}_{key}"
+        scoped_key = _scoped_key(key, session_scoped)
+        owner = get_session_id()
+        ttl = CACHE_EXPIRY_SECONDS if ttl is None else ttl
+        tokens = _estimate_value_tokens(value) if tokens is None else tokens
+        _cache.set(scoped_key, value, ttl=ttl, owner=owner, tokens=tokens)
+        _metrics.record(scoped_key[0], _cache_namespace(key), "sets")
 
-        st.session_state[scoped_key] = {"value": value, "ts": _now()}
+        disk = get_disk_cache()
+        if disk is not None and not session_scoped:
+            disk.put(scoped_key, value, _now() + ttl, owner=owner)
 
     except Exception as e:
         handle_error(e, "CACHE_SET_001")
@@ -88,22 +528,78 @@ def set_cache(key: str, value):
 
 def get_cache_summary() -> dict:
     """
-    Return a summary of all cache keys for the current tenant/session.
+    Return a summary of the cache keys visible to the current tenant/session.
     Useful for Phase 5 test coverage and debugging.
     """
     try:
         tenant_id = get_tenant_id()
         session_id = get_session_id()
-        scoped_prefix = f"{tenant_id}_{session_id}_"
 
         return {
             key: {
-                "is_expired": _is_expired(value),
-                "timestamp": value.get("ts"),
+                "is_expired": entry["expires"] <= _now(),
+                "timestamp": entry["ts"],
+                "bytes": entry["size"],
+                "shared": namespace == SHARED_NAMESPACE,
             }
-            for key, value in st.session_state.items()
-            if key.startswith(scoped_prefix)
+            for (tenant, namespace, key), entry in _cache.items(
+                lambda k, e: k[0] == tenant_id and k[1] in (SHARED_NAMESPACE, session_id)
+            )
         }
     except Exception as e:
         handle_error(e, "CACHE_SUMMARY_001")
         return {}
+
+
+def get_cache_stats() -> dict:
+    """
+    Process-wide cache statistics for the admin panel:
+    {"namespaces": {(tenant_id, namespace): {counters..., "entries", "bytes", "hit_rate"}},
+     "memory_bytes", "disk": {tenant_id: (entries, bytes)}}.
+    """
+    try:
+        stats = {}
+        for key, counts in _metrics.snapshot().items():
+            stats[key] = {**{c: 0 for c in CACHE_COUNTERS}, **counts, "entries": 0, "bytes": 0}
+        for (tenant_id, _, key), entry in _cache.items():
+            row = stats.setdefault(
+                (tenant_id, _cache_namespace(key)),
+                {**{c: 0 for c in CACHE_COUNTERS}, "entries": 0, "bytes": 0}
+            )
+            row["entries"] += 1
+            row["bytes"] += entry["size"]
+        for row in stats.values():
+            lookups = row["hits"] + row["l2_hits"] + row["misses"]
+            row["hit_rate"] = round((row["hits"] + row["l2_hits"]) / lookups, 3) if lookups else None
+
+        disk = get_disk_cache()
+        return {
+            "namespaces": stats,
+            "memory_bytes": _cache.total_bytes,
+            "disk": disk.usage_by_tenant() if disk is not None else {},
+        }
+    except Exception as e:
+        handle_error(e, "CACHE_STATS_001")
+        return {"namespaces": {}, "memory_bytes": 0, "disk": {}}
+
+
+def invalidate_cache(tenant_id: str, namespace: str = None) -> int:
+    """
+    Drop a tenant's cached entries in both tiers, for every session, optionally limited to
+    one namespace (e.g. "demand"). Returns the number of in-memory entries removed.
+    """
+    try:
+        def matches(key, entry):
+            return key[0] == tenant_id and (namespace is None or _cache_namespace(key[2]) == namespace)
+
+        removed = _cache.clear(matches)
+        disk = get_disk_cache()
+        if disk is not None:
+            if namespace == "default":
+                disk.delete_where(tenant_id, unprefixed=True)
+            else:
+                disk.delete_where(tenant_id, key_prefix=f"{namespace}::" if namespace else None)
+        logger.info(f"[CACHE_INVALIDATE] 🧹 Cleared {removed} entries for tenant={tenant_id} namespace={namespace or '*'}")
+        return removed
+    except Exception as e:
+        handle_error(e, "CACHE_INVALIDATE_001", raise_it=True)
@@ -33,6 +33,7 @@ DEFAULT_SENDER_EMAIL = os.getenv("DEFAULT_SENDER_EMAIL", "noreply@yourdomain.com
 DROPBOX_TEMPLATES_ROOT = "/Templates"
 DROPBOX_EXAMPLES_ROOT = "/Examples"
 DROPBOX_TRAINING_VIDEO_DIR = "/Training Videos"
+DROPBOX_BATCH_OUTPUT_DIR = "/Batch Output"
 
 
 # ----------------------------
@@ -50,3 +51,16 @@ DROPBOX_DEMAND_EXAMPLES_DIR = f"{DROPBOX_EXAMPLES_ROOT}/Demand"
 DROPBOX_FOIA_EXAMPLES_DIR = f"{DROPBOX_EXAMPLES_ROOT}/FOIA"
 DROPBOX_MEDIATION_EXAMPLES_DIR = f"{DROPBOX_EXAMPLES_ROOT}/Mediation"
 DROPBOX_STYLE_EXAMPLES_DIR = f"{DROPBOX_EXAMPLES_ROOT}/Style_Transfer"
+
+# ----------------------------
+# 💵 OpenAI Pricing (USD per 1K tokens: prompt, completion)
+# ----------------------------
+MODEL_PRICING = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.005, 0.015),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+}
+
+# Upper bounds (ms) of the latency histogram buckets kept in usage rollups; the last bucket is open-ended.
+LATENCY_BUCKETS_MS = [250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000]
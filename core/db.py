@@ -2,8 +2,14 @@ import sqlite3
 import json
 import os
 import hashlib
-from datetime import datetime
+import hmac
+import queue
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from core.error_handling import handle_error
+from logger import logger
 from core.constants import (
     DROPBOX_TEMPLATES_ROOT,
     DROPBOX_EXAMPLES_ROOT,
@@ -14,18 +20,139 @@ from core.constants import (
     DROPBOX_DEMAND_EXAMPLES_DIR,
     DROPBOX_FOIA_EXAMPLES_DIR,
     DROPBOX_MEDIATION_EXAMPLES_DIR,
-    DROPBOX_STYLE_EXAMPLES_DIR 
+    DROPBOX_STYLE_EXAMPLES_DIR,
+    DROPBOX_TRAINING_VIDEO_DIR,
+    LATENCY_BUCKETS_MS,
+    MODEL_PRICING
 )
 
 DB_PATH = os.path.join("data", "legal_automation_hub.db")
 os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
 
+# === Connection pool ===
+# Connections are opened once and shared across Streamlit sessions/threads.
+DB_POOL_SIZE = 8
+DB_POOL_TIMEOUT_SECONDS = 30
+DB_STATEMENT_CACHE_SIZE = 256
+
+# WAL lets readers run alongside the writer and, with synchronous=NORMAL,
+# commits no longer fsync the database on every audit insert.
+DB_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=30000",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",      # 16 MB page cache per connection
+    "PRAGMA mmap_size=268435456",    # 256 MB memory-mapped reads
+)
+
+
+def _open_connection(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        path,
+        timeout=30,
+        isolation_level=None,
+        check_same_thread=False,
+        cached_statements=DB_STATEMENT_CACHE_SIZE,
+    )
+    conn.row_factory = sqlite3.Row
+    for pragma in DB_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of autocommit SQLite connections.
+    Connections are created lazily up to `size`; callers block when all are checked out.
+    Each connection keeps its own prepared-statement cache, so the fixed SQL strings
+    below are compiled once per connection instead of once per call.
+    """
+
+    def __init__(self, path: str, size: int = DB_POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return _open_connection(self.path)
+                except Exception:
+                    self._created -= 1
+                    raise
+        return self._idle.get(timeout=DB_POOL_TIMEOUT_SECONDS)
+
+    def _release(self, conn: sqlite3.Connection):
+        try:
+            if conn.in_transaction:
+                # Never hand out a connection with a half-finished transaction.
+                conn.rollback()
+        except sqlite3.Error:
+            # The connection is unusable; drop it so the pool can open a fresh one.
+            with self._lock:
+                self._created -= 1
+            conn.close()
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def close_all(self):
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+                self._created -= 1
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide pool, recreating it if DB_PATH has changed."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.path != DB_PATH:
+            if _pool is not None:
+                _pool.close_all()
+            _pool = ConnectionPool(DB_PATH)
+        return _pool
+
+
+@contextmanager
+def pooled_connection():
+    """Borrow a pooled connection for the duration of a `with` block."""
+    with get_pool().connection() as conn:
+        yield conn
+
+
 def get_connection():
+    """
+    Open a standalone connection with the same pragmas as the pool.
+    Prefer pooled_connection(); the caller must close this one.
+    """
     try:
-        conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return _open_connection(DB_PATH)
     except Exception as e:
         handle_error(e, code="DB_CONN_001", raise_it=True)
 
@@ -33,37 +160,207 @@ def get_connection():
 def init_db():
     """Initialize DB tables for audit logs and quotas."""
     try:
-        conn = get_connection()
-        cur = conn.cursor()
+        with pooled_connection() as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS audit_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tenant_id TEXT NOT NULL,
+                user_id TEXT,
+                action TEXT NOT NULL,
+                metadata TEXT,
+                hash TEXT NOT NULL,
+                timestamp TEXT NOT NULL
+            )
+            """)
+
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS quotas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tenant_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                limit_value INTEGER NOT NULL,
+                used_value INTEGER DEFAULT 0,
+                reset_at TEXT NOT NULL
+            )
+            """)
+
+            _run_migrations(conn)
+
+    except Exception as e:
+        handle_error(e, code="DB_INIT_001", raise_it=True)
+
 
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS audit_log (
+# ---------------------------
+# Schema migrations
+# ---------------------------
+# Applied in order and tracked with PRAGMA user_version. Append new steps; never edit old ones.
+MIGRATIONS = [
+    # 1: audit log indexes for tenant-scoped, newest-first browsing
+    [
+        "CREATE INDEX IF NOT EXISTS idx_audit_tenant_ts ON audit_log (tenant_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_audit_tenant_user_ts ON audit_log (tenant_id, user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_audit_tenant_action_ts ON audit_log (tenant_id, action, timestamp)",
+    ],
+    # 2: per-tenant hash chain and signed verification checkpoints
+    [
+        "ALTER TABLE audit_log ADD COLUMN prev_hash TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_audit_tenant_id ON audit_log (tenant_id, id)",
+        """
+        CREATE TABLE IF NOT EXISTS audit_checkpoints (
+            tenant_id TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            last_hash TEXT,
+            verified_at TEXT NOT NULL,
+            broken_at_id INTEGER,
+            signature TEXT
+        )
+        """,
+    ],
+    # 3: full-text index over audit action and metadata, kept in sync by triggers
+    [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS audit_log_fts USING fts5(
+            tenant_id, action, metadata,
+            content='audit_log', content_rowid='id'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS audit_log_fts_insert AFTER INSERT ON audit_log BEGIN
+            INSERT INTO audit_log_fts (rowid, tenant_id, action, metadata)
+            VALUES (new.id, new.tenant_id, new.action, new.metadata);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS audit_log_fts_delete AFTER DELETE ON audit_log BEGIN
+            INSERT INTO audit_log_fts (audit_log_fts, rowid, tenant_id, action, metadata)
+            VALUES ('delete', old.id, old.tenant_id, old.action, old.metadata);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS audit_log_fts_update AFTER UPDATE ON audit_log BEGIN
+            INSERT INTO audit_log_fts (audit_log_fts, rowid, tenant_id, action, metadata)
+            VALUES ('delete', old.id, old.tenant_id, old.action, old.metadata);
+            INSERT INTO audit_log_fts (rowid, tenant_id, action, metadata)
+            VALUES (new.id, new.tenant_id, new.action, new.metadata);
+        END
+        """,
+        "INSERT INTO audit_log_fts (audit_log_fts) VALUES ('rebuild')",
+    ],
+    # 4: append-only usage ledger with running totals
+    [
+        """
+        CREATE TABLE IF NOT EXISTS usage_ledger (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             tenant_id TEXT NOT NULL,
             user_id TEXT,
-            action TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            amount INTEGER NOT NULL,
             metadata TEXT,
             hash TEXT NOT NULL,
             timestamp TEXT NOT NULL
         )
-        """)
-
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS quotas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
+        """,
+        # One row per (tenant, user, event_type) plus a tenant-wide row with user_id = '*'.
+        """
+        CREATE TABLE IF NOT EXISTS usage_totals (
+            tenant_id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            events INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (tenant_id, user_id, event_type)
+        ) WITHOUT ROWID
+        """,
+    ],
+    # 5: time-bucketed quota counters, reservations, and a real key on quotas
+    [
+        "DELETE FROM quotas WHERE id NOT IN (SELECT MAX(id) FROM quotas GROUP BY tenant_id, key)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_quotas_tenant_key ON quotas (tenant_id, key)",
+        """
+        CREATE TABLE IF NOT EXISTS quota_buckets (
+            tenant_id TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            granularity TEXT NOT NULL,
+            bucket_start TEXT NOT NULL,
+            used INTEGER NOT NULL DEFAULT 0,
+            reserved INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (tenant_id, event_type, granularity, bucket_start)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS quota_reservations (
+            id TEXT PRIMARY KEY,
             tenant_id TEXT NOT NULL,
-            key TEXT NOT NULL,
-            limit_value INTEGER NOT NULL,
-            used_value INTEGER DEFAULT 0,
-            reset_at TEXT NOT NULL
+            event_type TEXT NOT NULL,
+            amount INTEGER NOT NULL,
+            hour_bucket TEXT NOT NULL,
+            day_bucket TEXT NOT NULL,
+            expires_at TEXT NOT NULL
         )
-        """)
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_quota_reservations_expiry ON quota_reservations (expires_at)",
+    ],
+    # 6: materialized OpenAI usage/cost rollups per tenant, model, section and day
+    [
+        """
+        CREATE TABLE IF NOT EXISTS usage_rollups (
+            tenant_id TEXT NOT NULL,
+            day TEXT NOT NULL,
+            model TEXT NOT NULL,
+            section TEXT NOT NULL,
+            requests INTEGER NOT NULL DEFAULT 0,
+            prompt_tokens INTEGER NOT NULL DEFAULT 0,
+            completion_tokens INTEGER NOT NULL DEFAULT 0,
+            total_tokens INTEGER NOT NULL DEFAULT 0,
+            cost_usd REAL NOT NULL DEFAULT 0,
+            latency_ms_sum REAL NOT NULL DEFAULT 0,
+            latency_histogram TEXT NOT NULL,
+            PRIMARY KEY (tenant_id, day, model, section)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL
+        )
+        """,
+    ],
+    # 7: shared GCRA rate-limit state, so limits hold across app processes
+    [
+        """
+        CREATE TABLE IF NOT EXISTS rate_limits (
+            key TEXT PRIMARY KEY,
+            tat REAL NOT NULL
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_rate_limits_tat ON rate_limits (tat)",
+    ],
+    # 8: named leases for jobs that must run in one app process at a time (audit archiving)
+    [
+        """
+        CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+        """,
+    ],
+]
 
-        conn.commit()
-        conn.close()
 
-    except Exception as e:
-        handle_error(e, code="DB_INIT_001", raise_it=True)
+def _run_migrations(conn: sqlite3.Connection):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {number}")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
 
 
 # ---------------------------
@@ -153,6 +450,62 @@ def rename_template(category: str, old_name: str, new_name: str):
         handle_error(e, code="DB_TEMPLATE_RENAME_001", raise_it=True)
 
 
+def delete_templates(category: str, filenames: list) -> dict:
+    """Delete several templates in one Dropbox batch job."""
+    from services.dropbox_client import delete_files_from_dropbox  # Lazy import
+    folder_map = {
+        "email": DROPBOX_EMAIL_TEMPLATE_DIR,
+        "demand": DROPBOX_DEMAND_TEMPLATE_DIR,
+        "mediation_memo": DROPBOX_MEDIATION_TEMPLATE_DIR,
+        "mediation": DROPBOX_MEDIATION_TEMPLATE_DIR,
+        "foia": DROPBOX_FOIA_TEMPLATE_DIR,
+        "batch_docs": f"{DROPBOX_TEMPLATES_ROOT}/Batch_Docs"
+    }
+    try:
+        paths = {f"{folder_map[category]}/{name}": name for name in filenames}
+        deleted, failed = delete_files_from_dropbox(list(paths))
+        return _batch_outcome(paths, deleted, failed)
+    except Exception as e:
+        handle_error(e, code="DB_TEMPLATE_DELETE_002", raise_it=True)
+
+
+def move_templates(category: str, renames: dict, target_category: str = None) -> dict:
+    """
+    Rename and/or move several templates in one Dropbox batch job.
+    `renames` maps current file name -> new file name (use the same name to only move).
+    """
+    from services.dropbox_client import move_files_in_dropbox  # Lazy import
+    folder_map = {
+        "email": DROPBOX_EMAIL_TEMPLATE_DIR,
+        "demand": DROPBOX_DEMAND_TEMPLATE_DIR,
+        "mediation_memo": DROPBOX_MEDIATION_TEMPLATE_DIR,
+        "mediation": DROPBOX_MEDIATION_TEMPLATE_DIR,
+        "foia": DROPBOX_FOIA_TEMPLATE_DIR,
+        "batch_docs": f"{DROPBOX_TEMPLATES_ROOT}/Batch_Docs"
+    }
+    try:
+        target_folder = folder_map[target_category or category]
+        paths = {f"{folder_map[category]}/{old}": old for old in renames}
+        moves = [(f"{folder_map[category]}/{old}", f"{target_folder}/{new}") for old, new in renames.items()]
+        moved, failed = move_files_in_dropbox(moves)
+        return _batch_outcome(paths, [old for old, _ in moved], failed)
+    except Exception as e:
+        handle_error(e, code="DB_TEMPLATE_RENAME_002", raise_it=True)
+
+
+def _batch_outcome(paths: dict, succeeded: list, failed: dict) -> dict:
+    """
+    Map Dropbox batch results back to file names: {"succeeded": [...], "failed": {name: error}}.
+    Paths come back normalized, so compare on the normalized form.
+    """
+    from services.dropbox_client import normalize_path  # Lazy import
+    by_path = {normalize_path(path): name for path, name in paths.items()}
+    return {
+        "succeeded": [by_path.get(path, path) for path in succeeded],
+        "failed": {by_path.get(path, path): error for path, error in failed.items()},
+    }
+
+
 # ---------------------------
 # Examples (Dropbox)
 # ---------------------------
@@ -236,41 +589,348 @@ def rename_example(category: str, old_name: str, new_name: str):
         handle_error(e, code="DB_EXAMPLES_RENAME_001", raise_it=True)
 
 
+def delete_examples(category: str, filenames: list) -> dict:
+    """Delete several examples in one Dropbox batch job."""
+    from services.dropbox_client import delete_files_from_dropbox  # Lazy import
+    folder_map = {
+        "demand": DROPBOX_DEMAND_EXAMPLES_DIR,
+        "foia": DROPBOX_FOIA_EXAMPLES_DIR,
+        "mediation": DROPBOX_MEDIATION_EXAMPLES_DIR,
+        "style_transfer": DROPBOX_STYLE_EXAMPLES_DIR
+    }
+    try:
+        paths = {f"{folder_map[category]}/{name}": name for name in filenames}
+        deleted, failed = delete_files_from_dropbox(list(paths))
+        return _batch_outcome(paths, deleted, failed)
+    except Exception as e:
+        handle_error(e, code="DB_EXAMPLES_DELETE_002", raise_it=True)
+
+
+def move_examples(category: str, renames: dict, target_category: str = None) -> dict:
+    """
+    Rename and/or move several examples in one Dropbox batch job.
+    `renames` maps current file name -> new file name (use the same name to only move).
+    """
+    from services.dropbox_client import move_files_in_dropbox  # Lazy import
+    folder_map = {
+        "demand": DROPBOX_DEMAND_EXAMPLES_DIR,
+        "foia": DROPBOX_FOIA_EXAMPLES_DIR,
+        "mediation": DROPBOX_MEDIATION_EXAMPLES_DIR,
+        "style_transfer": DROPBOX_STYLE_EXAMPLES_DIR
+    }
+    try:
+        target_folder = folder_map[target_category or category]
+        paths = {f"{folder_map[category]}/{old}": old for old in renames}
+        moves = [(f"{folder_map[category]}/{old}", f"{target_folder}/{new}") for old, new in renames.items()]
+        moved, failed = move_files_in_dropbox(moves)
+        return _batch_outcome(paths, [old for old, _ in moved], failed)
+    except Exception as e:
+        handle_error(e, code="DB_EXAMPLES_RENAME_002", raise_it=True)
+
+
 # ---------------------------
 # Audit Log
 # ---------------------------
 
-def insert_audit_event(tenant_id: str, user_id: str, action: str, metadata: dict = None):
-    try:
-        ts = datetime.utcnow().isoformat()
-        metadata_str = json.dumps(metadata or {})
-        record_string = f"{tenant_id}|{user_id}|{action}|{metadata_str}|{ts}"
-        record_hash = hashlib.sha256(record_string.encode()).hexdigest()
-
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-        INSERT INTO audit_log (tenant_id, user_id, action, metadata, hash, timestamp)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            tenant_id,
-            user_id,
-            action,
-            metadata_str,
-            record_hash,
-            ts
-        ))
-        conn.commit()
-        conn.close()
+_INSERT_AUDIT_SQL = """
+INSERT INTO audit_log (tenant_id, user_id, action, metadata, hash, prev_hash, timestamp)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _audit_hash(prev_hash, tenant_id, user_id, action, metadata_str, ts) -> str:
+    record_string = f"{tenant_id}|{user_id}|{action}|{metadata_str}|{ts}"
+    if prev_hash is not None:
+        # Chained rows also commit to the previous row of the same tenant, so
+        # deleting or reordering rows breaks every later hash.
+        record_string = f"{prev_hash}|{record_string}"
+    return hashlib.sha256(record_string.encode()).hexdigest()
+
+
+def _chain_head(conn: sqlite3.Connection, tenant_id: str) -> str:
+    row = conn.execute(
+        "SELECT hash FROM audit_log WHERE tenant_id = ? ORDER BY id DESC LIMIT 1", (tenant_id,)
+    ).fetchone()
+    return row["hash"] if row else ""
+
+
+def insert_audit_event(tenant_id: str, user_id: str, action: str, metadata: dict = None, timestamp: str = None):
+    try:
+        insert_audit_events([{
+            "tenant_id": tenant_id,
+            "user_id": user_id,
+            "action": action,
+            "metadata": metadata,
+            "timestamp": timestamp,
+        }])
     except Exception as e:
         handle_error(e, code="DB_AUDIT_INSERT_001", raise_it=True)
 
 
-def get_audit_events(tenant_id: str, user_id: str = None, action: str = None, limit: int = 50):
+def insert_audit_events(events: list) -> int:
+    """
+    Insert many audit events in a single transaction, extending each tenant's hash chain.
+    Each event is a dict with tenant_id, user_id, action, metadata and (optionally) timestamp.
+    """
     try:
-        conn = get_connection()
-        cur = conn.cursor()
+        if not events:
+            return 0
+        with pooled_connection() as conn:
+            # IMMEDIATE takes the write lock up front, so chain heads cannot move underneath us.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                heads, rows = {}, []
+                for e in events:
+                    tenant_id = e["tenant_id"]
+                    if tenant_id not in heads:
+                        heads[tenant_id] = _chain_head(conn, tenant_id)
+                    ts = e.get("timestamp") or datetime.utcnow().isoformat()
+                    metadata_str = json.dumps(e.get("metadata") or {})
+                    prev_hash = heads[tenant_id]
+                    record_hash = _audit_hash(prev_hash, tenant_id, e.get("user_id"), e["action"], metadata_str, ts)
+                    heads[tenant_id] = record_hash
+                    rows.append((tenant_id, e.get("user_id"), e["action"], metadata_str, record_hash, prev_hash, ts))
+                conn.executemany(_INSERT_AUDIT_SQL, rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+    except Exception as e:
+        handle_error(e, code="DB_AUDIT_INSERT_002", raise_it=True)
+
+
+# ---------------------------
+# Audit chain verification
+# ---------------------------
+
+AUDIT_VERIFY_BATCH_SIZE = 5000
+
+
+def _checkpoint_signature(tenant_id: str, last_id: int, last_hash: str, broken_at_id) -> str:
+    """HMAC over a checkpoint; None when AUDIT_CHECKPOINT_KEY is not configured."""
+    key = os.getenv("AUDIT_CHECKPOINT_KEY")
+    if not key:
+        return None
+    message = f"{tenant_id}|{last_id}|{last_hash}|{broken_at_id}".encode()
+    return hmac.new(key.encode(), message, hashlib.sha256).hexdigest()
+
+
+def _load_checkpoint(conn: sqlite3.Connection, tenant_id: str):
+    row = conn.execute("SELECT * FROM audit_checkpoints WHERE tenant_id = ?", (tenant_id,)).fetchone()
+    if not row:
+        return None
+    expected = _checkpoint_signature(tenant_id, row["last_id"], row["last_hash"], row["broken_at_id"])
+    if expected is not None and not hmac.compare_digest(expected, row["signature"] or ""):
+        # A forged or stale checkpoint is ignored and the chain is re-verified from the start.
+        return None
+    return dict(row)
+
+
+def _watermark(conn: sqlite3.Connection, tenant_id: str) -> dict:
+    checkpoint = _load_checkpoint(conn, tenant_id)
+    if not checkpoint:
+        return {"verified_through_id": 0, "verified_at": None, "broken_at_id": None}
+    return {
+        "verified_through_id": checkpoint["last_id"],
+        "verified_at": checkpoint["verified_at"],
+        "broken_at_id": checkpoint["broken_at_id"],
+    }
+
+
+def get_verification_watermark(tenant_id: str) -> dict:
+    """Return {"verified_through_id", "verified_at", "broken_at_id"} for a tenant (zeros if never verified)."""
+    try:
+        with pooled_connection() as conn:
+            return _watermark(conn, tenant_id)
+    except Exception as e:
+        handle_error(e, code="DB_AUDIT_VERIFY_002", raise_it=True)
+
+
+def verify_audit_chain(tenant_id: str, max_rows: int = None) -> dict:
+    """
+    Walk a tenant's chain forward from its last checkpoint and advance the checkpoint.
+    Stops at the first row whose hash or link does not match and records it as broken_at_id.
+    """
+    try:
+        with pooled_connection() as conn:
+            checkpoint = _load_checkpoint(conn, tenant_id)
+            last_id, last_hash = 0, ""
+            if checkpoint:
+                if checkpoint["broken_at_id"] is not None:
+                    return _watermark(conn, tenant_id)
+                last_id, last_hash = checkpoint["last_id"], checkpoint["last_hash"] or ""
+                if last_id:
+                    # The checkpointed row itself must still be there, unchanged.
+                    anchor = conn.execute(
+                        "SELECT hash FROM audit_log WHERE id = ? AND tenant_id = ?", (last_id, tenant_id)
+                    ).fetchone()
+                    if not anchor or anchor["hash"] != last_hash:
+                        _save_checkpoint(conn, tenant_id, last_id, last_hash, last_id)
+                        return _watermark(conn, tenant_id)
+
+            broken_at_id, checked = None, 0
+            while broken_at_id is None and (max_rows is None or checked < max_rows):
+                rows = conn.execute(
+                    "SELECT id, user_id, action, metadata, hash, prev_hash, timestamp FROM audit_log "
+                    "WHERE tenant_id = ? AND id > ? ORDER BY id LIMIT ?",
+                    (tenant_id, last_id, AUDIT_VERIFY_BATCH_SIZE)
+                ).fetchall()
+                if not rows:
+                    break
+                for row in rows:
+                    # Rows written before chaining (prev_hash NULL) can only be checked individually.
+                    linked = row["prev_hash"] is None or row["prev_hash"] == last_hash
+                    expected = _audit_hash(
+                        row["prev_hash"], tenant_id, row["user_id"], row["action"], row["metadata"], row["timestamp"]
+                    )
+                    if not linked or expected != row["hash"]:
+                        broken_at_id = row["id"]
+                        break
+                    last_id, last_hash = row["id"], row["hash"]
+                    checked += 1
+
+            _save_checkpoint(conn, tenant_id, last_id, last_hash, broken_at_id)
+            return _watermark(conn, tenant_id)
+    except Exception as e:
+        handle_error(e, code="DB_AUDIT_VERIFY_001", raise_it=True)
+
+
+def _save_checkpoint(conn: sqlite3.Connection, tenant_id: str, last_id: int, last_hash: str, broken_at_id):
+    conn.execute("""
+    INSERT INTO audit_checkpoints (tenant_id, last_id, last_hash, verified_at, broken_at_id, signature)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(tenant_id) DO UPDATE SET
+        last_id = excluded.last_id,
+        last_hash = excluded.last_hash,
+        verified_at = excluded.verified_at,
+        broken_at_id = excluded.broken_at_id,
+        signature = excluded.signature
+    """, (
+        tenant_id, last_id, last_hash, datetime.utcnow().isoformat(), broken_at_id,
+        _checkpoint_signature(tenant_id, last_id, last_hash, broken_at_id)
+    ))
+
+
+# ---------------------------
+# Audit archive (hot side)
+# ---------------------------
+
+def get_archivable_audit_months(before: str) -> list:
+    """Return (tenant_id, "YYYY-MM") pairs that still have hot rows older than `before`."""
+    try:
+        with pooled_connection() as conn:
+            rows = conn.execute("""
+            SELECT DISTINCT tenant_id, substr(timestamp, 1, 7) AS month
+            FROM audit_log WHERE timestamp < ? ORDER BY tenant_id, month
+            """, (before,)).fetchall()
+        return [(r["tenant_id"], r["month"]) for r in rows]
+    except Exception as e:
+        handle_error(e, code="DB_AUDIT_ARCHIVE_001", raise_it=True)
+
+
+def get_audit_rows_for_archive(tenant_id: str, start: str, end: str, below_id: int) -> list:
+    """Rows of one tenant-month with id < below_id (i.e. already chain-verified), oldest first."""
+    try:
+        with pooled_connection() as conn:
+            rows = conn.execute("""
+            SELECT id, tenant_id, user_id, action, metadata, hash, prev_hash, timestamp FROM audit_log
+            WHERE tenant_id = ? AND timestamp >= ? AND timestamp < ? AND id < ?
+            ORDER BY id
+            """, (tenant_id, start, end, below_id)).fetchall()
+        return [dict(r) for r in rows]
+    except Exception as e:
+        handle_error(e, code="DB_AUDIT_ARCHIVE_002", raise_it=True)
+
+
+def purge_audit_rows(tenant_id: str, start: str, end: str, first_id: int, last_id: int) -> int:
+    """Delete hot rows that have been written to an archive segment. Idempotent."""
+    try:
+        with pooled_connection() as conn:
+            cur = conn.execute("""
+            DELETE FROM audit_log
+            WHERE tenant_id = ? AND timestamp >= ? AND timestamp < ? AND id BETWEEN ? AND ?
+            """, (tenant_id, start, end, first_id, last_id))
+            return cur.rowcount
+    except Exception as e:
+        handle_error(e, code="DB_AUDIT_ARCHIVE_003", raise_it=True)
 
+
+def iter_audit_rows(tenant_id: str, start: str = None, end: str = None, chunk_size: int = 1000):
+    """
+    Yield a tenant's hot audit rows oldest first, `chunk_size` rows per keyset query.
+    A pooled connection is held only while a chunk is fetched, so a slow or abandoned consumer
+    pins no pool slot and no read transaction. The table is append-only and id-ordered, so
+    capping at the max id seen when the export starts gives a consistent result.
+    """
+    conditions, params = "tenant_id = ?", [tenant_id]
+    if start:
+        conditions += " AND timestamp >= ?"
+        params.append(start)
+    if end:
+        conditions += " AND timestamp < ?"
+        params.append(end)
+
+    with pooled_connection() as conn:
+        last_id = conn.execute("SELECT MAX(id) FROM audit_log WHERE tenant_id = ?", (tenant_id,)).fetchone()[0]
+    if last_id is None:
+        return
+
+    after_id = 0
+    while True:
+        with pooled_connection() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM audit_log WHERE {conditions} AND id > ? AND id <= ? ORDER BY id LIMIT ?",
+                params + [after_id, last_id, chunk_size]
+            ).fetchall()
+        if not rows:
+            return
+        for row in rows:
+            yield dict(row)
+        after_id = rows[-1]["id"]
+
+
+def check_audit_row(row: dict, previous_hash) -> tuple:
+    """
+    Return (hash_valid, chain_linked) for one row given the previous row's hash.
+    chain_linked is None when the previous hash is unknown.
+    """
+    expected = _audit_hash(
+        row.get("prev_hash"), row["tenant_id"], row.get("user_id"), row["action"], row.get("metadata"), row["timestamp"]
+    )
+    if row.get("prev_hash") is None:
+        linked = True  # written before chaining
+    elif previous_hash is None:
+        linked = None
+    else:
+        linked = row["prev_hash"] == previous_hash
+    return expected == row["hash"], linked
+
+
+def get_audit_tenants() -> list:
+    try:
+        with pooled_connection() as conn:
+            return [r["tenant_id"] for r in conn.execute("SELECT DISTINCT tenant_id FROM audit_log")]
+    except Exception as e:
+        handle_error(e, code="DB_AUDIT_VERIFY_003", raise_it=True)
+
+
+def get_audit_events(
+    tenant_id: str,
+    user_id: str = None,
+    action: str = None,
+    limit: int = 50,
+    before_timestamp: str = None,
+    before_id: int = None,
+    start: str = None,
+    end: str = None,
+):
+    """
+    Return up to `limit` events, newest first.
+    Keyset pagination: pass the timestamp and id of the last row of the previous page
+    as before_timestamp/before_id. `start` is inclusive and `end` exclusive (ISO strings).
+    """
+    try:
         query = "SELECT * FROM audit_log WHERE tenant_id = ?"
         params = [tenant_id]
 
@@ -280,38 +940,116 @@ def get_audit_events(tenant_id: str, user_id: str = None, action: str = None, li
         if action:
             query += " AND action = ?"
             params.append(action)
+        if start:
+            query += " AND timestamp >= ?"
+            params.append(start)
+        if end:
+            query += " AND timestamp < ?"
+            params.append(end)
+        if before_timestamp is not None and before_id is not None:
+            query += " AND (timestamp, id) < (?, ?)"
+            params.extend([before_timestamp, before_id])
 
-        query += " ORDER BY timestamp DESC LIMIT ?"
+        query += " ORDER BY timestamp DESC, id DESC LIMIT ?"
         params.append(limit)
 
-        cur.execute(query, params)
-        rows = []
-        for row in cur.fetchall():
-            row_dict = dict(row)
-            record_string = f"{row_dict['tenant_id']}|{row_dict.get('user_id')}|{row_dict['action']}|{row_dict.get('metadata', '{}')}|{row_dict['timestamp']}"
-            expected_hash = hashlib.sha256(record_string.encode()).hexdigest()
-            row_dict["tampered"] = (row_dict["hash"] != expected_hash)
-            rows.append(row_dict)
-        conn.close()
-        return rows
+        with pooled_connection() as conn:
+            fetched = conn.execute(query, params).fetchall()
+            return _with_verification(conn, tenant_id, fetched)
 
     except Exception as e:
         handle_error(e, code="DB_AUDIT_GET_001", raise_it=True)
 
 
+def _with_verification(conn: sqlite3.Connection, tenant_id: str, fetched) -> list:
+    """Tag rows from the verifier's watermark; page loads never hash anything."""
+    watermark = _watermark(conn, tenant_id)
+    verified_through = watermark["verified_through_id"]
+    broken_at = watermark["broken_at_id"]
+
+    rows = []
+    for row in fetched:
+        row_dict = dict(row)
+        row_dict["verified"] = row_dict["id"] <= verified_through
+        row_dict["tampered"] = broken_at is not None and row_dict["id"] == broken_at
+        rows.append(row_dict)
+    return rows
+
+
+def fts_query(text: str) -> str:
+    """
+    Turn free text into a safe FTS5 query: every whitespace-separated term must match,
+    as a quoted phrase with prefix matching. FTS operators typed by the user are treated as text.
+    """
+    terms = [t.replace('"', '""') for t in text.split()]
+    return " AND ".join(f'"{t}"*' for t in terms)
+
+
+def search_audit_events(
+    tenant_id: str,
+    text: str,
+    user_id: str = None,
+    action: str = None,
+    limit: int = 50,
+    before_id: int = None,
+    start: str = None,
+    end: str = None,
+):
+    """
+    Full-text search over action and metadata (file names, case ids, template names...).
+    Results are newest first by id; pass the last id of a page as before_id for the next one.
+    """
+    try:
+        match = fts_query(text)
+        if not match:
+            return []
+        # The tenant column is part of the index, so other tenants' rows are never visited.
+        tenant_phrase = tenant_id.replace('"', '""')
+        match = f'tenant_id : "{tenant_phrase}" AND ({match})'
+
+        query = """
+        SELECT a.* FROM audit_log_fts f JOIN audit_log a ON a.id = f.rowid
+        WHERE audit_log_fts MATCH ? AND a.tenant_id = ?
+        """
+        params = [match, tenant_id]
+
+        if user_id:
+            query += " AND a.user_id = ?"
+            params.append(user_id)
+        if action:
+            query += " AND a.action = ?"
+            params.append(action)
+        if start:
+            query += " AND a.timestamp >= ?"
+            params.append(start)
+        if end:
+            query += " AND a.timestamp < ?"
+            params.append(end)
+        if before_id is not None:
+            query += " AND f.rowid < ?"
+            params.append(before_id)
+
+        query += " ORDER BY f.rowid DESC LIMIT ?"
+        params.append(limit)
+
+        with pooled_connection() as conn:
+            fetched = conn.execute(query, params).fetchall()
+            return _with_verification(conn, tenant_id, fetched)
+
+    except Exception as e:
+        handle_error(e, code="DB_AUDIT_SEARCH_001", raise_it=True)
+
+
 # ---------------------------
 # Quotas
 # ---------------------------
 
 def get_quota(tenant_id: str, key: str):
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-        SELECT * FROM quotas WHERE tenant_id = ? AND key = ?
-        """, (tenant_id, key))
-        row = cur.fetchone()
-        conn.close()
+        with pooled_connection() as conn:
+            row = conn.execute("""
+            SELECT * FROM quotas WHERE tenant_id = ? AND key = ?
+            """, (tenant_id, key)).fetchone()
         return dict(row) if row else None
     except Exception as e:
         handle_error(e, code="DB_QUOTA_GET_001", raise_it=True)
@@ -319,36 +1057,463 @@ def get_quota(tenant_id: str, key: str):
 
 def set_quota(tenant_id: str, key: str, limit_value: int, reset_at: str):
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-        INSERT INTO quotas (tenant_id, key, limit_value, used_value, reset_at)
-        VALUES (?, ?, ?, 0, ?)
-        ON CONFLICT(tenant_id, key) DO UPDATE SET limit_value = excluded.limit_value, reset_at = excluded.reset_at
-        """, (tenant_id, key, limit_value, reset_at))
-        conn.commit()
-        conn.close()
+        with pooled_connection() as conn:
+            conn.execute("""
+            INSERT INTO quotas (tenant_id, key, limit_value, used_value, reset_at)
+            VALUES (?, ?, ?, 0, ?)
+            ON CONFLICT(tenant_id, key) DO UPDATE SET limit_value = excluded.limit_value, reset_at = excluded.reset_at
+            """, (tenant_id, key, limit_value, reset_at))
     except Exception as e:
         handle_error(e, code="DB_QUOTA_SET_001", raise_it=True)
 
 
 def increment_quota_usage(tenant_id: str, key: str, amount: int = 1):
     try:
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-        UPDATE quotas SET used_value = used_value + ? WHERE tenant_id = ? AND key = ?
-        """, (amount, tenant_id, key))
-        conn.commit()
-        conn.close()
+        with pooled_connection() as conn:
+            conn.execute("""
+            UPDATE quotas SET used_value = used_value + ? WHERE tenant_id = ? AND key = ?
+            """, (amount, tenant_id, key))
     except Exception as e:
         handle_error(e, code="DB_QUOTA_INCREMENT_001", raise_it=True)
 
+# ---------------------------
+# Quota windows
+# ---------------------------
+# Usage is counted in hourly and daily buckets. A window is the sum of its most recent
+# buckets: "daily" is a sliding 24 hours, "monthly" a sliding 30 days.
+QUOTA_BUCKET_FORMATS = {"hour": "%Y-%m-%dT%H", "day": "%Y-%m-%d"}
+QUOTA_WINDOWS = {"daily": ("hour", timedelta(hours=23)), "monthly": ("day", timedelta(days=29))}
+# Buckets older than this can never count toward a window again.
+QUOTA_BUCKET_RETENTION = {"hour": timedelta(days=2), "day": timedelta(days=60)}
+# Reservations that are never committed or released (e.g. a crashed worker) are refunded after this.
+QUOTA_RESERVATION_TTL_SECONDS = 15 * 60
+
+
+def _bucket(now: datetime, granularity: str) -> str:
+    return now.strftime(QUOTA_BUCKET_FORMATS[granularity])
+
+
+def _bump_bucket(conn, tenant_id, event_type, granularity, bucket_start, used=0, reserved=0):
+    conn.execute("""
+    INSERT INTO quota_buckets (tenant_id, event_type, granularity, bucket_start, used, reserved)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(tenant_id, event_type, granularity, bucket_start) DO UPDATE SET
+        used = used + excluded.used,
+        reserved = MAX(reserved + excluded.reserved, 0)
+    """, (tenant_id, event_type, granularity, bucket_start, used, reserved))
+
+
+def _window_usage(conn: sqlite3.Connection, tenant_id: str, event_type: str, now: datetime) -> dict:
+    usage = {}
+    for window, (granularity, span) in QUOTA_WINDOWS.items():
+        row = conn.execute("""
+        SELECT COALESCE(SUM(used), 0) AS used, COALESCE(SUM(reserved), 0) AS reserved FROM quota_buckets
+        WHERE tenant_id = ? AND event_type = ? AND granularity = ? AND bucket_start >= ?
+        """, (tenant_id, event_type, granularity, _bucket(now - span, granularity))).fetchone()
+        usage[window] = {"used": row["used"], "reserved": row["reserved"]}
+    return usage
+
+
+def _expire_reservations(conn: sqlite3.Connection, now: datetime):
+    expired = conn.execute(
+        "SELECT * FROM quota_reservations WHERE expires_at < ?", (now.isoformat(),)
+    ).fetchall()
+    for r in expired:
+        _release_reservation(conn, r)
+
+
+def _release_reservation(conn: sqlite3.Connection, reservation):
+    _bump_bucket(conn, reservation["tenant_id"], reservation["event_type"], "hour",
+                 reservation["hour_bucket"], reserved=-reservation["amount"])
+    _bump_bucket(conn, reservation["tenant_id"], reservation["event_type"], "day",
+                 reservation["day_bucket"], reserved=-reservation["amount"])
+    conn.execute("DELETE FROM quota_reservations WHERE id = ?", (reservation["id"],))
+
+
+def _prune_buckets(conn: sqlite3.Connection, tenant_id: str, event_type: str, now: datetime):
+    for granularity, keep in QUOTA_BUCKET_RETENTION.items():
+        conn.execute("""
+        DELETE FROM quota_buckets
+        WHERE tenant_id = ? AND event_type = ? AND granularity = ? AND bucket_start < ?
+        """, (tenant_id, event_type, granularity, _bucket(now - keep, granularity)))
+
+
+@contextmanager
+def _write_transaction():
+    with pooled_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def reserve_quota(tenant_id: str, event_type: str, amount: int, limits: dict, now: datetime = None):
+    """
+    Atomically check every window in `limits` ({"daily": n, "monthly": n}; None = unlimited)
+    and hold `amount` against them. Returns a reservation id, or None if any window would be exceeded.
+    """
+    try:
+        now = now or datetime.utcnow()
+        with _write_transaction() as conn:
+            _expire_reservations(conn, now)
+            usage = _window_usage(conn, tenant_id, event_type, now)
+            for window, limit in limits.items():
+                if limit is not None and usage[window]["used"] + usage[window]["reserved"] + amount > limit:
+                    return None
+
+            reservation_id = uuid.uuid4().hex
+            hour_bucket, day_bucket = _bucket(now, "hour"), _bucket(now, "day")
+            _bump_bucket(conn, tenant_id, event_type, "hour", hour_bucket, reserved=amount)
+            _bump_bucket(conn, tenant_id, event_type, "day", day_bucket, reserved=amount)
+            conn.execute("""
+            INSERT INTO quota_reservations (id, tenant_id, event_type, amount, hour_bucket, day_bucket, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                reservation_id, tenant_id, event_type, amount, hour_bucket, day_bucket,
+                (now + timedelta(seconds=QUOTA_RESERVATION_TTL_SECONDS)).isoformat()
+            ))
+            _prune_buckets(conn, tenant_id, event_type, now)
+            return reservation_id
+    except Exception as e:
+        handle_error(e, code="DB_QUOTA_RESERVE_001", raise_it=True)
+
+
+def commit_quota(reservation_id: str, actual_amount: int, user_id: str = None, metadata: dict = None,
+                 now: datetime = None, tenant_id: str = None, event_type: str = None) -> bool:
+    """
+    Replace a reservation with the actual usage: the hold is dropped and the real amount is
+    written to the ledger, running totals and buckets in the same transaction.
+    Returns False if the reservation had already expired or been swept; the work still happened,
+    so the usage is recorded against `tenant_id`/`event_type` (callers should always pass them).
+    """
+    try:
+        now = now or datetime.utcnow()
+        with _write_transaction() as conn:
+            reservation = conn.execute(
+                "SELECT * FROM quota_reservations WHERE id = ?", (reservation_id,)
+            ).fetchone()
+            if reservation is not None:
+                _release_reservation(conn, reservation)
+                tenant_id, event_type = reservation["tenant_id"], reservation["event_type"]
+            elif tenant_id is None or event_type is None:
+                logger.error(
+                    f"[QUOTA] ❌ Reservation {reservation_id} expired and no tenant/event type was given; "
+                    f"{actual_amount} units not recorded"
+                )
+                return False
+            else:
+                logger.warning(f"[QUOTA] ⚠️ Reservation {reservation_id} expired before commit; recording usage anyway")
+            _apply_usage(conn, [{
+                "tenant_id": tenant_id,
+                "user_id": user_id,
+                "event_type": event_type,
+                "amount": actual_amount,
+                "metadata": metadata,
+                "timestamp": now.isoformat(),
+            }])
+            return reservation is not None
+    except Exception as e:
+        handle_error(e, code="DB_QUOTA_COMMIT_001", raise_it=True)
+
+
+def release_quota(reservation_id: str):
+    """Refund a reservation in full (the guarded call failed or was cancelled)."""
+    try:
+        with _write_transaction() as conn:
+            reservation = conn.execute(
+                "SELECT * FROM quota_reservations WHERE id = ?", (reservation_id,)
+            ).fetchone()
+            if reservation is not None:
+                _release_reservation(conn, reservation)
+    except Exception as e:
+        handle_error(e, code="DB_QUOTA_RELEASE_001", raise_it=True)
+
+
+def get_quota_usage(tenant_id: str, event_type: str, now: datetime = None) -> dict:
+    """Current {"daily": {"used", "reserved"}, "monthly": {...}} for one tenant and event type."""
+    try:
+        with pooled_connection() as conn:
+            return _window_usage(conn, tenant_id, event_type, now or datetime.utcnow())
+    except Exception as e:
+        handle_error(e, code="DB_QUOTA_USAGE_001", raise_it=True)
+
+
+# ---------------------------
+# Usage ledger
+# ---------------------------
+
+USAGE_TENANT_TOTAL = "*"
+
+_INSERT_USAGE_SQL = """
+INSERT INTO usage_ledger (tenant_id, user_id, event_type, amount, metadata, hash, timestamp)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+_UPSERT_USAGE_TOTAL_SQL = """
+INSERT INTO usage_totals (tenant_id, user_id, event_type, total, events, updated_at)
+VALUES (?, ?, ?, ?, 1, ?)
+ON CONFLICT(tenant_id, user_id, event_type) DO UPDATE SET
+    total = total + excluded.total,
+    events = events + 1,
+    updated_at = excluded.updated_at
+"""
+
+
+def _usage_row(event: dict) -> tuple:
+    ts = event.get("timestamp") or datetime.utcnow().isoformat()
+    metadata_str = json.dumps(event.get("metadata") or {}, sort_keys=True)
+    record_string = f"{event['tenant_id']}|{event.get('user_id')}|{event['event_type']}|{event['amount']}|{metadata_str}|{ts}"
+    record_hash = hashlib.sha256(record_string.encode()).hexdigest()
+    return (event["tenant_id"], event.get("user_id"), event["event_type"], event["amount"], metadata_str, record_hash, ts)
+
+
+def _apply_usage(conn: sqlite3.Connection, events: list):
+    """Append ledger rows and bump running totals; caller owns the transaction."""
+    for event in events:
+        row = _usage_row(event)
+        tenant_id, user_id, event_type, amount, _, _, ts = row
+        conn.execute(_INSERT_USAGE_SQL, row)
+        conn.execute(_UPSERT_USAGE_TOTAL_SQL, (tenant_id, USAGE_TENANT_TOTAL, event_type, amount, ts))
+        conn.execute(_UPSERT_USAGE_TOTAL_SQL, (tenant_id, user_id or "", event_type, amount, ts))
+        when = datetime.fromisoformat(ts)
+        for granularity in QUOTA_BUCKET_FORMATS:
+            _bump_bucket(conn, tenant_id, event_type, granularity, _bucket(when, granularity), used=amount)
+
+
+def record_usage_events(events: list) -> int:
+    """
+    Append usage events to the ledger and update the running totals atomically.
+    Each event is a dict with tenant_id, user_id, event_type, amount, metadata and (optionally) timestamp.
+    """
+    try:
+        if not events:
+            return 0
+        with _write_transaction() as conn:
+            _apply_usage(conn, events)
+        return len(events)
+    except Exception as e:
+        handle_error(e, code="DB_USAGE_INSERT_001", raise_it=True)
+
+
+def get_usage_total(tenant_id: str, event_type: str, user_id: str = None) -> int:
+    """Running total for one event type (tenant-wide unless user_id is given). Single key lookup."""
+    try:
+        with pooled_connection() as conn:
+            row = conn.execute(
+                "SELECT total FROM usage_totals WHERE tenant_id = ? AND user_id = ? AND event_type = ?",
+                (tenant_id, USAGE_TENANT_TOTAL if user_id is None else user_id, event_type)
+            ).fetchone()
+        return row["total"] if row else 0
+    except Exception as e:
+        handle_error(e, code="DB_USAGE_GET_001", raise_it=True)
+
+
+def get_usage_totals(tenant_id: str, user_id: str = None) -> dict:
+    """All running totals for a tenant (or one of its users) as {event_type: total}."""
+    try:
+        with pooled_connection() as conn:
+            rows = conn.execute(
+                "SELECT event_type, total FROM usage_totals WHERE tenant_id = ? AND user_id = ?",
+                (tenant_id, USAGE_TENANT_TOTAL if user_id is None else user_id)
+            ).fetchall()
+        return {r["event_type"]: r["total"] for r in rows}
+    except Exception as e:
+        handle_error(e, code="DB_USAGE_GET_002", raise_it=True)
+
+
+# ---------------------------
+# Usage rollups
+# ---------------------------
+
+USAGE_ROLLUP_NAME = "usage_rollups"
+USAGE_ROLLUP_BATCH_SIZE = 5000
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """USD cost of one call from MODEL_PRICING (0 for unknown models)."""
+    prompt_price, completion_price = MODEL_PRICING.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+def _latency_bucket(latency_ms: float) -> int:
+    for i, bound in enumerate(LATENCY_BUCKETS_MS):
+        if latency_ms <= bound:
+            return i
+    return len(LATENCY_BUCKETS_MS)
+
+
+def refresh_usage_rollups() -> int:
+    """
+    Fold ledger rows added since the last run into usage_rollups.
+    Progress is stored in rollup_state in the same transaction, so each row is counted once.
+    Returns the number of ledger rows consumed.
+    """
+    try:
+        consumed = 0
+        while True:
+            with _write_transaction() as conn:
+                state = conn.execute(
+                    "SELECT last_id FROM rollup_state WHERE name = ?", (USAGE_ROLLUP_NAME,)
+                ).fetchone()
+                last_id = state["last_id"] if state else 0
+                rows = conn.execute(
+                    "SELECT id, tenant_id, event_type, amount, metadata, timestamp FROM usage_ledger "
+                    "WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, USAGE_ROLLUP_BATCH_SIZE)
+                ).fetchall()
+                if not rows:
+                    return consumed
+
+                deltas = {}
+                for row in rows:
+                    if row["event_type"] != "openai_tokens":
+                        continue
+                    meta = json.loads(row["metadata"] or "{}")
+                    model = meta.get("model") or "unknown"
+                    key = (row["tenant_id"], row["timestamp"][:10], model, meta.get("section") or "")
+                    d = deltas.setdefault(key, {
+                        "requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+                        "cost_usd": 0.0, "latency_ms_sum": 0.0,
+                        "latency_histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                    })
+                    prompt_tokens = meta.get("prompt_tokens") or 0
+                    completion_tokens = meta.get("completion_tokens") or 0
+                    latency_ms = (meta.get("latency") or 0) * 1000
+                    d["requests"] += 1
+                    d["prompt_tokens"] += prompt_tokens
+                    d["completion_tokens"] += completion_tokens
+                    d["total_tokens"] += row["amount"]
+                    d["cost_usd"] += estimate_cost(model, prompt_tokens, completion_tokens)
+                    d["latency_ms_sum"] += latency_ms
+                    d["latency_histogram"][_latency_bucket(latency_ms)] += 1
+
+                for (tenant_id, day, model, section), d in deltas.items():
+                    existing = conn.execute(
+                        "SELECT latency_histogram FROM usage_rollups "
+                        "WHERE tenant_id = ? AND day = ? AND model = ? AND section = ?",
+                        (tenant_id, day, model, section)
+                    ).fetchone()
+                    histogram = d["latency_histogram"]
+                    if existing:
+                        histogram = [a + b for a, b in zip(json.loads(existing["latency_histogram"]), histogram)]
+                    conn.execute("""
+                    INSERT INTO usage_rollups (
+                        tenant_id, day, model, section, requests, prompt_tokens, completion_tokens,
+                        total_tokens, cost_usd, latency_ms_sum, latency_histogram
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(tenant_id, day, model, section) DO UPDATE SET
+                        requests = requests + excluded.requests,
+                        prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+                        completion_tokens = completion_tokens + excluded.completion_tokens,
+                        total_tokens = total_tokens + excluded.total_tokens,
+                        cost_usd = cost_usd + excluded.cost_usd,
+                        latency_ms_sum = latency_ms_sum + excluded.latency_ms_sum,
+                        latency_histogram = excluded.latency_histogram
+                    """, (
+                        tenant_id, day, model, section, d["requests"], d["prompt_tokens"], d["completion_tokens"],
+                        d["total_tokens"], d["cost_usd"], d["latency_ms_sum"], json.dumps(histogram)
+                    ))
+
+                conn.execute("""
+                INSERT INTO rollup_state (name, last_id) VALUES (?, ?)
+                ON CONFLICT(name) DO UPDATE SET last_id = excluded.last_id
+                """, (USAGE_ROLLUP_NAME, rows[-1]["id"]))
+                consumed += len(rows)
+    except Exception as e:
+        handle_error(e, code="DB_USAGE_ROLLUP_001", raise_it=True)
+
+
+def get_usage_rollups(tenant_id: str, since_day: str = None) -> list:
+    """Rollup rows for a tenant (optionally from `since_day`, "YYYY-MM-DD"), newest day first."""
+    try:
+        query = "SELECT * FROM usage_rollups WHERE tenant_id = ?"
+        params = [tenant_id]
+        if since_day:
+            query += " AND day >= ?"
+            params.append(since_day)
+        query += " ORDER BY day DESC, cost_usd DESC"
+        with pooled_connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [{**dict(r), "latency_histogram": json.loads(r["latency_histogram"])} for r in rows]
+    except Exception as e:
+        handle_error(e, code="DB_USAGE_ROLLUP_002", raise_it=True)
+
+
+# ---------------------------
+# Rate limits
+# ---------------------------
+
+def acquire_rate_limit(key: str, interval: float, window: float, now: float) -> bool:
+    """
+    GCRA step for `key` against the shared table: allow if the theoretical arrival time after
+    this request stays within `window` of `now`. State is one float per key.
+    """
+    try:
+        with _write_transaction() as conn:
+            row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            tat = max(row["tat"] if row else now, now) + interval
+            if tat - now > window:
+                return False
+            conn.execute(
+                "INSERT INTO rate_limits (key, tat) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                (key, tat)
+            )
+            return True
+    except Exception as e:
+        handle_error(e, code="DB_RATE_LIMIT_001", raise_it=True)
+
+
+def prune_rate_limits(now: float) -> int:
+    """Drop keys whose bucket has fully refilled (they behave exactly like unseen keys)."""
+    try:
+        with _write_transaction() as conn:
+            return conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,)).rowcount
+    except Exception as e:
+        handle_error(e, code="DB_RATE_LIMIT_002", raise_it=True)
+
+
+def acquire_lease(name: str, owner: str, ttl_seconds: float, now: float) -> bool:
+    """
+    Take (or renew) the named lease for `owner` until now + ttl_seconds. Fails while another
+    owner holds an unexpired lease; a crashed holder's lease simply runs out.
+    """
+    try:
+        with _write_transaction() as conn:
+            row = conn.execute("SELECT owner, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+            if row and row["owner"] != owner and row["expires_at"] > now:
+                return False
+            conn.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at",
+                (name, owner, now + ttl_seconds)
+            )
+            return True
+    except Exception as e:
+        handle_error(e, code="DB_LEASE_001", raise_it=True)
+
+
+def release_lease(name: str, owner: str):
+    """Give the lease up early (only if `owner` still holds it)."""
+    try:
+        with _write_transaction() as conn:
+            conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+    except Exception as e:
+        handle_error(e, code="DB_LEASE_002", raise_it=True)
+
+
 def get_training_videos():
-    """List all training videos from Dropbox folder."""
-    from services.dropbox_client import list_files  # lazy import
+    """
+    List all training videos in the Dropbox folder (name and path only).
+    Streaming links are minted lazily with get_temporary_link for the video being played,
+    so listing costs one Dropbox call regardless of how many videos there are.
+    """
+    from services.dropbox_client import DropboxClient  # lazy import
     try:
-        files = list_files(DROPBOX_TRAINING_VIDEO_DIR)
+        files = DropboxClient().list_files(DROPBOX_TRAINING_VIDEO_DIR)
         return [{"name": f, "path": f"{DROPBOX_TRAINING_VIDEO_DIR}/{f}"} for f in files]
     except Exception as e:
         handle_error(e, code="DB_TRAINING_VIDEOS_LIST_001", raise_it=True)
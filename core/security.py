@@ -1,15 +1,27 @@
 import re
+import os
 import html
 import functools
+import threading
 import time
+import numpy as np
+import pandas as pd
 from core.error_handling import handle_error
+from logger import log_metric
 
 SAFE_FILENAME_CHARS = r"[^a-zA-Z0-9_\-\.]"
 SAFE_TEXT_CHARS = r"[^a-zA-Z0-9\s,\.\-_'\"\(\)\[\]@:]" 
 RATE_LIMIT_WINDOW = 60
 RATE_LIMIT_REQUESTS = 100
 
-_rate_limit_cache = {}
+_SAFE_TEXT_PATTERN = re.compile(SAFE_TEXT_CHARS)
+
+# "memory" limits each app process on its own; "sqlite" shares state through the app
+# database so the limit holds across processes.
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_STRIPES = 16
+# Refilled (idle) keys are dropped and counters are emitted at most this often.
+RATE_LIMIT_SWEEP_SECONDS = 60
 
 
 def sanitize_email(email: str) -> str:
@@ -29,20 +41,106 @@ def sanitize_text(text: str) -> str:
     try:
         if not isinstance(text, str):
             raise ValueError("sanitize_text expects a string")
-        text = html.escape(text)
-        return re.sub(SAFE_TEXT_CHARS, "", text).strip()
+        return _sanitize(text)
     except Exception as e:
         handle_error(e, code="SECURITY_SANITIZE_TEXT_ERR")
         return ""
 
 
+# Deliberately not memoized: sanitize_text sees narratives, summaries and prompts full of PHI,
+# which must not linger in a process-wide cache. sanitize_series shares work per call instead.
+def _sanitize(text: str) -> str:
+    return _SAFE_TEXT_PATTERN.sub("", html.escape(text)).strip()
+
+
+def _sanitize_unescaped(text: str) -> str:
+    return html.unescape(_sanitize(text))
+
+
+def sanitize_series(series: pd.Series, unescape: bool = False, na_value: str = None) -> pd.Series:
+    """
+    Column-wise equivalent of `series.apply(lambda x: sanitize_text(str(x)))` (wrapped in
+    html.unescape when `unescape` is set). Each distinct value is cleaned once per call: the
+    column is factorized, the uniques go through the scalar sanitizer, and codes map them back.
+    Missing cells become `na_value` when given, else what apply produces: str() of the missing
+    value ("nan", "NaT", "None"), or NaN for categoricals.
+    """
+    try:
+        clean = _sanitize_unescaped if unescape else _sanitize
+        if series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) not in ("string", "empty"):
+            # Mixed cells: factorize would merge 1, 1.0 and True (equal hashes), so key on str(x),
+            # which is exactly what gets sanitized.
+            codes, uniques = pd.factorize(series.map(str), sort=False)
+            result = np.array([clean(value) for value in uniques], dtype=object)[codes]
+            if na_value is not None:
+                result[series.isna().to_numpy()] = na_value
+            return pd.Series(result, index=series.index, name=series.name, dtype=object)
+        try:
+            codes, uniques = pd.factorize(series, sort=False)
+        except TypeError:
+            # Unhashable cells (lists, dicts): no sharing possible.
+            return series.apply(lambda x: clean(str(x)))
+
+        cleaned = np.array([clean(str(value)) for value in uniques] + [""], dtype=object)
+        result = cleaned[codes]  # -1 (missing) lands on the "" sentinel and is fixed below
+        missing = codes == -1
+        if missing.any():
+            if na_value is not None:
+                result[missing] = na_value
+            elif isinstance(series.dtype, pd.CategoricalDtype):
+                # Series.apply maps categoricals over their categories and leaves missing cells as NaN.
+                result[missing] = np.nan
+            else:
+                raw = series.to_numpy(dtype=object)[missing]
+                result[missing] = [clean(str(value)) for value in raw]
+        return pd.Series(result, index=series.index, name=series.name, dtype=object)
+    except Exception as e:
+        handle_error(e, code="SECURITY_SANITIZE_SERIES_ERR", raise_it=True)
+
+
+def sanitize_frame(df: pd.DataFrame, columns: list = None, unescape: bool = False, na_value: str = None) -> pd.DataFrame:
+    """Return a copy of `df` with `columns` (default: all) sanitized via sanitize_series."""
+    cleaned = df.copy()
+    for col in (df.columns if columns is None else columns):
+        cleaned[col] = sanitize_series(df[col], unescape=unescape, na_value=na_value)
+    return cleaned
+
+
+SECRET_MARKERS = ["api", "key", "token", "secret"]
+_SECRET_SOURCE = rf"(?:{'|'.join(SECRET_MARKERS)})[^\s\"']+"
+_SECRET_PATTERN = re.compile(_SECRET_SOURCE, re.IGNORECASE)
+_SECRET_PATTERN_FOLDED = re.compile(_SECRET_SOURCE)
+
+
+def _substitute(text: str, markers: list, pattern, folded_pattern, replacement: str) -> str:
+    """
+    Replace every match of a case-insensitive pattern. For ASCII text (nearly every log line)
+    a substring check on the lowered text skips clean lines outright, and the case-sensitive
+    twin runs over the lowered copy, which is several times faster than IGNORECASE matching;
+    lowering ASCII keeps offsets, so the spans apply to the original. Non-ASCII text goes
+    through the IGNORECASE pattern, which also folds letters like "ſ" that lower() keeps.
+    """
+    if not text.isascii():
+        return pattern.sub(replacement, text)
+    lowered = text.lower()
+    if not any(marker in lowered for marker in markers):
+        return text
+    pieces, last = [], 0
+    for match in folded_pattern.finditer(lowered):
+        pieces.append(text[last:match.start()])
+        pieces.append(replacement)
+        last = match.end()
+    if not pieces:
+        return text
+    pieces.append(text[last:])
+    return "".join(pieces)
+
+
 def redact_log(text: str) -> str:
     try:
         if not isinstance(text, str):
             raise ValueError("redact_log expects a string")
-        return re.sub(
-            r"(api|key|token|secret)[^\s\"']+", "***REDACTED***", text, flags=re.IGNORECASE
-        )
+        return _substitute(text, SECRET_MARKERS, _SECRET_PATTERN, _SECRET_PATTERN_FOLDED, "***REDACTED***")
     except Exception as e:
         handle_error(e, code="SECURITY_REDACT_LOG_ERR")
         return "***REDACTED***"
@@ -50,21 +148,55 @@ def redact_log(text: str) -> str:
 
 PHI_FIELDS = ["client", "email", "phone", "narrative", "summary"]
 
+# One alternation instead of a pass per field: on a single line the leftmost field wins and
+# its match runs to the next comma (or end of text), as the sequential substitutions did.
+# Across lines they differ: `\s*` may swallow a newline, so one field's replacement can join
+# lines and let an earlier field's match reach a comma. Multi-line text keeps the passes.
+_PHI_SOURCE = rf"(?:{'|'.join(PHI_FIELDS)})\s*[:=].*?(?=,|$)"
+_PHI_PATTERN = re.compile(_PHI_SOURCE, re.IGNORECASE)
+_PHI_PATTERN_FOLDED = re.compile(_PHI_SOURCE)
+_PHI_FIELD_PATTERNS = [re.compile(rf"{field}\s*[:=].*?(?=,|$)", re.IGNORECASE) for field in PHI_FIELDS]
+
 
 def mask_phi(text: str) -> str:
     try:
         if not isinstance(text, str):
             raise ValueError("mask_phi expects a string")
-        for field in PHI_FIELDS:
-            text = re.sub(
-                rf"({field}\s*[:=].*?)(?=,|$)", "[REDACTED]", text, flags=re.IGNORECASE
-            )
-        return text
+        if ":" not in text and "=" not in text:
+            return text
+        if "\n" in text:
+            for pattern in _PHI_FIELD_PATTERNS:
+                text = pattern.sub("[REDACTED]", text)
+            return text
+        return _substitute(text, PHI_FIELDS, _PHI_PATTERN, _PHI_PATTERN_FOLDED, "[REDACTED]")
     except Exception as e:
         handle_error(e, code="SECURITY_MASK_PHI_ERR")
         return "[REDACTED]"
 
 
+class Redacted:
+    """
+    Log message wrapper that formats, masks PHI and redacts secrets only when a handler
+    actually emits the record, so disabled log levels cost nothing:
+
+        logger.debug(Redacted("Prompt for %s: %s", client_id, prompt))
+    """
+
+    __slots__ = ("msg", "args", "_text")
+
+    def __init__(self, msg, *args):
+        self.msg = msg
+        self.args = args
+        self._text = None
+
+    def __str__(self) -> str:
+        # Every handler formats the record; scrub once.
+        if self._text is None:
+            text = str(self.msg) % self.args if self.args else str(self.msg)
+            self._text = redact_log(mask_phi(text))
+        return self._text
+
+
 def enforce_quota(event_type: str):
     def decorator(func):
         @functools.wraps(func)
@@ -80,14 +212,104 @@ def enforce_quota(event_type: str):
     return decorator
 
 
+class RateLimiter:
+    """
+    GCRA limiter: a token bucket holding `requests` tokens that refills over `window` seconds,
+    stored as one float per key (its theoretical arrival time, TAT). Checks are O(1).
+    Keys are spread over lock stripes so sessions hitting different keys rarely contend,
+    and keys whose bucket has refilled are swept, so memory tracks recently active keys.
+    """
+
+    def __init__(self, requests: int = RATE_LIMIT_REQUESTS, window: float = RATE_LIMIT_WINDOW,
+                 backend: str = "memory", stripes: int = RATE_LIMIT_STRIPES):
+        self.window = window
+        self.interval = window / requests
+        self.backend = backend
+        self._stripes = [{} for _ in range(stripes)]
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._allowed = [0] * stripes
+        self._denied = [0] * stripes
+        self._emitted = (0, 0)
+        self._sweep_lock = threading.Lock()
+        self._last_sweep = time.time()
+
+    def acquire(self, key: str, now: float = None) -> bool:
+        now = time.time() if now is None else now
+        index = hash(key) % len(self._stripes)
+        if self.backend == "sqlite":
+            from core.db import acquire_rate_limit  # lazy import
+            allowed = acquire_rate_limit(key, self.interval, self.window, now)
+            with self._locks[index]:
+                self._count(index, allowed)
+        else:
+            state = self._stripes[index]
+            with self._locks[index]:
+                tat = max(state.get(key, now), now) + self.interval
+                # Tolerance absorbs float drift so exactly `requests` calls fit in a burst.
+                allowed = tat - now <= self.window + 1e-9
+                if allowed:
+                    state[key] = tat
+                self._count(index, allowed)
+        if now - self._last_sweep >= RATE_LIMIT_SWEEP_SECONDS:
+            self.sweep(now)
+        return allowed
+
+    def _count(self, index: int, allowed: bool):
+        if allowed:
+            self._allowed[index] += 1
+        else:
+            self._denied[index] += 1
+
+    def sweep(self, now: float = None) -> int:
+        """Drop refilled keys and emit allow/deny counts since the previous sweep."""
+        now = time.time() if now is None else now
+        if not self._sweep_lock.acquire(blocking=False):
+            return 0
+        try:
+            self._last_sweep = now
+            removed = 0
+            for state, lock in zip(self._stripes, self._locks):
+                with lock:
+                    idle = [key for key, tat in state.items() if tat <= now]
+                    for key in idle:
+                        del state[key]
+                    removed += len(idle)
+            if self.backend == "sqlite":
+                from core.db import prune_rate_limits  # lazy import
+                removed += prune_rate_limits(now)
+
+            stats = self.stats()
+            allowed, denied = self._emitted
+            log_metric("rate_limit.allowed", stats["allowed"] - allowed, {"backend": self.backend})
+            log_metric("rate_limit.denied", stats["denied"] - denied, {"backend": self.backend})
+            self._emitted = (stats["allowed"], stats["denied"])
+            return removed
+        except Exception as e:
+            handle_error(e, code="SECURITY_RATE_LIMIT_SWEEP_ERR")
+            return 0
+        finally:
+            self._sweep_lock.release()
+
+    def stats(self) -> dict:
+        return {
+            "allowed": sum(self._allowed),
+            "denied": sum(self._denied),
+            "keys": sum(len(state) for state in self._stripes),
+            "backend": self.backend,
+        }
+
+
+_rate_limiter = RateLimiter(backend=RATE_LIMIT_BACKEND)
+
+
+def get_rate_limit_stats() -> dict:
+    """Allowed/denied totals and tracked keys for this process."""
+    return _rate_limiter.stats()
+
+
 def rate_limit(key: str):
-    now = time.time()
-    requests = _rate_limit_cache.get(key, [])
-    requests = [req for req in requests if now - req < RATE_LIMIT_WINDOW]
-    if len(requests) >= RATE_LIMIT_REQUESTS:
+    if not _rate_limiter.acquire(key):
         raise RuntimeError("Rate limit exceeded")
-    requests.append(now)
-    _rate_limit_cache[key] = requests
 
 def sanitize_filename(filename: str) -> str:
     """
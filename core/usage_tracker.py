@@ -1,7 +1,23 @@
 import os
 import json
-import hashlib
-from datetime import datetime
+import threading
+import time
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from core.auth import get_tenant_id, get_user_id
+from core.constants import LATENCY_BUCKETS_MS
+from core.db import (
+    commit_quota as db_commit_quota,
+    get_quota,
+    get_quota_usage,
+    get_usage_rollups,
+    get_usage_totals,
+    refresh_usage_rollups,
+    record_usage_events,
+    release_quota as db_release_quota,
+    reserve_quota as db_reserve_quota,
+)
 from core.error_handling import handle_error
 from logger import logger
 
@@ -15,72 +31,168 @@ USAGE_QUOTAS = {
     "foia_requests": 500
 }
 
+# Sliding 24-hour limits; USAGE_QUOTAS above are the sliding 30-day ("monthly") limits.
+DAILY_QUOTAS = {
+    "openai_tokens": 100000,
+    "documents_generated": 2000,
+    "emails_sent": 500,
+}
+
+QUOTA_WINDOW_NAMES = ("daily", "monthly")
+
+
+def get_quota_limits(event_type: str, tenant_id: str = None) -> dict:
+    """
+    Return {"daily": limit, "monthly": limit} for a tenant (None = unlimited).
+    Per-tenant overrides live in the quotas table under the key "<event_type>:<window>".
+    """
+    tenant_id = tenant_id or get_tenant_id()
+    limits = {"daily": DAILY_QUOTAS.get(event_type), "monthly": USAGE_QUOTAS.get(event_type)}
+    for window in QUOTA_WINDOW_NAMES:
+        override = get_quota(tenant_id, f"{event_type}:{window}")
+        if override:
+            limits[window] = override["limit_value"]
+    return limits
+
 # === File Path Utilities ===
 def get_usage_log_path() -> str:
+    """Legacy JSON usage log; imported into the SQLite ledger on first use."""
     base_dir = "data/usage_logs"
     os.makedirs(base_dir, exist_ok=True)
     return os.path.join(base_dir, "usage_log.json")
 
-# === Logging & Summary ===
-def log_usage(event_type: str, amount: int, metadata: dict = None):
+
+# === Legacy Import ===
+_legacy_checked = False
+_legacy_lock = threading.Lock()
+
+
+def _migrate_legacy_usage_log():
     """
-    Log usage events into a persistent JSON file with a hash for integrity.
+    Move entries from the old usage_log.json into the ledger exactly once.
+    The file is claimed by renaming it first, so concurrent processes cannot both import it.
     """
-    path = get_usage_log_path()
-    log_entry = {
-        "timestamp": datetime.utcnow().isoformat(),
-        "event_type": event_type,
-        "amount": amount,
-        "metadata": metadata or {}
-    }
-    log_entry["hash"] = hashlib.sha256(json.dumps(log_entry, sort_keys=True).encode()).hexdigest()
+    global _legacy_checked
+    if _legacy_checked:
+        return
+    with _legacy_lock:
+        if _legacy_checked:
+            return
+        path = get_usage_log_path()
+        claimed = f"{path}.migrating"
+        try:
+            if os.path.exists(path):
+                os.replace(path, claimed)
+            if os.path.exists(claimed):
+                with open(claimed, "r") as f:
+                    entries = json.load(f)
+                record_usage_events([
+                    {
+                        "tenant_id": (entry.get("metadata") or {}).get("tenant_id") or get_tenant_id(),
+                        "user_id": None,
+                        "event_type": entry["event_type"],
+                        "amount": entry["amount"],
+                        "metadata": entry.get("metadata"),
+                        "timestamp": entry.get("timestamp"),
+                    }
+                    for entry in entries
+                ])
+                os.replace(claimed, f"{path}.migrated")
+                logger.info(f"[USAGE_LOG] Imported {len(entries)} legacy usage entries into the ledger")
+            _legacy_checked = True
+        except Exception as e:
+            handle_error(e, "USAGE_LOG_MIGRATE_001")
+
 
+# === Logging & Summary ===
+def log_usage(event_type: str, amount: int, metadata: dict = None, tenant_id: str = None, user_id: str = None):
+    """
+    Append a usage event to the ledger and update running totals in one transaction.
+    Tenant and user default to the current session.
+    """
     try:
-        if os.path.exists(path):
-            with open(path, "r") as f:
-                logs = json.load(f)
-        else:
-            logs = []
-        logs.append(log_entry)
-        with open(path, "w") as f:
-            json.dump(logs, f, indent=2)
+        _migrate_legacy_usage_log()
+        metadata = metadata or {}
+        record_usage_events([{
+            "tenant_id": tenant_id or metadata.get("tenant_id") or get_tenant_id(),
+            "user_id": user_id or get_user_id(),
+            "event_type": event_type,
+            "amount": amount,
+            "metadata": metadata,
+        }])
         logger.info(f"[USAGE_LOG] Event={event_type} Amount={amount}")
     except Exception as e:
         handle_error(e, "USAGE_LOG_WRITE_001")
 
-def get_usage_summary() -> dict:
+
+def get_usage_summary(tenant_id: str = None, user_id: str = None) -> dict:
     """
-    Returns total usage counts by event_type.
+    Returns total usage counts by event_type for a tenant (current tenant by default),
+    or for a single user of that tenant.
     """
-    path = get_usage_log_path()
-    if not os.path.exists(path):
-        return {}
-
     try:
-        with open(path, "r") as f:
-            logs = json.load(f)
-        summary = {}
-        for entry in logs:
-            key = entry["event_type"]
-            summary[key] = summary.get(key, 0) + entry["amount"]
-        return summary
+        _migrate_legacy_usage_log()
+        return get_usage_totals(tenant_id or get_tenant_id(), user_id)
     except Exception as e:
         handle_error(e, "USAGE_LOG_READ_001")
         return {}
 
 # === Quota Checks ===
-def check_quota(event_type: str, amount: int = 1) -> bool:
+def reserve_quota(event_type: str, amount: int, tenant_id: str = None) -> str:
+    """
+    Hold `amount` against the tenant's daily and monthly windows before doing the work.
+    Returns a reservation id for commit_quota/release_quota.
+    Raises RuntimeError if any window would be exceeded.
+    """
+    _migrate_legacy_usage_log()
+    tenant_id = tenant_id or get_tenant_id()
+    reservation_id = db_reserve_quota(tenant_id, event_type, amount, get_quota_limits(event_type, tenant_id))
+    if reservation_id is None:
+        logger.warning(f"Quota exceeded for event: {event_type} tenant={tenant_id}")
+        raise RuntimeError(f"Quota exceeded for {event_type}")
+    return reservation_id
+
+
+def commit_quota(reservation_id: str, actual_amount: int, event_type: str, metadata: dict = None,
+                 tenant_id: str = None):
+    """
+    Settle a reservation with the amount actually used (refunding or charging the difference)
+    and record it in the usage ledger. `event_type`/`tenant_id` charge the usage even if the
+    reservation expired while the work was running.
+    """
+    try:
+        db_commit_quota(
+            reservation_id, actual_amount, user_id=get_user_id(), metadata=metadata,
+            tenant_id=tenant_id or get_tenant_id(), event_type=event_type,
+        )
+    except Exception as e:
+        handle_error(e, "USAGE_QUOTA_COMMIT_001")
+
+
+def release_quota(reservation_id: str):
+    """Refund a reservation whose work did not happen."""
+    try:
+        db_release_quota(reservation_id)
+    except Exception as e:
+        handle_error(e, "USAGE_QUOTA_RELEASE_001")
+
+
+def check_quota(event_type: str, amount: int = 1, tenant_id: str = None) -> bool:
     """
     Check if quota is available for a given event_type.
     Returns True if under limit, False if exceeded.
     """
     try:
-        summary = get_usage_summary()
-        current = summary.get(event_type, 0)
-        limit = USAGE_QUOTAS.get(event_type)
-        if limit is None:
+        tenant_id = tenant_id or get_tenant_id()
+        limits = get_quota_limits(event_type, tenant_id)
+        if all(limit is None for limit in limits.values()):
             return True  # No limit defined for this event
-        return (current + amount) <= limit
+        _migrate_legacy_usage_log()
+        usage = get_quota_usage(tenant_id, event_type)
+        return all(
+            limit is None or usage[window]["used"] + usage[window]["reserved"] + amount <= limit
+            for window, limit in limits.items()
+        )
     except Exception as e:
         handle_error(e, "USAGE_QUOTA_CHECK_001")
         return False
@@ -107,29 +219,128 @@ def decrement_quota(event_type: str, amount: int = 1):
 
 def check_quota_and_decrement(tenant_id: str, event_type: str, amount: int = 1):
     """
-    Check if quota is available and decrement it if allowed.
+    Check if quota is available and decrement it if allowed, atomically.
     Raises RuntimeError if quota exceeded.
     """
-    if not check_quota(event_type, amount):
-        raise RuntimeError(f"Quota exceeded for {event_type}")
-    log_usage(event_type, amount, metadata={"tenant_id": tenant_id})
+    reservation_id = reserve_quota(event_type, amount, tenant_id=tenant_id)
+    commit_quota(reservation_id, amount, event_type, metadata={"tenant_id": tenant_id}, tenant_id=tenant_id)
 
-def get_quota_status() -> dict:
+def get_quota_status(tenant_id: str = None) -> dict:
     """
-    Returns a dictionary with usage, limits, and remaining quota for each event_type.
+    Returns a dictionary with usage, limits, and remaining quota for each event_type
+    over the sliding 30-day window, plus the same figures for the 24-hour window under "daily".
     """
-    summary = get_usage_summary()
+    tenant_id = tenant_id or get_tenant_id()
     status = {}
-    for event_type, limit in USAGE_QUOTAS.items():
-        used = summary.get(event_type, 0)
-        status[event_type] = {
-            "used": used,
-            "limit": limit,
-            "remaining": max(limit - used, 0),
-            "within_limit": used < limit,
-        }
+    for event_type in USAGE_QUOTAS:
+        limits = get_quota_limits(event_type, tenant_id)
+        usage = get_quota_usage(tenant_id, event_type)
+        windows = {}
+        for window in QUOTA_WINDOW_NAMES:
+            used = usage[window]["used"] + usage[window]["reserved"]
+            limit = limits[window]
+            windows[window] = {
+                "used": used,
+                "limit": limit,
+                "remaining": None if limit is None else max(limit - used, 0),
+                "within_limit": limit is None or used < limit,
+            }
+        status[event_type] = {**windows["monthly"], "daily": windows["daily"]}
     return status
 
+# === Usage Sections & Rollups ===
+_usage_section = contextvars.ContextVar("usage_section", default=None)
+
+# Rollups are refreshed on read, at most this often.
+USAGE_ROLLUP_REFRESH_SECONDS = 30
+_last_rollup_refresh = 0.0
+
+
+@contextmanager
+def usage_section(name: str):
+    """
+    Tag OpenAI usage recorded inside the block with a section name (e.g. "demand:facts"),
+    so rollups can show which parts of a document cost the most.
+    """
+    token = _usage_section.set(name)
+    try:
+        yield
+    finally:
+        _usage_section.reset(token)
+
+
+def get_usage_section():
+    return _usage_section.get()
+
+
+def _percentile(histogram: list, q: float):
+    """Upper bound (ms) of the latency bucket containing the q-th quantile."""
+    total = sum(histogram)
+    if not total:
+        return None
+    running = 0
+    for i, count in enumerate(histogram):
+        running += count
+        if running >= q * total:
+            return LATENCY_BUCKETS_MS[min(i, len(LATENCY_BUCKETS_MS) - 1)]
+    return LATENCY_BUCKETS_MS[-1]
+
+
+def _summarize(rows: list) -> dict:
+    histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    summary = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cost_usd": 0.0}
+    latency_sum = 0.0
+    for row in rows:
+        for key in summary:
+            summary[key] += row[key]
+        latency_sum += row["latency_ms_sum"]
+        histogram = [a + b for a, b in zip(histogram, row["latency_histogram"])]
+    summary["cost_usd"] = round(summary["cost_usd"], 6)
+    summary["avg_latency_ms"] = round(latency_sum / summary["requests"]) if summary["requests"] else None
+    summary["p50_latency_ms"] = _percentile(histogram, 0.5)
+    summary["p95_latency_ms"] = _percentile(histogram, 0.95)
+    return summary
+
+
+def refresh_rollups(force: bool = False):
+    """Fold new ledger rows into the rollup tables (throttled unless forced)."""
+    global _last_rollup_refresh
+    if not force and time.monotonic() - _last_rollup_refresh < USAGE_ROLLUP_REFRESH_SECONDS:
+        return
+    try:
+        _migrate_legacy_usage_log()
+        refresh_usage_rollups()
+        _last_rollup_refresh = time.monotonic()
+    except Exception as e:
+        handle_error(e, "USAGE_ROLLUP_001")
+
+
+def get_usage_report(tenant_id: str = None, days: int = 30) -> dict:
+    """
+    OpenAI usage and estimated cost for the last `days` days, read from the rollup tables:
+    {"totals": {...}, "by_model": {model: {...}}, "by_section": {section: {...}}, "by_day": {day: {...}}}.
+    """
+    try:
+        refresh_rollups()
+        since = (datetime.utcnow() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        rows = get_usage_rollups(tenant_id or get_tenant_id(), since_day=since)
+
+        def grouped(field):
+            groups = {}
+            for row in rows:
+                groups.setdefault(row[field] or "(untagged)", []).append(row)
+            return {name: _summarize(group) for name, group in groups.items()}
+
+        return {
+            "totals": _summarize(rows),
+            "by_model": grouped("model"),
+            "by_section": grouped("section"),
+            "by_day": grouped("day"),
+        }
+    except Exception as e:
+        handle_error(e, "USAGE_ROLLUP_002")
+        return {"totals": _summarize([]), "by_model": {}, "by_section": {}, "by_day": {}}
+
 # === Metrics ===
 def record_latency_metric(service_name: str, latency: float):
     """
@@ -1,29 +1,172 @@
+import atexit
 import logging
+import logging.handlers
 import json
 import os
-import time
+import queue
+import re
+import sys
+import threading
 from datetime import datetime
 
+# Rotating JSON-lines log file ("" disables file output; stderr is always on).
+LOG_FILE = os.getenv("LOG_FILE", os.path.join("data", "logs", "legal_automation.log"))
+LOG_FILE_MAX_BYTES = 10 * 1024 * 1024
+LOG_FILE_BACKUP_COUNT = 5
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# High-volume INFO/DEBUG lines are sampled by their leading "[TAG]": keep 1 in N.
+# Warnings and errors are never sampled.
+LOG_SAMPLE_EVERY = {
+    "USAGE_LOG": 10,
+    "DROPBOX_LIST": 10,
+}
+
+_EVENT_TAG = re.compile(r"\[([A-Z][A-Z0-9_]*)\]")
+
+
+def _event_tag(message: str):
+    match = _EVENT_TAG.match(message)
+    return match.group(1) if match else None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line, built with json.dumps so quotes, newlines and
+    non-ASCII text in messages always produce valid JSON.
+    """
+
+    def __init__(self, datefmt: str = "%Y-%m-%d %H:%M:%S"):
+        super().__init__(datefmt=datefmt)
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        entry = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "message": message,
+            "module": record.module,
+            "funcName": record.funcName,
+            "lineno": record.lineno,
+        }
+        event = _event_tag(message)
+        if event:
+            entry["event"] = event
+        if getattr(record, "sample_every", None):
+            entry["sample_every"] = record.sample_every
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep every Nth record per event tag in LOG_SAMPLE_EVERY (deterministic, so counts can be
+    scaled back up); kept records carry `sample_every` for that purpose.
+    """
+
+    def __init__(self, sample_every: dict = None):
+        super().__init__()
+        self.sample_every = LOG_SAMPLE_EVERY if sample_every is None else sample_every
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.sample_every:
+            return True
+        msg = record.msg if isinstance(record.msg, str) else str(record.msg)
+        event = _event_tag(msg)
+        every = self.sample_every.get(event)
+        if not every or every <= 1:
+            return True
+        with self._lock:
+            count = self._counts.get(event, 0)
+            self._counts[event] = count + 1
+        if count % every:
+            return False
+        record.sample_every = every
+        return True
+
+
+class _StderrHandler(logging.StreamHandler):
+    """Writes to whatever sys.stderr is at emit time (it may be swapped after import)."""
+
+    def __init__(self):
+        super().__init__(sys.stderr)
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+# Every logger enqueues here; one listener thread drains it.
+_log_queue = queue.Queue(-1)
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def _build_handlers() -> list:
+    formatter = JsonFormatter()
+    handlers = [_StderrHandler()]
+    if LOG_FILE:
+        try:
+            os.makedirs(os.path.dirname(LOG_FILE) or ".", exist_ok=True)
+            handlers.append(logging.handlers.RotatingFileHandler(
+                LOG_FILE, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUP_COUNT, encoding="utf-8"
+            ))
+        except OSError as e:
+            sys.stderr.write(f"Log file {LOG_FILE} unavailable, logging to stderr only: {e}\n")
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def _start_listener():
+    """Single background thread that does all handler I/O."""
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = logging.handlers.QueueListener(_log_queue, *_build_handlers(), respect_handler_level=True)
+            _listener.start()
+            atexit.register(stop_logging)
+
+
+def flush_logs():
+    """Block until every record queued so far has been written."""
+    if _listener is None:
+        return
+    _log_queue.join()
+    for handler in _listener.handlers:
+        handler.flush()
+
+
+def stop_logging():
+    """Drain the queue, flush and close every handler (registered with atexit)."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.flush()
+                handler.close()
+            _listener = None
+
+
 def get_logger(name: str = "legal_automation") -> logging.Logger:
     logger = logging.getLogger(name)
 
     if not logger.handlers:
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter(
-            json.dumps({
-                "time": "%(asctime)s",
-                "level": "%(levelname)s",
-                "message": "%(message)s",
-                "module": "%(module)s",
-                "funcName": "%(funcName)s",
-                "lineno": "%(lineno)d"
-            }),
-            datefmt="%Y-%m-%d %H:%M:%S"
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        # Callers only enqueue; formatting to JSON and writing happen on the listener thread.
+        queue_handler = logging.handlers.QueueHandler(_log_queue)
+        queue_handler.addFilter(SamplingFilter())
+        logger.addHandler(queue_handler)
+        _start_listener()
 
-    logger.setLevel(logging.INFO)
+    logger.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
     return logger
 
 def log_metric(metric_name: str, value: int = 1, metadata: dict = None):
@@ -48,4 +191,4 @@ def log_error_with_metrics(error: Exception, code: str, context: dict = None):
     except Exception:
         pass
 
-logger = get_logger()
\ No newline at end of file
+logger = get_logger()
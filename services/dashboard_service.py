@@ -0,0 +1,474 @@
+import itertools
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from core.error_handling import handle_error
+from logger import logger
+
+try:
+    # Embedded columnar SQL engine; filters and paging run inside it when installed.
+    import duckdb
+except ImportError:
+    duckdb = None
+
+CAMPAIGN_COL = "Case Type"
+STATUS_COL = "Class Code Title"
+REFERRAL_COL = "Referred By Name (Full - Last, First)"
+NAME_COL = "Case Details First Party Name (First, Last)"
+PHONE_COL = "Case Details First Party Details Default Phone Number"
+EMAIL_COL = "Case Details First Party Details Default Email Account Address"
+DATE_COL = "Date Opened"
+CASE_ID_COL = "CaseID"
+CONTACT_HEALTH_COL = "Contact Health"
+
+REQUIRED_COLUMNS = [
+    NAME_COL,
+    "Case Details First Party Name (Full - Last, First)",
+    PHONE_COL,
+    EMAIL_COL,
+    DATE_COL,
+]
+
+# Columns the dashboard filters and charts on; each gets a value -> row positions index.
+INDEXED_COLUMNS = [CAMPAIGN_COL, STATUS_COL, REFERRAL_COL]
+
+QUESTIONNAIRE_STATUS = "Questionnaire Received"
+
+# Models kept alive (one per Dropbox revision); older revisions are dropped.
+DASHBOARD_MODEL_CACHE_SIZE = 2
+
+# "pandas" answers from the model's in-memory indexes (fastest at current sheet sizes);
+# "duckdb" runs filters and paging as SQL and falls back to "pandas" if duckdb is unavailable.
+DASHBOARD_QUERY_ENGINE = os.getenv("DASHBOARD_QUERY_ENGINE", "pandas")
+DASHBOARD_PAGE_SIZE = 100
+
+_models = OrderedDict()
+_models_lock = threading.Lock()
+# The most recently built model; the next revision is diffed against it.
+_latest_model = None
+# Each model gets a generation; rows remember the generation in which they last changed.
+_generations = itertools.count(1)
+
+
+def contact_health(df: pd.DataFrame) -> np.ndarray:
+    """
+    "✅ Full" / "⚠️ Partial" / "❌ Missing" per row from phone and email presence.
+    Presence is Python truthiness (as the old row-wise scorer used), evaluated in one cast.
+    """
+    phone = df[PHONE_COL].to_numpy(dtype=object).astype(bool)
+    email = df[EMAIL_COL].to_numpy(dtype=object).astype(bool)
+    return np.select([phone & email, phone | email], ["✅ Full", "⚠️ Partial"], default="❌ Missing").astype(object)
+
+
+def _code_lookup(codes: np.ndarray, matched: np.ndarray) -> np.ndarray:
+    """Row mask from a per-distinct-value mask; code -1 (missing) maps to False."""
+    return np.append(matched, False)[codes]
+
+
+def _status_mask(codes: np.ndarray, uniques, label: str) -> np.ndarray:
+    """Case-insensitive substring match on the status, evaluated once per distinct status."""
+    per_status = pd.Series(np.asarray(uniques, dtype=object)).astype(str).str.contains(label, case=False, na=False)
+    return _code_lookup(codes, per_status.to_numpy(dtype=bool))
+
+
+def case_ids(df: pd.DataFrame, known: pd.Series = None) -> tuple:
+    """
+    (ids, lookup): normalized case GUID per row (same extraction as email subjects) and the
+    raw value -> GUID lookup, which the next revision passes back as `known` so only new raw
+    values are parsed. ids is None when the sheet has no usable key: no CaseID column, or a
+    missing or duplicated GUID.
+    """
+    if CASE_ID_COL not in df.columns:
+        return None, None
+    from services.email_service import extract_guid_from_subject
+
+    codes, uniques = pd.factorize(df[CASE_ID_COL], sort=False)
+    uniques = np.asarray(uniques, dtype=object)
+    if known is not None:
+        guids = known.reindex(uniques).to_numpy(dtype=object)
+    else:
+        guids = np.full(len(uniques), np.nan, dtype=object)
+    for i in np.flatnonzero(pd.isna(guids)):
+        guids[i] = extract_guid_from_subject(str(uniques[i])).lower()
+    lookup = pd.Series(guids, index=uniques, dtype=object)
+    ids = np.append(guids, "")[codes]  # code -1 (missing) -> ""
+    if not len(ids) or (ids == "").any() or not pd.Index(ids).is_unique:
+        return None, lookup
+    return ids, lookup
+
+
+def row_hashes(df: pd.DataFrame, columns: list) -> np.ndarray:
+    """One uint64 per row over `columns` (values only, so re-parsed snapshots hash the same)."""
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def diff_snapshots(old_ids, old_hashes, new_ids, new_hashes) -> dict:
+    """
+    Compare two snapshots by case ID. Returns positions: `inserted`/`updated` in the new
+    snapshot, `replaced` (old versions of updated rows)/`deleted` in the old one, and
+    `matched` (old position per new row, -1 for inserted rows).
+    """
+    matched = pd.Index(old_ids).get_indexer(new_ids)
+    present = matched >= 0
+    changed = present.copy()
+    changed[present] = old_hashes[matched[present]] != new_hashes[present]
+    updated = np.flatnonzero(changed)
+    return {
+        "inserted": np.flatnonzero(~present),
+        "updated": updated,
+        "replaced": matched[updated],
+        "deleted": np.setdiff1d(np.arange(len(old_ids)), matched[present], assume_unique=True),
+        "matched": matched,
+    }
+
+
+def empty_query(campaign=None) -> dict:
+    """
+    Dashboard query: `filters` match indexed columns exactly, `values` match a column's
+    string form, `contains` is a case-insensitive substring search per column.
+    """
+    return {"campaign": campaign, "filters": {}, "values": {}, "contains": {}}
+
+
+class DashboardModel:
+    """
+    Everything the dashboard derives from one revision of the sheet, computed once:
+    the Contact Health column, factorized codes and value -> row-position indexes for the
+    filter columns, flag masks and per-campaign KPIs. Widget interactions then select rows
+    by position instead of rescanning the frame.
+
+    Given the previous revision's model, rows are diffed by case ID and Contact Health and
+    the KPIs are patched for inserted/updated/deleted rows only. Position indexes are
+    re-factorized (positions shift), and per-query caches rebuild lazily.
+    Rows are addressed by position: `df` has a RangeIndex.
+    """
+
+    def __init__(self, df: pd.DataFrame, previous: "DashboardModel" = None):
+        df = df.copy()
+        df.columns = df.columns.str.strip()
+        df.reset_index(drop=True, inplace=True)
+        for col in REQUIRED_COLUMNS + INDEXED_COLUMNS:
+            if col not in df.columns:
+                df[col] = ""
+        self.source_columns = [col for col in df.columns if col != CONTACT_HEALTH_COL]
+        self.revision = df.attrs.get("dropbox_rev")
+        self.generation = next(_generations)
+        self.all_positions = np.arange(len(df))
+
+        self._ids, self._id_lookup = case_ids(df, known=previous._id_lookup if previous is not None else None)
+        self._hashes = row_hashes(df, self.source_columns) if self._ids is not None else None
+        diff = None
+        if previous is not None and self._ids is not None and previous._ids is not None \
+                and previous.source_columns == self.source_columns:
+            diff = diff_snapshots(previous._ids, previous._hashes, self._ids, self._hashes)
+
+        if diff is None:
+            df[CONTACT_HEALTH_COL] = contact_health(df)
+            # Generation 0: unknown, never shown as "changed".
+            self.row_generation = np.zeros(len(df), dtype=np.int64)
+        else:
+            changed = np.concatenate([diff["inserted"], diff["updated"]])
+            carried = np.maximum(diff["matched"], 0)
+            health = previous.df[CONTACT_HEALTH_COL].to_numpy(dtype=object)[carried]
+            health[changed] = contact_health(df.iloc[changed])
+            df[CONTACT_HEALTH_COL] = health
+            self.row_generation = previous.row_generation[carried]
+            self.row_generation[changed] = self.generation
+        self.df = df
+        self.diff = None if diff is None else {
+            "inserted": self._ids[diff["inserted"]].tolist(),
+            "updated": self._ids[diff["updated"]].tolist(),
+            "deleted": previous._ids[diff["deleted"]].tolist(),
+        }
+
+        self._codes, self._uniques, self._index = {}, {}, {}
+        for col in INDEXED_COLUMNS:
+            codes, uniques = pd.factorize(df[col], sort=False)
+            self._codes[col] = codes
+            self._uniques[col] = np.asarray(uniques, dtype=object)
+            groups = pd.Series(self.all_positions).groupby(codes).indices  # ascending positions per code
+            self._index[col] = {self._uniques[col][code]: pos for code, pos in groups.items() if code >= 0}
+
+        status_codes, status_uniques = self._codes[STATUS_COL], self._uniques[STATUS_COL]
+        self.flagged = _status_mask(status_codes, status_uniques, "FLAGGED")
+        self.litigation = _status_mask(status_codes, status_uniques, "LITIGATION")
+        self.questionnaire = df[STATUS_COL].eq(QUESTIONNAIRE_STATUS).to_numpy(dtype=bool)
+
+        self.campaigns = sorted(self._index[CAMPAIGN_COL])
+        if diff is None:
+            self._kpis = {None: self._compute_kpis(self.all_positions)}
+            for campaign in self.campaigns:
+                self._kpis[campaign] = self._compute_kpis(self._index[CAMPAIGN_COL][campaign])
+        else:
+            self._kpis = _patch_kpis(
+                previous._kpis,
+                removed=previous._kpis_by_campaign(np.concatenate([diff["replaced"], diff["deleted"]])),
+                added=self._kpis_by_campaign(np.concatenate([diff["inserted"], diff["updated"]])),
+            )
+        self._cumulative = {}
+        self._string_indexes = {}
+        self._engine = None
+        self._lock = threading.Lock()
+
+    def _compute_kpis(self, positions: np.ndarray) -> dict:
+        return {
+            "total": len(positions),
+            "questionnaire": int(self.questionnaire[positions].sum()),
+            "flagged": int(self.flagged[positions].sum()),
+            "litigation": int(self.litigation[positions].sum()),
+        }
+
+    def _kpis_by_campaign(self, positions: np.ndarray) -> dict:
+        """KPIs for a handful of rows, per campaign plus the None (all campaigns) total."""
+        codes = self._codes[CAMPAIGN_COL][positions]
+        totals = {None: self._compute_kpis(positions)}
+        for code in np.unique(codes[codes >= 0]):
+            totals[self._uniques[CAMPAIGN_COL][code]] = self._compute_kpis(positions[codes == code])
+        return totals
+
+    def changed_since(self, generation: int) -> np.ndarray:
+        """Row mask of cases inserted or updated after the given model generation."""
+        return self.row_generation > generation
+
+    def campaign_positions(self, campaign=None) -> np.ndarray:
+        """Row positions for a campaign (None = every row)."""
+        if campaign is None:
+            return self.all_positions
+        return self._index[CAMPAIGN_COL].get(campaign, self.all_positions[:0])
+
+    def kpis(self, campaign=None) -> dict:
+        return self._kpis.get(campaign) or self._compute_kpis(self.campaign_positions(campaign))
+
+    def rows(self, positions: np.ndarray) -> pd.DataFrame:
+        return self.df.iloc[positions]
+
+    def flagged_positions(self, positions: np.ndarray) -> np.ndarray:
+        return positions[self.flagged[positions]]
+
+    def options(self, column: str, positions: np.ndarray) -> list:
+        """Sorted distinct non-missing values of an indexed column among `positions`."""
+        codes = np.unique(self._codes[column][positions])
+        return sorted(self._uniques[column][codes[codes >= 0]])
+
+    def filter_positions(self, positions: np.ndarray, filters: dict) -> np.ndarray:
+        """Narrow `positions` to rows whose indexed columns take one of the selected values."""
+        for column, values in filters.items():
+            if not values:
+                continue
+            index = self._index[column]
+            matches = [index[v] for v in values if v in index]
+            selected = np.concatenate(matches) if matches else self.all_positions[:0]
+            positions = np.intersect1d(positions, selected, assume_unique=True)
+        return positions
+
+    def value_counts(self, column: str, positions: np.ndarray) -> pd.DataFrame:
+        """Counts of each present value among `positions`, most frequent first."""
+        codes = self._codes[column][positions]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self._uniques[column]))
+        present = np.flatnonzero(counts)
+        series = pd.Series(counts[present], index=self._uniques[column][present])
+        return series.sort_values(ascending=False, kind="stable").reset_index()
+
+    def cumulative(self, campaign=None) -> pd.DataFrame:
+        """Cases opened over time with a running count (memoized per campaign)."""
+        if campaign not in self._cumulative:
+            dates = self.df[DATE_COL].iloc[self.campaign_positions(campaign)]
+            trend = pd.DataFrame({DATE_COL: dates}).sort_values(DATE_COL).dropna(subset=[DATE_COL])
+            trend["Cumulative"] = range(1, len(trend) + 1)
+            self._cumulative[campaign] = trend
+        return self._cumulative[campaign]
+
+    def string_index(self, column: str) -> tuple:
+        """
+        (codes, strings, lowered) for a column, built on first use: each distinct value is
+        stringified once, so value filters and contains-search scan distinct values, not rows.
+        """
+        with self._lock:
+            if column not in self._string_indexes:
+                codes, uniques = pd.factorize(self.df[column], sort=False)
+                strings = np.array([str(u) for u in uniques], dtype=object)
+                lowered = np.array([s.lower() for s in strings], dtype=object)
+                self._string_indexes[column] = (codes, strings, lowered)
+            return self._string_indexes[column]
+
+    def query_engine(self):
+        """The engine serving filtered, paged queries for this revision (built on first use)."""
+        with self._lock:
+            if self._engine is None:
+                self._engine = _build_engine(self)
+            return self._engine
+
+
+def _patch_kpis(kpis: dict, removed: dict, added: dict) -> dict:
+    patched = {campaign: dict(values) for campaign, values in kpis.items()}
+    for sign, deltas in ((-1, removed), (1, added)):
+        for campaign, delta in deltas.items():
+            target = patched.setdefault(campaign, dict.fromkeys(delta, 0))
+            for name, value in delta.items():
+                target[name] += sign * value
+    # Campaigns whose last case went away disappear, as they would from a full rebuild.
+    return {campaign: values for campaign, values in patched.items() if campaign is None or values["total"]}
+
+
+class PandasQueryEngine:
+    """Answers dashboard queries from the model's position and string indexes."""
+
+    name = "pandas"
+
+    def __init__(self, model: DashboardModel):
+        self.model = model
+
+    def distinct(self, column: str, campaign=None) -> list:
+        codes, strings, _ = self.model.string_index(column)
+        present = np.unique(codes[self.model.campaign_positions(campaign)])
+        return sorted(strings[present[present >= 0]])
+
+    def positions(self, query: dict) -> np.ndarray:
+        model = self.model
+        positions = model.filter_positions(model.campaign_positions(query["campaign"]), query["filters"])
+        for column, values in query["values"].items():
+            if values:
+                codes, strings, _ = model.string_index(column)
+                positions = positions[_code_lookup(codes[positions], np.isin(strings, list(values)))]
+        for column, term in query["contains"].items():
+            if term:
+                codes, _, lowered = model.string_index(column)
+                matched = pd.Series(lowered, dtype=object).str.contains(term.lower(), regex=False).to_numpy(dtype=bool)
+                positions = positions[_code_lookup(codes[positions], matched)]
+        return positions
+
+    def page(self, query: dict, columns: list, page: int, page_size: int = DASHBOARD_PAGE_SIZE) -> tuple:
+        positions = self.positions(query)
+        start = page * page_size
+        return self.model.rows(positions[start:start + page_size])[columns], len(positions)
+
+
+def _quote(column: str) -> str:
+    return '"' + column.replace('"', '""') + '"'
+
+
+class DuckDBQueryEngine:
+    """
+    Answers dashboard queries in an in-memory DuckDB table loaded once per revision.
+    Filters become a parameterized WHERE clause and paging is LIMIT/OFFSET on the row position,
+    so only the rows on screen are materialized back into pandas.
+    """
+
+    name = "duckdb"
+
+    def __init__(self, model: DashboardModel):
+        self.model = model
+        self._conn = duckdb.connect(":memory:")
+        frame = model.df.assign(_pos=model.all_positions)
+        self._conn.register("dashboard_frame", frame)
+        self._conn.execute("CREATE TABLE cases AS SELECT * FROM dashboard_frame")
+        self._conn.unregister("dashboard_frame")
+
+    def _execute(self, sql: str, params: list) -> list:
+        # A cursor per call: DuckDB connections must not be shared between threads.
+        cursor = self._conn.cursor()
+        try:
+            return cursor.execute(sql, params).fetchall()
+        finally:
+            cursor.close()
+
+    def _where(self, query: dict) -> tuple:
+        clauses, params = [], []
+        if query["campaign"] is not None:
+            clauses.append(f"{_quote(CAMPAIGN_COL)} = ?")
+            params.append(query["campaign"])
+        for column, values in query["filters"].items():
+            if values:
+                clauses.append(f"{_quote(column)} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        for column, values in query["values"].items():
+            if values:
+                clauses.append(f"CAST({_quote(column)} AS VARCHAR) IN ({', '.join('?' * len(values))})")
+                params.extend(str(v) for v in values)
+        for column, term in query["contains"].items():
+            if term:
+                clauses.append(f"contains(lower(CAST({_quote(column)} AS VARCHAR)), ?)")
+                params.append(term.lower())
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def distinct(self, column: str, campaign=None) -> list:
+        where, params = self._where(empty_query(campaign))
+        where = f"{where} AND" if where else " WHERE"
+        rows = self._execute(
+            f"SELECT DISTINCT CAST({_quote(column)} AS VARCHAR) FROM cases{where} {_quote(column)} IS NOT NULL", params
+        )
+        return sorted(row[0] for row in rows)
+
+    def positions(self, query: dict) -> np.ndarray:
+        where, params = self._where(query)
+        rows = self._execute(f"SELECT _pos FROM cases{where} ORDER BY _pos", params)
+        return np.array([row[0] for row in rows], dtype=np.int64)
+
+    def page(self, query: dict, columns: list, page: int, page_size: int = DASHBOARD_PAGE_SIZE) -> tuple:
+        where, params = self._where(query)
+        total = self._execute(f"SELECT count(*) FROM cases{where}", params)[0][0]
+        rows = self._execute(
+            f"SELECT _pos FROM cases{where} ORDER BY _pos LIMIT ? OFFSET ?", params + [page_size, page * page_size]
+        )
+        return self.model.rows([row[0] for row in rows])[columns], total
+
+
+def _build_engine(model: DashboardModel):
+    if DASHBOARD_QUERY_ENGINE == "duckdb" and duckdb is not None:
+        try:
+            return DuckDBQueryEngine(model)
+        except Exception as e:
+            logger.warning(f"[DASHBOARD_QUERY] ⚠️ DuckDB could not load the sheet, using pandas: {e}")
+    return PandasQueryEngine(model)
+
+
+def _model_key(df: pd.DataFrame):
+    """
+    Cache key for a frame: its Dropbox revision, else a content hash (never object identity,
+    which CPython reuses after a frame is collected). None if the frame cannot be hashed.
+    """
+    rev = df.attrs.get("dropbox_rev")
+    if rev:
+        return ("rev", rev)
+    try:
+        content = int(pd.util.hash_pandas_object(df, index=True).sum())
+    except TypeError:  # unhashable cells (lists, dicts)
+        return None
+    return ("content", tuple(map(str, df.columns)), df.shape, content)
+
+
+def get_dashboard_model(df: pd.DataFrame) -> DashboardModel:
+    """
+    Return the model for this dashboard revision, building it on first use.
+    Keyed by the Dropbox revision stamped on the frame (its content hash when absent);
+    a new revision is built incrementally from the previous one.
+    """
+    global _latest_model
+    try:
+        key = _model_key(df)
+        with _models_lock:
+            model = _models.get(key) if key is not None else None
+            if model is not None:
+                _models.move_to_end(key)
+                return model
+            previous = _latest_model
+
+        model = DashboardModel(df, previous=previous)
+        if model.diff is not None:
+            logger.info(
+                f"[DASHBOARD_MODEL] 🔁 Revision {model.revision}: {len(model.diff['inserted'])} inserted, "
+                f"{len(model.diff['updated'])} updated, {len(model.diff['deleted'])} deleted"
+            )
+        else:
+            logger.info(f"[DASHBOARD_MODEL] 🧮 Built model for revision {model.revision} ({len(model.df)} rows)")
+        with _models_lock:
+            if key is not None:
+                _models[key] = model
+            _latest_model = model
+            while len(_models) > DASHBOARD_MODEL_CACHE_SIZE:
+                _models.popitem(last=False)
+        return model
+    except Exception as e:
+        handle_error(e, code="DASHBOARD_MODEL_001", raise_it=True)
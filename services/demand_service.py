@@ -12,7 +12,7 @@ from logger import logger
 from prompts.prompt_factory import build_prompt
 from core.prompts.demand_example import EXAMPLE_DEMAND, SETTLEMENT_EXAMPLE
 from services.openai_client import safe_generate
-from core.usage_tracker import check_quota_and_decrement
+from core.usage_tracker import check_quota_and_decrement, usage_section
 from services.dropbox_client import download_template_file
 
 # === Polishing function ===
@@ -65,7 +65,8 @@ Here is the draft demand letter to polish:
 {text}
 """
 
-        polished = await safe_generate(prompt)
+        with usage_section("demand:polish"):
+            polished = await safe_generate(prompt)
         return polished.strip() if polished else text
 
     except Exception as e:
@@ -87,7 +88,8 @@ async def generate_brief_synopsis(summary: str, full_name: str, example_text: st
             client_name=full_name,
             example=example_text,
         )
-        result = await safe_generate(prompt)
+        with usage_section("demand:synopsis"):
+            result = await safe_generate(prompt)
         return result.strip() if result else "[Brief synopsis unavailable.]"
     except Exception as e:
         return handle_error(e, code="DEMAND_SYNOPSIS_001",
@@ -108,7 +110,8 @@ async def generate_combined_facts(summary: str, first_name: str, example_text: s
             example=example_text or EXAMPLE_DEMAND,
             extra_instructions="Do NOT mention damages or make any demand here. Facts only."
         )
-        return await safe_generate(prompt)
+        with usage_section("demand:facts"):
+            return await safe_generate(prompt)
     except Exception as e:
         return handle_error(e, code="DEMAND_FACTS_001",
                             user_message="Failed to generate facts section.", raise_it=True)
@@ -128,7 +131,8 @@ async def generate_combined_damages(damages_text: str, first_name: str, example_
             example=example_text,
             extra_instructions="Do NOT re-argue liability. Summarize categories of harm, not detailed injuries."
         )
-        return await safe_generate(prompt)
+        with usage_section("demand:damages"):
+            return await safe_generate(prompt)
     except Exception as e:
         return handle_error(e, code="DEMAND_DAMAGES_001",
                             user_message="Failed to generate damages section.", raise_it=True)
@@ -148,7 +152,8 @@ async def generate_settlement_demand(summary: str, damages: str, first_name: str
             example=example_text or SETTLEMENT_EXAMPLE,
             extra_instructions="Do NOT repeat detailed facts or injuries. Only quantify damages and make the demand."
         )
-        return await safe_generate(prompt)
+        with usage_section("demand:settlement"):
+            return await safe_generate(prompt)
     except Exception as e:
         return handle_error(e, code="DEMAND_SETTLEMENT_001",
                             user_message="Failed to generate settlement demand.", raise_it=True)
@@ -1,9 +1,23 @@
 import os
+import time
+import hashlib
+import threading
+import concurrent.futures
 import dropbox
 import pandas as pd
 from io import BytesIO
+from dropbox.files import (
+    CommitInfo,
+    DeleteArg,
+    RelocationPath,
+    UploadSessionCursor,
+    UploadSessionFinishArg,
+    UploadSessionType,
+    WriteMode,
+)
 from config import AppConfig, get_config
 from core.error_handling import handle_error
+from utils.excel_utils import read_excel_columns
 from logger import logger
 from core.constants import (
     DROPBOX_TEMPLATES_ROOT,
@@ -18,6 +32,48 @@ from core.constants import (
     DROPBOX_STYLE_EXAMPLES_DIR
 )
 
+# === Dashboard snapshot cache ===
+# Parsed Master Dashboard sheets are kept once per process (shared by every
+# Streamlit session) and persisted as Parquet keyed by the Dropbox revision,
+# so the workbook is only downloaded and parsed again when the file changes.
+DASHBOARD_CACHE_DIR = os.path.join("data", "cache", "dashboard")
+DASHBOARD_REV_CHECK_SECONDS = 60
+
+_dashboard_frames = {}  # (path, sheet_name) -> {"rev", "df", "checked_at"}
+_dashboard_lock = threading.Lock()
+
+# === Upload settings ===
+# files_upload is capped at 150 MB; anything above the threshold goes through an
+# upload session. Concurrent sessions require every chunk but the last to be a
+# multiple of 4 MB.
+UPLOAD_SESSION_THRESHOLD = 16 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_MAX_WORKERS = 8
+UPLOAD_BATCH_LIMIT = 1000  # max entries per upload_session/start_batch and finish_batch
+
+SUPPORTED_UPLOAD_EXTENSIONS = (".txt", ".html", ".docx")
+
+# Shared pool for chunk and bulk uploads (same pattern as utils.thread_utils).
+_upload_executor = concurrent.futures.ThreadPoolExecutor(max_workers=UPLOAD_MAX_WORKERS)
+
+# === Batch file operations ===
+FILE_BATCH_LIMIT = 1000  # max entries per delete_batch / move_batch call
+BATCH_JOB_POLL_SECONDS = 0.5
+BATCH_JOB_TIMEOUT_SECONDS = 120
+
+# === Temporary links ===
+# Dropbox temporary links expire after 4 hours; reuse them for 3 so a page
+# never hands the browser a link that is about to die mid-playback.
+TEMPORARY_LINK_TTL_SECONDS = 3 * 60 * 60
+
+_temporary_links = {}  # dropbox_path -> (link, expires_at)
+_temporary_links_lock = threading.Lock()
+
+# Folders already confirmed to exist in Dropbox during this process.
+_known_folders = set()
+_known_folders_lock = threading.Lock()
+
+
 def normalize_path(path: str) -> str:
     """
     Normalize a Dropbox or local file path by fixing duplicate folders and extensions.
@@ -58,21 +114,43 @@ class DropboxClient:
     def download_dashboard_df(
         self, file_path: str = None, sheet_name: str = "Master Dashboard"
     ) -> pd.DataFrame:
-        """Download the dashboard Excel from Dropbox and return as DataFrame."""
+        """
+        Return the dashboard sheet as a DataFrame, re-parsing only when the Dropbox revision changes.
+        The returned frame is shared across sessions; callers must copy it before mutating.
+        """
         path = normalize_path(file_path or self.config.DROPBOX_MASTER_DASHBOARD_PATH)
+        cache_key = (path, sheet_name)
 
         try:
-            metadata, res = self.dbx.files_download(path)
-            if not res or not res.content:
-                raise ValueError(f"No content returned from Dropbox for path: {path}")
-
-            df = pd.read_excel(BytesIO(res.content), sheet_name=sheet_name)
-            if df.empty:
-                raise ValueError(f"Downloaded Excel is empty for path: {path}")
-
-            logger.info(
-                f"[DROPBOX_DOWNLOAD] 📥 Downloaded dashboard from {path} ({len(df)} rows)"
-            )
+            with _dashboard_lock:
+                cached = _dashboard_frames.get(cache_key)
+            if cached and time.time() - cached["checked_at"] < DASHBOARD_REV_CHECK_SECONDS:
+                return cached["df"]
+
+            rev = self.dbx.files_get_metadata(path).rev
+            if cached and cached["rev"] == rev:
+                cached["checked_at"] = time.time()
+                return cached["df"]
+
+            df = _read_dashboard_snapshot(path, sheet_name, rev)
+            if df is None:
+                metadata, res = self.dbx.files_download(path, rev=rev)
+                if not res or not res.content:
+                    raise ValueError(f"No content returned from Dropbox for path: {path}")
+
+                df = read_excel_columns(BytesIO(res.content), sheet_name=sheet_name)
+                if df.empty:
+                    raise ValueError(f"Downloaded Excel is empty for path: {path}")
+
+                df = _normalize_for_snapshot(df)
+                _write_dashboard_snapshot(df, path, sheet_name, rev)
+                logger.info(
+                    f"[DROPBOX_DOWNLOAD] 📥 Downloaded dashboard from {path} ({len(df)} rows, rev={rev})"
+                )
+
+            df.attrs["dropbox_rev"] = rev
+            with _dashboard_lock:
+                _dashboard_frames[cache_key] = {"rev": rev, "df": df, "checked_at": time.time()}
             return df
 
         except Exception as e:
@@ -84,20 +162,7 @@ class DropboxClient:
         """
         folder_path = normalize_path(folder_path)
         try:
-            # Ensure the folder exists (create if missing)
-            try:
-                self.dbx.files_get_metadata(folder_path)
-            except dropbox.exceptions.ApiError as e:
-                if (
-                    hasattr(e.error, "is_path")
-                    and e.error.is_path()
-                    and e.error.get_path().is_not_found()
-                ):
-                    # Folder missing: create it
-                    logger.info(f"[DROPBOX] Creating missing folder: {folder_path}")
-                    self.dbx.files_create_folder_v2(folder_path)
-                else:
-                    raise
+            self.ensure_folder(folder_path)
 
             result = self.dbx.files_list_folder(folder_path)
             files = [normalize_path(entry.name) for entry in result.entries if hasattr(entry, "name")]
@@ -110,6 +175,179 @@ class DropboxClient:
         except Exception as e:
             handle_error(e, code="DROPBOX_LIST_001", raise_it=True)
 
+    def ensure_folder(self, folder_path: str):
+        """
+        Create a Dropbox folder if it is missing. Folders confirmed once are
+        remembered for the life of the process, so repeat calls cost nothing.
+        """
+        folder_path = normalize_path(folder_path)
+        with _known_folders_lock:
+            if folder_path in _known_folders:
+                return
+
+        try:
+            self.dbx.files_get_metadata(folder_path)
+        except dropbox.exceptions.ApiError as e:
+            if (
+                hasattr(e.error, "is_path")
+                and e.error.is_path()
+                and e.error.get_path().is_not_found()
+            ):
+                # Folder missing: create it
+                logger.info(f"[DROPBOX] Creating missing folder: {folder_path}")
+                self.dbx.files_create_folder_v2(folder_path)
+            else:
+                raise
+
+        with _known_folders_lock:
+            _known_folders.add(folder_path)
+
+    def upload_bytes(self, path: str, file_bytes: bytes):
+        """
+        Upload one file, switching to a concurrent upload session above UPLOAD_SESSION_THRESHOLD.
+        """
+        if len(file_bytes) <= UPLOAD_SESSION_THRESHOLD:
+            self.dbx.files_upload(file_bytes, path, mode=WriteMode.overwrite)
+            return
+
+        session_id = self.dbx.files_upload_session_start(
+            b"", session_type=UploadSessionType.concurrent
+        ).session_id
+        offsets = list(range(0, len(file_bytes), UPLOAD_CHUNK_SIZE))
+
+        def append(offset: int, close: bool):
+            chunk = file_bytes[offset:offset + UPLOAD_CHUNK_SIZE]
+            self.dbx.files_upload_session_append_v2(
+                chunk, UploadSessionCursor(session_id=session_id, offset=offset), close=close
+            )
+
+        # All full chunks go up in parallel; the closing chunk is sent last.
+        futures = [_upload_executor.submit(append, offset, False) for offset in offsets[:-1]]
+        for future in futures:
+            future.result()
+        append(offsets[-1], True)
+
+        self._finish_sessions([(session_id, len(file_bytes), path)])
+        logger.info(
+            f"[DROPBOX_UPLOAD] 📤 Uploaded {path} in {len(offsets)} chunks via upload session"
+        )
+
+    def upload_many(self, files: dict) -> list:
+        """
+        Upload {dropbox_path: bytes} using batched upload sessions: one start_batch call,
+        parallel appends, and one finish_batch commit per UPLOAD_BATCH_LIMIT files.
+        Returns the committed paths.
+        """
+        items = list(files.items())
+        uploaded = []
+        for start in range(0, len(items), UPLOAD_BATCH_LIMIT):
+            group = items[start:start + UPLOAD_BATCH_LIMIT]
+            session_ids = self.dbx.files_upload_session_start_batch(len(group)).session_ids
+
+            def append_all(session_id: str, file_bytes: bytes):
+                offset = 0
+                while True:
+                    chunk = file_bytes[offset:offset + UPLOAD_CHUNK_SIZE]
+                    last = offset + len(chunk) >= len(file_bytes)
+                    self.dbx.files_upload_session_append_v2(
+                        chunk, UploadSessionCursor(session_id=session_id, offset=offset), close=last
+                    )
+                    offset += len(chunk)
+                    if last:
+                        return
+
+            futures = [
+                _upload_executor.submit(append_all, session_id, file_bytes)
+                for session_id, (_, file_bytes) in zip(session_ids, group)
+            ]
+            for future in futures:
+                future.result()
+
+            uploaded += self._finish_sessions([
+                (session_id, len(file_bytes), path)
+                for session_id, (path, file_bytes) in zip(session_ids, group)
+            ])
+        return uploaded
+
+    def _finish_sessions(self, sessions: list) -> list:
+        """
+        Commit closed upload sessions [(session_id, size, path)] in a single finish_batch call.
+        """
+        entries = [
+            UploadSessionFinishArg(
+                cursor=UploadSessionCursor(session_id=session_id, offset=size),
+                commit=CommitInfo(path=path, mode=WriteMode.overwrite),
+            )
+            for session_id, size, path in sessions
+        ]
+        result = self.dbx.files_upload_session_finish_batch_v2(entries)
+
+        committed, failed = [], []
+        for (_, _, path), entry in zip(sessions, result.entries):
+            if entry.is_success():
+                committed.append(path)
+            else:
+                failed.append(f"{path}: {entry.get_failure()}")
+        if failed:
+            raise RuntimeError(
+                f"{len(failed)} of {len(sessions)} uploads failed to commit: {'; '.join(failed[:5])}"
+            )
+        return committed
+
+    def _wait_for_batch_job(self, launch, check_job):
+        """
+        Resolve a batch launch result to its completed result, polling async jobs.
+        """
+        if launch.is_complete():
+            return launch.get_complete()
+
+        job_id = launch.get_async_job_id()
+        deadline = time.time() + BATCH_JOB_TIMEOUT_SECONDS
+        while time.time() < deadline:
+            status = check_job(job_id)
+            if status.is_complete():
+                return status.get_complete()
+            if getattr(status, "is_failed", lambda: False)():
+                raise RuntimeError(f"Dropbox batch job {job_id} failed: {status.get_failed()}")
+            time.sleep(BATCH_JOB_POLL_SECONDS)
+        raise TimeoutError(f"Dropbox batch job {job_id} did not finish in {BATCH_JOB_TIMEOUT_SECONDS}s")
+
+    def delete_many(self, paths: list):
+        """
+        Delete paths with delete_batch. Returns (deleted_paths, {path: error}).
+        """
+        deleted, failed = [], {}
+        for start in range(0, len(paths), FILE_BATCH_LIMIT):
+            group = paths[start:start + FILE_BATCH_LIMIT]
+            launch = self.dbx.files_delete_batch([DeleteArg(path) for path in group])
+            result = self._wait_for_batch_job(launch, self.dbx.files_delete_batch_check)
+            for path, entry in zip(group, result.entries):
+                if entry.is_success():
+                    deleted.append(path)
+                else:
+                    failed[path] = str(entry.get_failure())
+        return deleted, failed
+
+    def move_many(self, moves: list):
+        """
+        Move/rename [(from_path, to_path)] with move_batch_v2.
+        Returns (moved_pairs, {from_path: error}).
+        """
+        moved, failed = [], {}
+        for start in range(0, len(moves), FILE_BATCH_LIMIT):
+            group = moves[start:start + FILE_BATCH_LIMIT]
+            launch = self.dbx.files_move_batch_v2(
+                [RelocationPath(from_path, to_path) for from_path, to_path in group],
+                autorename=False,
+            )
+            result = self._wait_for_batch_job(launch, self.dbx.files_move_batch_check_v2)
+            for pair, entry in zip(group, result.entries):
+                if entry.is_success():
+                    moved.append(pair)
+                else:
+                    failed[pair[0]] = str(entry.get_failure())
+        return moved, failed
+
     def download_file(self, dropbox_path: str, local_dir: str = "downloads") -> str:
         """
         Download a file from Dropbox to a local directory and return the local path.
@@ -153,12 +391,64 @@ class DropboxClient:
             DROPBOX_STYLE_EXAMPLES_DIR 
         ]
         for folder in base_folders:
-            folder = normalize_path(folder)
-            try:
-                self.dbx.files_get_metadata(folder)
-            except dropbox.exceptions.ApiError:
-                logger.info(f"[DROPBOX] Creating base folder: {folder}")
-                self.dbx.files_create_folder_v2(folder)
+            self.ensure_folder(folder)
+
+
+# === Dashboard snapshot helpers ===
+
+def _snapshot_path(path: str, sheet_name: str, rev: str) -> str:
+    key = hashlib.sha256(f"{path}|{sheet_name}".encode()).hexdigest()[:16]
+    return os.path.join(DASHBOARD_CACHE_DIR, f"{key}_{rev}.parquet")
+
+
+def _normalize_for_snapshot(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Coerce mixed-type object columns to strings so the frame round-trips through Parquet unchanged.
+    Applied to freshly parsed frames too, so cached and fresh loads are identical.
+    """
+    df.columns = [str(col) for col in df.columns]
+    for col in df.columns:
+        if df[col].dtype == object:
+            kind = pd.api.types.infer_dtype(df[col], skipna=True)
+            if kind in ("mixed", "mixed-integer"):
+                df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+    return df
+
+
+def _read_dashboard_snapshot(path: str, sheet_name: str, rev: str):
+    """
+    Memory-map the Parquet snapshot for this revision, or return None if it is missing or unreadable.
+    """
+    snapshot = _snapshot_path(path, sheet_name, rev)
+    if not os.path.exists(snapshot):
+        return None
+    try:
+        df = pd.read_parquet(snapshot, memory_map=True)
+        logger.info(f"[DASHBOARD_CACHE] ⚡ Loaded dashboard snapshot rev={rev} ({len(df)} rows)")
+        return df
+    except Exception as e:
+        logger.warning(f"[DASHBOARD_CACHE] ⚠️ Ignoring unreadable snapshot {snapshot}: {e}")
+        return None
+
+
+def _write_dashboard_snapshot(df: pd.DataFrame, path: str, sheet_name: str, rev: str):
+    """
+    Persist the parsed sheet for this revision and drop snapshots of older revisions.
+    """
+    try:
+        os.makedirs(DASHBOARD_CACHE_DIR, exist_ok=True)
+        snapshot = _snapshot_path(path, sheet_name, rev)
+        tmp_path = f"{snapshot}.{os.getpid()}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, snapshot)
+
+        prefix = os.path.basename(snapshot).split("_", 1)[0] + "_"
+        for name in os.listdir(DASHBOARD_CACHE_DIR):
+            if name.startswith(prefix) and name != os.path.basename(snapshot):
+                os.remove(os.path.join(DASHBOARD_CACHE_DIR, name))
+    except Exception as e:
+        # The in-memory frame is still valid; only the warm-restart path is lost.
+        logger.warning(f"[DASHBOARD_CACHE] ⚠️ Could not write dashboard snapshot: {e}")
 
 
 # === Global helper functions (used by modules) ===
@@ -245,26 +535,45 @@ def download_example_file(module: str, filename: str, local_dir="examples"):
     return client.download_file(path, local_dir)
 
 
+def _validate_upload_path(path: str) -> str:
+    path = normalize_path(path)
+    # Validate supported template extensions
+    if not path.endswith(SUPPORTED_UPLOAD_EXTENSIONS):
+        raise ValueError(f"Unsupported file extension for upload: {path}")
+    return path
+
+
 def upload_file_to_dropbox(path: str, file_bytes: bytes):
     """
     Upload a file to Dropbox, creating folders if needed.
+    Files larger than UPLOAD_SESSION_THRESHOLD are sent in parallel chunks.
     """
     client = DropboxClient()
     try:
-        path = normalize_path(path)
-
-        # Validate supported template extensions
-        if path.endswith((".txt", ".html", ".docx")) is False:
-            raise ValueError(f"Unsupported file extension for upload: {path}")
-
-        folder = os.path.dirname(path)
-        client.list_files(folder)  # ensure folder exists
-        client.dbx.files_upload(file_bytes, path, mode=dropbox.files.WriteMode.overwrite)
+        path = _validate_upload_path(path)
+        client.ensure_folder(os.path.dirname(path))
+        client.upload_bytes(path, file_bytes)
         logger.info(f"[DROPBOX_UPLOAD] 📤 Uploaded file to {path}")
     except Exception as e:
         handle_error(e, code="DROPBOX_UPLOAD_001", raise_it=True)
 
 
+def upload_files_to_dropbox(files: dict) -> list:
+    """
+    Bulk-upload {dropbox_path: bytes} (e.g. a whole batch-generation run).
+    Every 1,000 files are committed with a single finish_batch call; Dropbox
+    creates any missing parent folders as part of the commit.
+    """
+    client = DropboxClient()
+    try:
+        files = {_validate_upload_path(path): data for path, data in files.items()}
+        uploaded = client.upload_many(files)
+        logger.info(f"[DROPBOX_UPLOAD] 📤 Bulk uploaded {len(uploaded)} files")
+        return uploaded
+    except Exception as e:
+        handle_error(e, code="DROPBOX_UPLOAD_002", raise_it=True)
+
+
 def delete_file_from_dropbox(path: str):
     """
     Delete a file from Dropbox.
@@ -292,9 +601,63 @@ def move_file_in_dropbox(old_path: str, new_path: str):
         handle_error(e, code="DROPBOX_MOVE_001", raise_it=True)
 
 
+def delete_files_from_dropbox(paths: list):
+    """
+    Delete many files with one batch job. Returns (deleted_paths, {path: error}).
+    """
+    client = DropboxClient()
+    try:
+        paths = [normalize_path(p) for p in paths]
+        deleted, failed = client.delete_many(paths)
+        logger.info(f"[DROPBOX_DELETE] 🗑️ Batch deleted {len(deleted)} files ({len(failed)} failed)")
+        return deleted, failed
+    except Exception as e:
+        handle_error(e, code="DROPBOX_DELETE_002", raise_it=True)
+
+
+def move_files_in_dropbox(moves: list):
+    """
+    Move or rename many files with one batch job.
+    Takes [(old_path, new_path)] and returns (moved_pairs, {old_path: error}).
+    """
+    client = DropboxClient()
+    try:
+        moves = [(normalize_path(old), normalize_path(new)) for old, new in moves]
+        moved, failed = client.move_many(moves)
+        logger.info(f"[DROPBOX_MOVE] 🔄 Batch moved {len(moved)} files ({len(failed)} failed)")
+        return moved, failed
+    except Exception as e:
+        handle_error(e, code="DROPBOX_MOVE_002", raise_it=True)
+
+
+def get_temporary_link(dropbox_path: str) -> str:
+    """
+    Return a short-lived direct download URL for a Dropbox file.
+    The browser streams (and range-requests) the file from Dropbox directly, so large
+    media such as training videos never pass through app memory. Links are cached per
+    process and shared by all sessions until shortly before they expire.
+    """
+    dropbox_path = normalize_path(dropbox_path)
+    with _temporary_links_lock:
+        cached = _temporary_links.get(dropbox_path)
+    if cached and cached[1] > time.time():
+        return cached[0]
+
+    client = DropboxClient()
+    try:
+        link = client.dbx.files_get_temporary_link(dropbox_path).link
+        with _temporary_links_lock:
+            _temporary_links[dropbox_path] = (link, time.time() + TEMPORARY_LINK_TTL_SECONDS)
+        logger.info(f"[DROPBOX_LINK] 🔗 Issued temporary link for {dropbox_path}")
+        return link
+    except Exception as e:
+        handle_error(e, code="DROPBOX_LINK_001", raise_it=True)
+
+
 def download_file_from_dropbox(dropbox_path: str) -> bytes:
     """
-    Download a file from Dropbox and return its bytes (used for training videos, etc).
+    Download a file from Dropbox and return its bytes.
+    For large media prefer get_temporary_link, which avoids buffering the file in memory.
     """
     client = DropboxClient()
     try:
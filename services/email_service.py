@@ -5,7 +5,7 @@ import requests
 from datetime import datetime
 from bs4 import BeautifulSoup
 
-from core.security import sanitize_text, sanitize_email, redact_log, mask_phi
+from core.security import sanitize_text, sanitize_series, sanitize_email, redact_log, mask_phi
 from core.constants import STATUS_INTAKE_COMPLETED, STATUS_QUESTIONNAIRE_SENT
 from core.auth import get_user_id, get_tenant_id
 from core.usage_tracker import log_usage, check_quota
@@ -105,13 +105,35 @@ def send_email(to, subject, body, cc=None, attachments=None, content_type="html"
         raise Exception(f"Email send failed: {response.status_code} {response.text}")
 
 
-async def build_email(client_data: dict, template_name: str, attachments: list = None) -> tuple:
+# Template merge fields and the dashboard columns they come from.
+EMAIL_MERGE_FIELDS = {
+    "name": "Case Details First Party Name (First, Last)",
+    "RA": "Referred By Name (Full - Last, First)",
+    "ID": "Case Number",
+}
+
+
+def sanitize_merge_fields(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sanitized merge fields for every client row at once (same values build_email would compute),
+    so a batch of previews does not re-run the sanitizer per client. Indexed like `df`.
+    """
+    return pd.DataFrame({
+        field: sanitize_series(df[col]) if col in df.columns else pd.Series("", index=df.index, dtype=object)
+        for field, col in EMAIL_MERGE_FIELDS.items()
+    }, index=df.index)
+
+
+async def build_email(client_data: dict, template_name: str, attachments: list = None, sanitized: dict = None) -> tuple:
+    """
+    `sanitized` may carry precomputed merge fields (see sanitize_merge_fields).
+    """
     try:
-        sanitized = {
-            "name": sanitize_text(str(client_data.get("Case Details First Party Name (First, Last)", ""))),
-            "RA": sanitize_text(str(client_data.get("Referred By Name (Full - Last, First)", ""))),
-            "ID": sanitize_text(str(client_data.get("Case Number", "")))
-        }
+        if sanitized is None:
+            sanitized = {
+                field: sanitize_text(str(client_data.get(col, "")))
+                for field, col in EMAIL_MERGE_FIELDS.items()
+            }
 
         recipient_email = sanitize_email(client_data.get("Case Details First Party Details Default Email Account Address", ""))
         if not recipient_email or recipient_email == "invalid@example.com":
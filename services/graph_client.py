@@ -3,7 +3,7 @@ import asyncio
 import time
 from config import AppConfig, get_config
 from utils.retry_utils import http_retry
-from core.security import redact_log, mask_phi
+from core.security import redact_log, mask_phi, Redacted
 from core.error_handling import handle_error
 from core.usage_tracker import log_usage, check_quota
 from core.auth import get_tenant_id, get_user_id
@@ -56,7 +56,7 @@ class GraphClient:
 
                     self.token = token
                     duration = time.time() - start_time
-                    logger.info(redact_log(mask_phi(f"⏱️ Graph token retrieval took {duration:.2f}s")))
+                    logger.info(Redacted("⏱️ Graph token retrieval took %.2fs", duration))
                     return token
 
         except Exception as e:
@@ -148,7 +148,7 @@ class GraphClient:
                 "Graph Email Sent",
                 {"recipient": to, "subject": subject, "duration": f"{duration:.2f}s"}
             )
-            logger.info(mask_phi(redact_log(f"✅ Email sent via Graph to {to} in {duration:.2f}s")))
+            logger.info(Redacted("✅ Email sent via Graph to %s in %.2fs", to, duration))
             return True
 
         except Exception as e:
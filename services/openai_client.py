@@ -3,9 +3,9 @@ import time
 from openai import AsyncOpenAI, OpenAIError
 from config_loader import AppConfig, get_config
 from utils.retry_utils import openai_retry
-from utils.token_utils import trim_to_token_limit
-from core.security import redact_log, mask_phi
-from core.usage_tracker import log_usage, check_quota
+from utils.token_utils import trim_to_token_limit, estimate_tokens
+from core.security import redact_log, mask_phi, Redacted
+from core.usage_tracker import reserve_quota, commit_quota, release_quota, get_usage_section
 from core.auth import get_user_id, get_tenant_id, get_user_role
 from core.error_handling import handle_error, AppError
 from logger import logger
@@ -13,6 +13,9 @@ from logger import logger
 DEFAULT_MODEL = "gpt-4"
 DEFAULT_SYSTEM_MSG = "You are a professional legal writer. Stay concise and legally fluent."
 
+# Completion tokens held against quota before a call; the actual count is settled afterwards.
+COMPLETION_TOKEN_ESTIMATE = 1500
+
 
 class OpenAIClient:
     def __init__(self, config: AppConfig = None):
@@ -59,48 +62,59 @@ class OpenAIClient:
             logger.info("[OPENAI_GEN_TEST] Returning deterministic test output.")
             return f"[TEST MODE] Prompt length={len(trimmed)} Model={used_model}"
 
-        if not check_quota("openai_tokens"):
+        estimated_tokens = estimate_tokens(system_msg) + estimate_tokens(trimmed) + COMPLETION_TOKEN_ESTIMATE
+        try:
+            reservation_id = reserve_quota("openai_tokens", estimated_tokens, tenant_id=tenant_id)
+        except RuntimeError:
             raise AppError(
                 code="OPENAI_GEN_000",
                 message="Quota exceeded for tenant.",
                 details=f"Tenant={tenant_id}"
             )
 
-        start_time = time.time()
-        response = await self.client.chat.completions.create(
-            model=used_model,
-            messages=[
-                {"role": "system", "content": system_msg},
-                {"role": "user", "content": trimmed},
-            ],
-            temperature=temperature,
-        )
-        latency = time.time() - start_time
-        logger.info(redact_log(mask_phi(f"[METRIC] OpenAI latency: {latency:.2f}s for tenant={tenant_id}")))
-
-        choices = getattr(response, "choices", [])
-        if not choices or not hasattr(choices[0], "message"):
-            raise AppError(
-                code="OPENAI_GEN_001",
-                message="OpenAI returned no completions.",
-                details=f"Model={used_model}, Prompt length={len(trimmed)}",
+        try:
+            start_time = time.time()
+            response = await self.client.chat.completions.create(
+                model=used_model,
+                messages=[
+                    {"role": "system", "content": system_msg},
+                    {"role": "user", "content": trimmed},
+                ],
+                temperature=temperature,
             )
+            latency = time.time() - start_time
+            logger.info(Redacted("[METRIC] OpenAI latency: %.2fs for tenant=%s", latency, tenant_id))
+
+            choices = getattr(response, "choices", [])
+            if not choices or not hasattr(choices[0], "message"):
+                raise AppError(
+                    code="OPENAI_GEN_001",
+                    message="OpenAI returned no completions.",
+                    details=f"Model={used_model}, Prompt length={len(trimmed)}",
+                )
 
-        content = choices[0].message.content.strip()
-        usage = getattr(response, "usage", None)
+            content = choices[0].message.content.strip()
+        except BaseException:
+            # The call failed or was cancelled: give the held tokens back.
+            release_quota(reservation_id)
+            raise
 
-        if usage:
-            log_usage(
-                event_type="openai_tokens",
-                amount=usage.total_tokens,
-                metadata={
-                    "model": used_model,
-                    "prompt_tokens": usage.prompt_tokens,
-                    "completion_tokens": usage.completion_tokens,
-                    "role": user_role,
-                    "latency": latency,
-                },
-            )
+        usage = getattr(response, "usage", None)
+        # Settle the reservation with the real count (the estimate if OpenAI reported none).
+        commit_quota(
+            reservation_id,
+            usage.total_tokens if usage else estimated_tokens,
+            "openai_tokens",
+            tenant_id=tenant_id,
+            metadata={
+                "model": used_model,
+                "prompt_tokens": usage.prompt_tokens if usage else None,
+                "completion_tokens": usage.completion_tokens if usage else None,
+                "role": user_role,
+                "latency": latency,
+                "section": get_usage_section(),
+            },
+        )
 
         return content
 
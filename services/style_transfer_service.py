@@ -1,5 +1,6 @@
 import pandas as pd
 import asyncio
+import hashlib
 from services.openai_client import OpenAIClient
 from core.prompts.prompt_factory import build_prompt
 from core.security import sanitize_text, mask_phi, redact_log
@@ -36,7 +37,9 @@ async def generate_style_mimic_output(example_paragraphs: list[str], new_input:
 
         logger.debug(f"[STYLE_TRANSFER] Prompt being sent to OpenAI (first 500 chars):\n{prompt[:500]}")
 
-        fingerprint = f"style::{hash(example_text)}::{hash(new_input.strip())}"
+        # hash() is salted per process; a stable digest lets the disk cache tier hit after a restart.
+        digest = hashlib.sha256(f"{example_text}\x00{new_input.strip()}".encode("utf-8")).hexdigest()
+        fingerprint = f"style::{digest}"
         cached = get_cache(fingerprint)
         if cached:
             logger.info(f"[STYLE_CACHE_HIT] Using cached result for {fingerprint}")
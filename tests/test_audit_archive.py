@@ -0,0 +1,87 @@
+import gzip
+import os
+import time
+from datetime import datetime
+from core import audit, audit_archive, db
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "hub.db"))
+    monkeypatch.setattr(audit_archive, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    db.init_db()
+    monkeypatch.setattr(audit, "get_tenant_id", lambda: "t")
+    monkeypatch.setattr(audit, "get_user_role", lambda: "admin")
+
+
+def _log(month: str, n: int):
+    db.insert_audit_events([
+        {"tenant_id": "t", "user_id": "u", "action": "A", "timestamp": f"{month}-{day:02d}T00:00:00"}
+        for day in range(1, n + 1)
+    ])
+
+
+def test_closed_months_move_to_cold_segments(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    _log("2024-01", 5)
+    _log("2024-02", 5)
+    _log("2024-03", 3)
+    db.verify_audit_chain("t")
+
+    result = audit_archive.archive_closed_months(now=datetime(2024, 3, 15))
+
+    assert result == {"segments": 2, "rows": 10}
+    hot = db.get_audit_events("t", limit=100)
+    assert [e["timestamp"][:7] for e in hot] == ["2024-03"] * 3
+    index = audit_archive.load_archive_index()
+    assert [e["month"] for e in index] == ["2024-01", "2024-02"] and all(e["purged"] for e in index)
+    with gzip.open(os.path.join(audit_archive.ARCHIVE_DIR, index[0]["file"]), "rt") as f:
+        assert len(f.readlines()) == 5
+
+    # Queries route across hot and cold partitions, newest first, with keyset paging.
+    page = audit.fetch_audit_events(limit=6)
+    assert [e.get("archived", False) for e in page] == [False] * 3 + [True] * 3
+    older = audit.fetch_audit_events(limit=100, before_timestamp=page[-1]["timestamp"], before_id=page[-1]["id"])
+    assert len(older) == 7
+    assert len(audit.fetch_audit_events(limit=100, start="2024-01-03", end="2024-01-05")) == 2
+
+    # The hot chain still verifies after its older rows were archived.
+    _log("2024-03", 1)
+    assert db.verify_audit_chain("t")["broken_at_id"] is None
+
+
+def test_unverified_rows_stay_hot(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    _log("2024-01", 4)
+
+    assert audit_archive.archive_closed_months(now=datetime(2024, 3, 1)) == {"segments": 0, "rows": 0}
+    db.verify_audit_chain("t")
+    audit_archive.archive_closed_months(now=datetime(2024, 3, 1))
+    # The checkpoint anchor row is kept hot for the verifier.
+    assert len(db.get_audit_events("t", limit=100)) == 1
+
+
+def test_archive_run_is_exclusive_across_processes(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    _log("2024-01", 5)
+    db.verify_audit_chain("t")
+
+    # Another process holds the lease: this run must not touch the index or the hot rows.
+    assert db.acquire_lease(audit_archive.ARCHIVE_LEASE, "other-process", 60, time.time())
+    assert audit_archive.archive_closed_months(now=datetime(2024, 3, 1)) == {"segments": 0, "rows": 0}
+    assert audit_archive.load_archive_index() == []
+
+    db.release_lease(audit_archive.ARCHIVE_LEASE, "other-process")
+    assert audit_archive.archive_closed_months(now=datetime(2024, 3, 1))["segments"] == 1
+    # The lease is released after the run, and an already indexed range is never appended twice.
+    assert db.acquire_lease(audit_archive.ARCHIVE_LEASE, "other-process", 60, time.time())
+    db.release_lease(audit_archive.ARCHIVE_LEASE, "other-process")
+    monkeypatch.setattr(audit_archive, "purge_audit_rows", lambda *a: None)
+    index = audit_archive.load_archive_index()
+    entry = index[0]
+    monkeypatch.setattr(audit_archive, "get_archivable_audit_months", lambda cutoff: [("t", "2024-01")])
+    monkeypatch.setattr(
+        audit_archive, "get_audit_rows_for_archive",
+        lambda *a: [{"id": entry["first_id"], "timestamp": entry["min_timestamp"]}],
+    )
+    assert audit_archive.archive_closed_months(now=datetime(2024, 3, 1)) == {"segments": 0, "rows": 0}
+    assert audit_archive.load_archive_index() == index
@@ -0,0 +1,54 @@
+from core import db
+
+
+def _use_tmp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "hub.db"))
+    db.init_db()
+
+
+def _log(n, tenant="t"):
+    db.insert_audit_events([{"tenant_id": tenant, "user_id": "u", "action": f"A{i}"} for i in range(n)])
+
+
+def test_verification_is_incremental(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    _log(10)
+    _log(5, tenant="other")
+    assert db.verify_audit_chain("t")["verified_through_id"] == 10
+
+    hashed = []
+    original = db._audit_hash
+    monkeypatch.setattr(db, "_audit_hash", lambda *a: hashed.append(a) or original(*a))
+    _log(3)
+    watermark = db.verify_audit_chain("t")
+
+    assert watermark == {**watermark, "verified_through_id": 18, "broken_at_id": None}
+    assert len(hashed) == 3 + 3  # three inserts, then only the three new rows re-hashed
+    events = db.get_audit_events("t", limit=100)
+    assert all(e["verified"] and not e["tampered"] for e in events)
+
+
+def test_deleted_or_edited_rows_break_the_chain(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    _log(6)
+    with db.pooled_connection() as conn:
+        conn.execute("DELETE FROM audit_log WHERE id = 3")
+    assert db.verify_audit_chain("t")["broken_at_id"] == 4
+
+    _log(2, tenant="edited")
+    with db.pooled_connection() as conn:
+        conn.execute("UPDATE audit_log SET metadata = '{\"x\": 1}' WHERE id = 7")
+    assert db.verify_audit_chain("edited")["broken_at_id"] == 7
+
+
+def test_forged_checkpoint_is_ignored(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    monkeypatch.setenv("AUDIT_CHECKPOINT_KEY", "secret")
+    _log(4)
+    db.verify_audit_chain("t")
+    with db.pooled_connection() as conn:
+        conn.execute("UPDATE audit_log SET action = 'forged' WHERE id = 2")
+        conn.execute("UPDATE audit_checkpoints SET last_id = 1, last_hash = (SELECT hash FROM audit_log WHERE id = 1)")
+
+    assert db.get_verification_watermark("t")["verified_through_id"] == 0
+    assert db.verify_audit_chain("t")["broken_at_id"] == 2
@@ -0,0 +1,65 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+from core import audit, audit_archive, db
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "hub.db"))
+    monkeypatch.setattr(audit_archive, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    db.init_db()
+    monkeypatch.setattr(audit, "get_tenant_id", lambda: "t")
+    monkeypatch.setattr(audit, "get_user_role", lambda: "admin")
+    monkeypatch.setattr(audit, "log_audit_event", lambda *a, **k: None)
+    db.insert_audit_events([
+        {"tenant_id": "t", "user_id": f"u{i % 2}", "action": "A", "metadata": {"i": i},
+         "timestamp": f"2024-0{1 + i // 5}-{1 + i % 5:02d}T00:00:00"}
+        for i in range(15)
+    ])
+    db.verify_audit_chain("t")
+    audit_archive.archive_closed_months(now=datetime(2024, 3, 15))
+
+
+def test_csv_export_spans_hot_and_archived_rows(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    target = io.BytesIO()
+
+    assert audit.export_audit_events(target, fmt="csv", include_verification=True) == 15
+
+    rows = list(csv.DictReader(io.StringIO(target.getvalue().decode("utf-8"))))
+    assert [int(r["id"]) for r in rows] == list(range(1, 16))
+    assert {r["archived"] for r in rows} == {"True", "False"}
+    assert all(r["hash_valid"] == "True" and r["chain_linked"] == "True" for r in rows)
+
+
+def test_jsonl_export_flags_tampered_rows(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    with db.pooled_connection() as conn:
+        conn.execute("UPDATE audit_log SET action = 'forged' WHERE id = 12")
+    target = io.BytesIO()
+
+    audit.export_audit_events(target, fmt="jsonl.gz", include_verification=True, user_id=None)
+
+    lines = [json.loads(line) for line in gzip.decompress(target.getvalue()).splitlines()]
+    assert [r["id"] for r in lines if not r["hash_valid"]] == [12]
+
+
+def test_hot_row_iterator_holds_no_connection_between_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "hub.db"))
+    db.init_db()
+    db.insert_audit_events([
+        {"tenant_id": "t", "user_id": "u", "action": "A", "timestamp": f"2024-01-01T00:00:{i:02d}"}
+        for i in range(7)
+    ])
+    pool = db.get_pool()
+
+    rows = db.iter_audit_rows("t", chunk_size=3)
+    first = [next(rows) for _ in range(4)]
+    # Mid-export (and after the consumer walks away) every connection is back in the pool.
+    assert pool._idle.qsize() == pool._created
+    db.insert_audit_events([{"tenant_id": "t", "user_id": "u", "action": "A", "timestamp": "2024-01-02T00:00:00"}])
+
+    ids = [r["id"] for r in first] + [r["id"] for r in rows]
+    assert ids == list(range(1, 8))  # rows appended after the export started are not included
@@ -0,0 +1,43 @@
+from core import db
+
+
+def _use_tmp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "hub.db"))
+    db.init_db()
+
+
+def test_init_db_migrates_indexes_once(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    db.init_db()
+
+    with db.pooled_connection() as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == len(db.MIGRATIONS)
+        indexes = {r["name"] for r in conn.execute("PRAGMA index_list(audit_log)")}
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM audit_log WHERE tenant_id = ? AND user_id = ? "
+            "ORDER BY timestamp DESC, id DESC LIMIT 5", ("t", "u")
+        ).fetchall()
+    assert {"idx_audit_tenant_ts", "idx_audit_tenant_user_ts", "idx_audit_tenant_action_ts"} <= indexes
+    assert "idx_audit_tenant_user_ts" in plan[0]["detail"]
+    assert "TEMP B-TREE" not in " ".join(r["detail"] for r in plan)
+
+
+def test_keyset_pages_cover_every_event_once(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    # Several events share a timestamp, so the id tie-breaker matters.
+    db.insert_audit_events([
+        {"tenant_id": "t", "user_id": "u", "action": "A", "timestamp": f"2024-01-0{1 + i // 4}T00:00:00"}
+        for i in range(23)
+    ])
+
+    seen, cursor = [], (None, None)
+    while True:
+        page = db.get_audit_events("t", limit=5, before_timestamp=cursor[0], before_id=cursor[1])
+        if not page:
+            break
+        seen += [e["id"] for e in page]
+        cursor = (page[-1]["timestamp"], page[-1]["id"])
+
+    assert len(seen) == len(set(seen)) == 23
+    in_range = db.get_audit_events("t", limit=100, start="2024-01-02", end="2024-01-04")
+    assert {e["timestamp"][:10] for e in in_range} == {"2024-01-02", "2024-01-03"}
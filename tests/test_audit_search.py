@@ -0,0 +1,31 @@
+from core import db
+
+
+def _use_tmp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "hub.db"))
+    db.init_db()
+
+
+def test_search_matches_metadata_within_tenant(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    db.insert_audit_events([
+        {"tenant_id": "firm-a", "user_id": "u1", "action": "Doc Generated", "metadata": {"file": "demand_letter_CASE-1042.docx"}},
+        {"tenant_id": "firm-a", "user_id": "u2", "action": "Template Uploaded", "metadata": {"template": "FOIA Request.docx"}},
+        {"tenant_id": "firm-b", "user_id": "u3", "action": "Doc Generated", "metadata": {"file": "demand_letter_CASE-1042.docx"}},
+    ])
+
+    hits = db.search_audit_events("firm-a", "case-1042")
+    assert [(e["tenant_id"], e["user_id"]) for e in hits] == [("firm-a", "u1")]
+    assert [e["user_id"] for e in db.search_audit_events("firm-a", "foia templ")] == ["u2"]
+    assert db.search_audit_events("firm-a", 'docx" OR tenant_id:firm-b NEAR(') == []
+
+
+def test_fts_index_follows_deletes(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    db.insert_audit_events([
+        {"tenant_id": "t", "user_id": "u", "action": "A", "metadata": {"n": f"item{i}"}} for i in range(5)
+    ])
+    db.purge_audit_rows("t", "0000", "9999", 1, 3)
+
+    assert [e["id"] for e in db.search_audit_events("t", "item")] == [5, 4]
+    assert [e["id"] for e in db.search_audit_events("t", "item", limit=1, before_id=5)] == [4]
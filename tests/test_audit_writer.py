@@ -0,0 +1,39 @@
+from core import audit, db
+
+
+def _use_tmp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "hub.db"))
+    db.init_db()
+    monkeypatch.setattr(audit, "get_tenant_id", lambda: "tenant-a")
+    monkeypatch.setattr(audit, "get_user_id", lambda: "user-1")
+    monkeypatch.setattr(audit, "get_user_role", lambda: "admin")
+
+
+def test_events_are_batched_and_flushed(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    batches = []
+    original = audit.insert_audit_events
+    monkeypatch.setattr(audit, "insert_audit_events", lambda events: batches.append(len(events)) or original(events))
+
+    for i in range(200):
+        audit.log_audit_event("Doc Generated", {"doc": i})
+    audit.flush_audit_events()
+
+    events = db.get_audit_events("tenant-a", limit=500)
+    assert len(events) == 200
+    assert sum(batches) == 200 and len(batches) < 200
+    assert events[0]["metadata"].count('"role": "admin"') == 1
+
+
+def test_full_queue_falls_back_to_synchronous_write(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    writer = audit.AuditWriter()
+    monkeypatch.setattr(audit, "AUDIT_ENQUEUE_TIMEOUT_SECONDS", 0)
+    monkeypatch.setattr(writer, "_ensure_started", lambda: None)  # writer thread never drains
+    writer._queue.maxsize = 1
+    monkeypatch.setattr(audit, "_writer", writer)
+
+    audit.log_audit_event("Queued", {})
+    audit.log_audit_event("Overflow", {})
+
+    assert [e["action"] for e in db.get_audit_events("tenant-a")] == ["Overflow"]
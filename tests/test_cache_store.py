@@ -0,0 +1,173 @@
+import os
+import threading
+import pytest
+from core import cache_utils
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    cache = cache_utils.LRUCache(max_bytes=1000, max_entries=10)
+    monkeypatch.setattr(cache_utils, "_cache", cache)
+    monkeypatch.setattr(cache_utils, "_disk", cache_utils.DiskCache(str(tmp_path / "l2.db")))
+    monkeypatch.setattr(cache_utils, "_metrics", cache_utils.CacheMetrics())
+    monkeypatch.setattr(cache_utils, "get_tenant_id", lambda: "firm-a")
+    monkeypatch.setattr(cache_utils, "get_session_id", lambda: "session-1")
+    return cache
+
+
+def test_evicts_least_recently_used_by_bytes(store):
+    store.set("a", b"x" * 400)
+    store.set("b", b"x" * 400)
+    store.get("a")
+    store.set("c", b"x" * 400)
+
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
+    assert store.total_bytes == 800
+    assert not store.set("huge", b"x" * 2000)
+
+
+def test_entries_expire(store, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(cache_utils, "_now", lambda: clock[0])
+    store.set("k", "v", ttl=10)
+
+    clock[0] += 5
+    assert store.get("k") == "v"
+    clock[0] += 6
+    assert store.get("k") is None
+    assert len(store) == 0 and store.total_bytes == 0
+
+
+def test_shared_across_sessions_but_not_tenants(store, monkeypatch):
+    cache_utils.set_cache("demand::abc", b"letter")
+    cache_utils.set_cache("draft", "mine", session_scoped=True)
+
+    monkeypatch.setattr(cache_utils, "get_session_id", lambda: "session-2")
+    assert cache_utils.get_cache("demand::abc") == b"letter"
+    assert cache_utils.get_cache("draft", session_scoped=True) is None
+
+    monkeypatch.setattr(cache_utils, "get_tenant_id", lambda: "firm-b")
+    assert cache_utils.get_cache("demand::abc") is None
+
+
+def test_clear_only_drops_own_entries(store, monkeypatch):
+    cache_utils.set_cache("mine", 1)
+    monkeypatch.setattr(cache_utils, "get_session_id", lambda: "session-2")
+    cache_utils.set_cache("theirs", 2)
+
+    monkeypatch.setattr(cache_utils, "get_session_id", lambda: "session-1")
+    cache_utils.clear_caches()
+
+    assert cache_utils.get_cache("mine") is None
+    assert cache_utils.get_cache("theirs") == 2
+
+
+def test_concurrent_access_keeps_accounting_exact(store):
+    def worker(n):
+        for i in range(200):
+            store.set((n, i % 7), b"x" * 50)
+            store.get((n, (i + 3) % 7))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(store) <= 10
+    assert store.total_bytes == sum(e["size"] for _, e in store.items())
+
+
+def test_disk_tier_survives_restart(store, monkeypatch):
+    cache_utils.set_cache("style::abc", "styled paragraph")
+    cache_utils._disk.flush()
+
+    # A fresh process starts with an empty memory tier.
+    monkeypatch.setattr(cache_utils, "_cache", cache_utils.LRUCache())
+    assert cache_utils.get_cache("style::abc") == "styled paragraph"
+    assert len(cache_utils._cache) == 1
+
+    monkeypatch.setattr(cache_utils, "get_tenant_id", lambda: "firm-b")
+    assert cache_utils.get_cache("style::abc") is None
+
+
+def test_disk_tier_evicts_least_recently_accessed(tmp_path, monkeypatch):
+    disk = cache_utils.DiskCache(str(tmp_path / "l2.db"), max_bytes=2500)
+    payload = lambda n: os.urandom(1000)  # incompressible, ~1 KB on disk
+    clock = [1000.0]
+    monkeypatch.setattr(cache_utils, "_now", lambda: clock[0])
+
+    for n in range(2):
+        disk.put(("t", "*", f"k{n}"), payload(n), expires=5000)
+        disk.flush()
+        clock[0] += 1
+    disk.get(("t", "*", "k0"))
+    disk.flush()
+    clock[0] += 1
+    disk.put(("t", "*", "k2"), payload(2), expires=5000)
+    disk.flush()
+
+    assert disk.get(("t", "*", "k1")) is None
+    assert disk.get(("t", "*", "k0")) is not None
+    assert disk.total_bytes() <= 2500
+    disk.close()
+
+
+def test_metrics_count_hits_misses_and_tokens(store, monkeypatch):
+    metrics = cache_utils.get_cache_metrics()
+    emitted = []
+    monkeypatch.setattr(cache_utils, "log_metric", lambda name, value, meta: emitted.append((name, value, meta)))
+
+    cache_utils.get_cache("style::a")
+    cache_utils.set_cache("style::a", "x" * 400)
+    cache_utils.get_cache("style::a")
+    cache_utils.get_cache("style::a")
+
+    row = cache_utils.get_cache_stats()["namespaces"][("firm-a", "style")]
+    assert (row["hits"], row["misses"], row["sets"]) == (2, 1, 1)
+    assert row["tokens_saved"] == 200
+    assert row["hit_rate"] == 0.667 and row["entries"] == 1
+
+    metrics.emit()
+    assert ("cache.hits", 2, {"tenant_id": "firm-a", "namespace": "style"}) in emitted
+    emitted.clear()
+    metrics.emit()
+    assert emitted == []
+
+
+def test_invalidate_targets_tenant_and_namespace(store, monkeypatch):
+    cache_utils.set_cache("demand::1", "a")
+    cache_utils.set_cache("foia::1", "b")
+    monkeypatch.setattr(cache_utils, "get_tenant_id", lambda: "firm-b")
+    cache_utils.set_cache("demand::1", "c")
+
+    assert cache_utils.invalidate_cache("firm-a", "demand") == 1
+
+    assert cache_utils.get_cache("demand::1") == "c"
+    monkeypatch.setattr(cache_utils, "get_tenant_id", lambda: "firm-a")
+    assert cache_utils.get_cache("demand::1") is None  # gone from disk too
+    assert cache_utils.get_cache("foia::1") == "b"
+    assert store.peek(("firm-a", "*", "foia::1"))["tokens"] == 1
+
+
+def test_hit_metrics_come_from_the_entry_that_was_read(store, monkeypatch):
+    cache_utils.set_cache("style::a", "x" * 400)
+    # A concurrent set/evict between two separate lookups used to turn this hit into an error.
+    monkeypatch.setattr(store, "peek", lambda key: None)
+
+    assert cache_utils.get_cache("style::a") == "x" * 400
+    row = cache_utils.get_cache_stats()["namespaces"][("firm-a", "style")]
+    assert (row["hits"], row["misses"], row["tokens_saved"]) == (1, 0, 100)
+
+
+def test_content_key_covers_every_input():
+    inputs = {"client_name": "Jane Doe", "defendant": "Acme", "location": "Chicago", "example": None}
+    key = cache_utils.content_key("demand", inputs)
+
+    assert key.startswith("demand::")
+    assert cache_utils.content_key("demand", dict(reversed(list(inputs.items())))) == key
+    for field in inputs:
+        changed = {**inputs, field: "other"}
+        assert cache_utils.content_key("demand", changed) != key
+    assert cache_utils.content_key("foia", inputs) != key
@@ -0,0 +1,204 @@
+import pytest
+import numpy as np
+import pandas as pd
+from services import dashboard_service
+from services.dashboard_service import (
+    CAMPAIGN_COL,
+    EMAIL_COL,
+    PHONE_COL,
+    REFERRAL_COL,
+    STATUS_COL,
+    DashboardModel,
+    get_dashboard_model,
+)
+
+
+def _legacy_contact_score(row):
+    phone = row.get(PHONE_COL, "")
+    email = row.get(EMAIL_COL, "")
+    if phone and email:
+        return "✅ Full"
+    elif phone or email:
+        return "⚠️ Partial"
+    return "❌ Missing"
+
+
+def _frame(n: int = 400, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    phones = np.array(["555-0100", "", None, np.nan, 5550101, 0], dtype=object)
+    emails = np.array(["a@example.com", "", None, np.nan], dtype=object)
+    statuses = np.array(["Questionnaire Received", "FLAGGED - docs", "Litigation", "Intake", None], dtype=object)
+    return pd.DataFrame({
+        CAMPAIGN_COL: rng.choice(np.array(["Roundup", "Hair Relaxer", "Zantac", None], dtype=object), n),
+        STATUS_COL: rng.choice(statuses, n),
+        REFERRAL_COL: rng.choice(np.array(["Smith, A", "Jones, B", None], dtype=object), n),
+        PHONE_COL: rng.choice(phones, n),
+        EMAIL_COL: rng.choice(emails, n),
+        "Date Opened": pd.to_datetime("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D"),
+    })
+
+
+def test_contact_health_matches_row_wise_scoring():
+    df = _frame()
+    model = DashboardModel(df)
+    expected = df.apply(_legacy_contact_score, axis=1).tolist()
+    assert model.df["Contact Health"].tolist() == expected
+
+
+def test_kpis_and_filters_match_full_frame_scans():
+    df = _frame()
+    model = DashboardModel(df)
+
+    for campaign in [None] + model.campaigns:
+        view = df if campaign is None else df[df[CAMPAIGN_COL] == campaign]
+        status = view[STATUS_COL].astype(str)
+        assert model.kpis(campaign) == {
+            "total": len(view),
+            "questionnaire": int(view[STATUS_COL].eq("Questionnaire Received").sum()),
+            "flagged": int(status.str.contains("FLAGGED", case=False, na=False).sum()),
+            "litigation": int(status.str.contains("LITIGATION", case=False, na=False).sum()),
+        }
+
+    positions = model.campaign_positions("Roundup")
+    view = df[df[CAMPAIGN_COL] == "Roundup"]
+    assert model.options(REFERRAL_COL, positions) == sorted(view[REFERRAL_COL].dropna().unique())
+
+    filtered = model.filter_positions(positions, {STATUS_COL: ["Intake", "Litigation"], REFERRAL_COL: []})
+    expected = view[view[STATUS_COL].isin(["Intake", "Litigation"])]
+    assert model.rows(filtered).index.tolist() == expected.index.tolist()
+
+    counts = model.value_counts(STATUS_COL, filtered)
+    assert dict(zip(counts.iloc[:, 0], counts.iloc[:, 1])) == expected[STATUS_COL].value_counts().to_dict()
+
+
+def test_model_is_built_once_per_revision(monkeypatch):
+    monkeypatch.setattr(dashboard_service, "_models", dashboard_service.OrderedDict())
+    monkeypatch.setattr(dashboard_service, "_latest_model", None)
+    df = _frame(20)
+    df.attrs["dropbox_rev"] = "rev-1"
+
+    first = get_dashboard_model(df)
+    assert get_dashboard_model(df) is first
+    assert "Contact Health" not in df.columns  # the shared frame is left untouched
+
+    newer = _frame(20, seed=8)
+    newer.attrs["dropbox_rev"] = "rev-2"
+    assert get_dashboard_model(newer) is not first
+
+
+def test_unrevisioned_frames_are_keyed_by_content(monkeypatch):
+    monkeypatch.setattr(dashboard_service, "_models", dashboard_service.OrderedDict())
+    monkeypatch.setattr(dashboard_service, "_latest_model", None)
+
+    first = get_dashboard_model(_frame(20))  # the frame is collected right away, freeing its id()
+    assert get_dashboard_model(_frame(20)) is first
+    other = _frame(20, seed=8)
+    assert get_dashboard_model(other) is not first
+    assert get_dashboard_model(other).df[CAMPAIGN_COL].tolist() == other[CAMPAIGN_COL].tolist()
+
+
+def _optional_frame() -> pd.DataFrame:
+    df = _frame()
+    df["Notes"] = np.where(np.arange(len(df)) % 3 == 0, "Client called about SETTLEMENT", "intake call")
+    df.loc[df.index[::7], "Notes"] = None
+    df["Venue"] = np.where(np.arange(len(df)) % 2 == 0, "Cook", "DuPage")
+    return df
+
+
+def _query(model):
+    query = dashboard_service.empty_query("Roundup")
+    query["filters"] = {STATUS_COL: ["Intake", "Litigation", "FLAGGED - docs"]}
+    query["values"] = {"Venue": ["Cook"]}
+    query["contains"] = {"Notes": "settle"}
+    return query
+
+
+def _expected(df):
+    view = df[(df[CAMPAIGN_COL] == "Roundup") & df[STATUS_COL].isin(["Intake", "Litigation", "FLAGGED - docs"])]
+    view = view[view["Venue"].astype(str).isin(["Cook"])]
+    return view[view["Notes"].str.contains("settle", case=False, na=False, regex=False)]
+
+
+def test_pandas_engine_filters_and_pages():
+    df = _optional_frame()
+    engine = dashboard_service.PandasQueryEngine(DashboardModel(df))
+    query = _query(engine.model)
+    expected = _expected(df)
+
+    assert engine.positions(query).tolist() == expected.index.tolist()
+    assert engine.distinct("Venue", "Roundup") == ["Cook", "DuPage"]
+
+    page, total = engine.page(query, ["Notes", "Venue"], page=1, page_size=5)
+    assert total == len(expected)
+    assert page.index.tolist() == expected.index[5:10].tolist()
+    assert page.columns.tolist() == ["Notes", "Venue"]
+
+
+def test_duckdb_engine_matches_pandas_engine():
+    pytest.importorskip("duckdb")
+    df = _optional_frame()
+    model = DashboardModel(df)
+    duck, pandas_engine = dashboard_service.DuckDBQueryEngine(model), dashboard_service.PandasQueryEngine(model)
+    query = _query(model)
+
+    assert duck.positions(query).tolist() == pandas_engine.positions(query).tolist()
+    assert duck.distinct("Venue", "Roundup") == pandas_engine.distinct("Venue", "Roundup")
+    page, total = duck.page(query, ["Notes"], page=1, page_size=5)
+    expected_page, expected_total = pandas_engine.page(query, ["Notes"], page=1, page_size=5)
+    assert total == expected_total
+    assert page.index.tolist() == expected_page.index.tolist()
+
+
+def test_query_engine_falls_back_to_pandas(monkeypatch):
+    monkeypatch.setattr(dashboard_service, "DASHBOARD_QUERY_ENGINE", "duckdb")
+    monkeypatch.setattr(dashboard_service, "duckdb", None)
+    model = DashboardModel(_frame(20))
+    assert model.query_engine().name == "pandas"
+    assert model.query_engine() is model.query_engine()
+
+
+def _keyed_frame(n: int = 300) -> pd.DataFrame:
+    df = _frame(n)
+    df["CaseID"] = [f"{{{i:08x}-0000-4000-8000-{i:012x}}}" for i in range(n)]  # braces stripped on extraction
+    return df
+
+
+def test_incremental_model_matches_full_rebuild():
+    old = _keyed_frame()
+    new = old.drop(index=[3, 50]).reset_index(drop=True)
+    new.loc[10, EMAIL_COL] = None
+    new.loc[11, STATUS_COL] = "FLAGGED - review"
+    new.loc[12, CAMPAIGN_COL] = "Brand New Campaign"
+    added = _keyed_frame(305).iloc[300:]
+    new = pd.concat([new, added], ignore_index=True)
+
+    previous = DashboardModel(old)
+    incremental = DashboardModel(new, previous=previous)
+    full = DashboardModel(new)
+
+    ids = new["CaseID"].str.strip("{}").str.lower()
+    assert incremental.diff == {
+        "inserted": ids.iloc[-5:].tolist(),
+        "updated": ids.iloc[10:13].tolist(),
+        "deleted": old["CaseID"].iloc[[3, 50]].str.strip("{}").tolist(),
+    }
+    assert incremental.df["Contact Health"].tolist() == full.df["Contact Health"].tolist()
+    assert incremental.campaigns == full.campaigns
+    for campaign in [None] + full.campaigns:
+        assert incremental.kpis(campaign) == full.kpis(campaign)
+    assert set(incremental._kpis) == set(full._kpis)
+
+    changed = incremental.changed_since(previous.generation)
+    assert np.flatnonzero(changed).tolist() == [10, 11, 12] + list(range(len(new) - 5, len(new)))
+    assert not incremental.changed_since(incremental.generation).any()
+
+
+def test_unkeyed_sheet_is_rebuilt_in_full():
+    old = _keyed_frame(20)
+    new = old.copy()
+    new.loc[5, "CaseID"] = new.loc[4, "CaseID"]  # duplicated case ID: no reliable key
+
+    model = DashboardModel(new, previous=DashboardModel(old))
+    assert model.diff is None
+    assert not model.changed_since(0).any()
+    assert DashboardModel(_frame(20), previous=model).diff is None  # no CaseID column
@@ -0,0 +1,36 @@
+import threading
+from core import db
+
+
+def _use_tmp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "hub.db"))
+    db.init_db()
+
+
+def test_pool_reuses_wal_connections(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+
+    with db.pooled_connection() as first:
+        assert first.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert first.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    with db.pooled_connection() as second:
+        assert second is first
+
+
+def test_concurrent_audit_inserts(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+
+    def session(n):
+        for i in range(25):
+            db.insert_audit_event("tenant-a", f"user-{n}", "Test Event", {"i": i})
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    events = db.get_audit_events("tenant-a", limit=1000)
+    assert len(events) == 500
+    assert not any(e["tampered"] for e in events)
+    assert db.get_pool()._created <= db.DB_POOL_SIZE
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from services import dropbox_client
+from core import db
+
+
+def _entry(ok: bool, error: str = "path/not_found"):
+    return SimpleNamespace(is_success=lambda: ok, get_failure=lambda: error)
+
+
+def _async_launch(job_id: str):
+    return SimpleNamespace(is_complete=lambda: False, get_async_job_id=lambda: job_id)
+
+
+def _status(done: bool, entries=None):
+    return SimpleNamespace(
+        is_complete=lambda: done,
+        is_failed=lambda: False,
+        get_complete=lambda: SimpleNamespace(entries=entries),
+    )
+
+
+def test_bulk_delete_polls_async_job(monkeypatch):
+    dbx = MagicMock()
+    dbx.files_delete_batch.return_value = _async_launch("job-1")
+    dbx.files_delete_batch_check.side_effect = [
+        _status(False),
+        _status(True, [_entry(True), _entry(False)]),
+    ]
+    monkeypatch.setattr(dropbox_client.dropbox, "Dropbox", lambda **kwargs: dbx)
+    monkeypatch.setattr(dropbox_client, "BATCH_JOB_POLL_SECONDS", 0)
+
+    outcome = db.delete_templates("demand", ["a.docx", "b.docx"])
+
+    assert dbx.files_delete_batch.call_count == 1
+    assert outcome["succeeded"] == ["a.docx"]
+    assert list(outcome["failed"]) == ["b.docx"]
+
+
+def test_bulk_move_uses_single_batch(monkeypatch):
+    dbx = MagicMock()
+    dbx.files_move_batch_v2.return_value = SimpleNamespace(
+        is_complete=lambda: True,
+        get_complete=lambda: SimpleNamespace(entries=[_entry(True), _entry(True)]),
+    )
+    monkeypatch.setattr(dropbox_client.dropbox, "Dropbox", lambda **kwargs: dbx)
+
+    outcome = db.move_templates("demand", {"a.docx": "a.docx", "b.docx": "b.docx"}, target_category="foia")
+
+    relocations = dbx.files_move_batch_v2.call_args.args[0]
+    assert [r.to_path for r in relocations] == ["/Templates/FOIA/a.docx", "/Templates/FOIA/b.docx"]
+    assert outcome == {"succeeded": ["a.docx", "b.docx"], "failed": {}}
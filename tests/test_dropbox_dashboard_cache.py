@@ -0,0 +1,55 @@
+import pandas as pd
+from io import BytesIO
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from services import dropbox_client
+
+
+def _workbook_bytes(df: pd.DataFrame) -> bytes:
+    buffer = BytesIO()
+    df.to_excel(buffer, sheet_name="Master Dashboard", index=False)
+    return buffer.getvalue()
+
+
+def _fake_dbx(rev: str, content: bytes):
+    dbx = MagicMock()
+    dbx.files_get_metadata.return_value = SimpleNamespace(rev=rev)
+    dbx.files_download.return_value = (None, SimpleNamespace(content=content))
+    return dbx
+
+
+def test_dashboard_parsed_once_per_revision(tmp_path, monkeypatch):
+    monkeypatch.setattr(dropbox_client, "DASHBOARD_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(dropbox_client, "DASHBOARD_REV_CHECK_SECONDS", 0)
+    monkeypatch.setattr(dropbox_client, "_dashboard_frames", {})
+
+    source = pd.DataFrame({"Case Type": ["Auto", "Premises"], "Class Code Title": ["Open", "FLAGGED"]})
+    dbx = _fake_dbx("rev1", _workbook_bytes(source))
+    monkeypatch.setattr(dropbox_client.dropbox, "Dropbox", lambda **kwargs: dbx)
+
+    first = dropbox_client.download_dashboard_df("/Master Dashboard.xlsx")
+    second = dropbox_client.download_dashboard_df("/Master Dashboard.xlsx")
+
+    assert dbx.files_download.call_count == 1
+    assert second is first
+    assert first.attrs["dropbox_rev"] == "rev1"
+    assert list(first["Case Type"]) == ["Auto", "Premises"]
+
+
+def test_dashboard_snapshot_survives_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr(dropbox_client, "DASHBOARD_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(dropbox_client, "_dashboard_frames", {})
+
+    source = pd.DataFrame({"Case Type": ["Auto"], "Mixed": [1]})
+    source["Mixed"] = source["Mixed"].astype(object)
+    source.loc[1] = ["Premises", "n/a"]
+    dbx = _fake_dbx("rev7", _workbook_bytes(source))
+    monkeypatch.setattr(dropbox_client.dropbox, "Dropbox", lambda **kwargs: dbx)
+    fresh = dropbox_client.download_dashboard_df("/Master Dashboard.xlsx")
+
+    # Simulate a process restart: the in-memory tier is gone, the Parquet snapshot is not.
+    monkeypatch.setattr(dropbox_client, "_dashboard_frames", {})
+    dbx.files_download.side_effect = Exception("should not download again")
+    restored = dropbox_client.download_dashboard_df("/Master Dashboard.xlsx")
+
+    pd.testing.assert_frame_equal(fresh, restored)
@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from services import dropbox_client
+
+
+def test_temporary_link_is_reused_until_expiry(monkeypatch):
+    dbx = MagicMock()
+    dbx.files_get_temporary_link.side_effect = [
+        SimpleNamespace(link="https://dl.example/1"),
+        SimpleNamespace(link="https://dl.example/2"),
+    ]
+    monkeypatch.setattr(dropbox_client.dropbox, "Dropbox", lambda **kwargs: dbx)
+    monkeypatch.setattr(dropbox_client, "_temporary_links", {})
+
+    first = dropbox_client.get_temporary_link("/Training Videos/intro.mp4")
+    second = dropbox_client.get_temporary_link("/Training Videos/intro.mp4")
+    assert first == second == "https://dl.example/1"
+    assert dbx.files_get_temporary_link.call_count == 1
+
+    # An expired entry is replaced with a fresh link.
+    link, _ = dropbox_client._temporary_links["/Training Videos/intro.mp4"]
+    dropbox_client._temporary_links["/Training Videos/intro.mp4"] = (link, 0)
+    assert dropbox_client.get_temporary_link("/Training Videos/intro.mp4") == "https://dl.example/2"
+
+
+def test_listing_training_videos_mints_no_links(monkeypatch):
+    from core import db
+
+    dbx = MagicMock()
+    dbx.files_list_folder.return_value = SimpleNamespace(
+        entries=[SimpleNamespace(name="a.mp4"), SimpleNamespace(name="b.mp4")]
+    )
+    monkeypatch.setattr(dropbox_client.dropbox, "Dropbox", lambda **kwargs: dbx)
+
+    videos = db.get_training_videos()
+
+    assert [v["name"] for v in videos] == ["a.mp4", "b.mp4"]
+    assert all("url" not in v for v in videos)
+    dbx.files_get_temporary_link.assert_not_called()
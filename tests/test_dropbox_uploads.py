@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from services import dropbox_client
+
+
+def _fake_dbx():
+    dbx = MagicMock()
+    dbx.files_upload_session_start.return_value = SimpleNamespace(session_id="big")
+    dbx.files_upload_session_start_batch.side_effect = lambda n: SimpleNamespace(
+        session_ids=[f"s{i}" for i in range(n)]
+    )
+    dbx.files_upload_session_finish_batch_v2.side_effect = lambda entries: SimpleNamespace(
+        entries=[SimpleNamespace(is_success=lambda: True) for _ in entries]
+    )
+    return dbx
+
+
+def _patch_client(monkeypatch, dbx):
+    monkeypatch.setattr(dropbox_client.dropbox, "Dropbox", lambda **kwargs: dbx)
+    monkeypatch.setattr(dropbox_client, "_known_folders", set())
+
+
+def test_folder_check_is_memoized(monkeypatch):
+    dbx = _fake_dbx()
+    _patch_client(monkeypatch, dbx)
+
+    dropbox_client.upload_file_to_dropbox("/Templates/Demand/a.docx", b"one")
+    dropbox_client.upload_file_to_dropbox("/Templates/Demand/b.docx", b"two")
+
+    assert dbx.files_get_metadata.call_count == 1
+    assert dbx.files_upload.call_count == 2
+
+
+def test_large_file_uses_chunked_session(monkeypatch):
+    dbx = _fake_dbx()
+    _patch_client(monkeypatch, dbx)
+    monkeypatch.setattr(dropbox_client, "UPLOAD_SESSION_THRESHOLD", 10)
+    monkeypatch.setattr(dropbox_client, "UPLOAD_CHUNK_SIZE", 4)
+
+    dropbox_client.upload_file_to_dropbox("/Batch Output/big.docx", b"0123456789ab")
+
+    dbx.files_upload.assert_not_called()
+    appends = dbx.files_upload_session_append_v2.call_args_list
+    assert sorted(call.args[1].offset for call in appends) == [0, 4, 8]
+    # The closing chunk is the last one sent.
+    assert appends[-1].kwargs["close"] is True and appends[-1].args[1].offset == 8
+    entries = dbx.files_upload_session_finish_batch_v2.call_args.args[0]
+    assert entries[0].cursor.offset == 12
+
+
+def test_bulk_upload_commits_once_per_batch(monkeypatch):
+    dbx = _fake_dbx()
+    _patch_client(monkeypatch, dbx)
+    monkeypatch.setattr(dropbox_client, "UPLOAD_BATCH_LIMIT", 3)
+
+    files = {f"/Batch Output/run/{i}.docx": b"doc" for i in range(5)}
+    uploaded = dropbox_client.upload_files_to_dropbox(files)
+
+    assert sorted(uploaded) == sorted(files)
+    assert dbx.files_upload_session_finish_batch_v2.call_count == 2
+    assert dbx.files_upload_session_append_v2.call_count == 5
+    dbx.files_upload.assert_not_called()
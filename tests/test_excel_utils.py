@@ -0,0 +1,61 @@
+import pandas as pd
+from io import BytesIO
+from utils.excel_utils import read_excel_header, iter_excel_chunks, read_excel_columns
+
+
+def _workbook(df: pd.DataFrame) -> BytesIO:
+    buffer = BytesIO()
+    df.to_excel(buffer, index=False)
+    buffer.seek(0)
+    return buffer
+
+
+def _sample_frame(rows: int = 12) -> pd.DataFrame:
+    return pd.DataFrame({
+        "Case Type": ["Auto", "Premises", "Auto"] * (rows // 3),
+        "Class Code Title": ["Open", "FLAGGED", "LITIGATION"] * (rows // 3),
+        "Client": [f"Client {i}" for i in range(rows)],
+        "Case Number": list(range(rows)),
+    })
+
+
+def test_read_excel_header_only():
+    assert read_excel_header(_workbook(_sample_frame())) == ["Case Type", "Class Code Title", "Client", "Case Number"]
+
+
+def test_iter_excel_chunks_projects_columns():
+    chunks = list(iter_excel_chunks(_workbook(_sample_frame()), columns=["Client", "Case Type"], chunk_size=5))
+    assert [len(c) for c in chunks] == [5, 5, 2]
+    assert list(chunks[0].columns) == ["Case Type", "Client"]
+
+
+def test_read_excel_columns_matches_read_excel():
+    source = _sample_frame()
+    expected = pd.read_excel(_workbook(source))
+    result = read_excel_columns(_workbook(source))
+
+    assert result["Case Type"].dtype == "category"
+    assert result["Class Code Title"].dtype == "category"
+    assert result["Case Number"].dtype.itemsize < expected["Case Number"].dtype.itemsize
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_categorical=False)
+
+
+def test_read_excel_columns_keeps_requested_order():
+    result = read_excel_columns(_workbook(_sample_frame()), columns=["Client", "Missing", "Case Type"])
+    assert list(result.columns) == ["Client", "Case Type"]
+
+
+def test_openpyxl_fallback_matches_fast_engine(monkeypatch):
+    from utils import excel_utils
+    source = _sample_frame()
+    # Midnight and non-midnight dates in one column, plus blank cells.
+    source["Date Opened"] = pd.to_datetime(["2024-01-02", "2024-01-03 09:30"] * 6, format="ISO8601")
+    source.loc[[1, 4], "Client"] = None
+    fast = read_excel_columns(_workbook(source))
+    monkeypatch.setattr(excel_utils, "CalamineWorkbook", None)
+    fallback = read_excel_columns(_workbook(source))
+    pd.testing.assert_frame_equal(fast, fallback)
+
+    assert pd.api.types.is_datetime64_any_dtype(fast["Date Opened"])
+    assert fast["Client"].iloc[[1, 4]].map(lambda v: v is not None and pd.isna(v)).all()
+    pd.testing.assert_frame_equal(fast, pd.read_excel(_workbook(source)), check_dtype=False, check_categorical=False)
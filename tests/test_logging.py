@@ -0,0 +1,42 @@
+import json
+import logging
+import logger as app_logging
+
+
+def _record(msg, level=logging.INFO, *args):
+    return logging.LogRecord("legal_automation", level, __file__, 1, msg, args, None)
+
+
+def test_json_formatter_escapes_messages():
+    line = app_logging.JsonFormatter().format(_record('[DEMAND_POLISH] said "hi"\nnext line ✅'))
+
+    entry = json.loads(line)
+    assert entry["message"] == '[DEMAND_POLISH] said "hi"\nnext line ✅'
+    assert entry["event"] == "DEMAND_POLISH"
+    assert entry["level"] == "INFO"
+
+
+def test_sampling_keeps_one_in_n_and_all_warnings():
+    sampler = app_logging.SamplingFilter({"USAGE_LOG": 5})
+
+    kept = [sampler.filter(_record("[USAGE_LOG] Event=openai_tokens")) for _ in range(20)]
+    assert sum(kept) == 4
+    assert all(sampler.filter(_record("[USAGE_LOG] quota low", logging.WARNING)) for _ in range(3))
+    assert all(sampler.filter(_record("[AUDIT_LOG] written")) for _ in range(3))
+
+
+def test_records_reach_handlers_through_the_queue(monkeypatch):
+    seen = []
+
+    class Capture(logging.Handler):
+        def emit(self, record):
+            seen.append(app_logging.JsonFormatter().format(record))
+
+    listener = app_logging._listener
+    monkeypatch.setattr(listener, "handlers", (*listener.handlers, Capture()))
+
+    assert isinstance(app_logging.logger.handlers[0], logging.handlers.QueueHandler)
+    app_logging.logger.info("[TEMPLATE] loaded %s", "demand.docx")
+    app_logging.flush_logs()
+
+    assert json.loads(seen[-1])["message"] == "[TEMPLATE] loaded demand.docx"
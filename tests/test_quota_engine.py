@@ -0,0 +1,87 @@
+import threading
+from datetime import datetime, timedelta
+from core import db, usage_tracker
+
+
+def _use_tmp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "hub.db"))
+    db.init_db()
+    monkeypatch.setattr(usage_tracker, "_legacy_checked", True)
+
+
+def test_concurrent_reservations_never_overshoot(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    granted = []
+
+    def worker():
+        for _ in range(10):
+            reservation = db.reserve_quota("t", "openai_tokens", 100, {"daily": 2500, "monthly": None})
+            if reservation:
+                granted.append(reservation)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(granted) == 25
+    assert db.get_quota_usage("t", "openai_tokens")["daily"] == {"used": 0, "reserved": 2500}
+
+
+def test_commit_settles_actual_amount_and_release_refunds(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    limits = {"daily": 1000, "monthly": 5000}
+
+    first = db.reserve_quota("t", "openai_tokens", 800, limits)
+    assert db.reserve_quota("t", "openai_tokens", 300, limits) is None
+    db.commit_quota(first, 250)
+    second = db.reserve_quota("t", "openai_tokens", 300, limits)
+    db.release_quota(second)
+
+    usage = db.get_quota_usage("t", "openai_tokens")
+    assert usage["daily"] == {"used": 250, "reserved": 0}
+    assert db.get_usage_totals("t") == {"openai_tokens": 250}
+
+
+def test_windows_slide_and_stale_reservations_expire(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    now = datetime(2024, 5, 10, 12)
+    limits = {"daily": 100, "monthly": 150}
+
+    db.commit_quota(db.reserve_quota("t", "e", 100, limits, now=now), 100, now=now)
+    leaked = db.reserve_quota("t", "e", 50, limits, now=now + timedelta(hours=25))
+    assert leaked is not None
+    # Monthly window is full until the leaked hold expires.
+    assert db.reserve_quota("t", "e", 10, limits, now=now + timedelta(hours=25, minutes=5)) is None
+    assert db.reserve_quota("t", "e", 10, limits, now=now + timedelta(hours=26)) is not None
+    # Thirty days later the first 100 has left the monthly window too.
+    assert db.get_quota_usage("t", "e", now=now + timedelta(days=31))["monthly"]["used"] == 0
+
+
+def test_tenant_override_from_quotas_table(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    db.set_quota("firm-a", "emails_sent:daily", 2, "")
+    db.set_quota("firm-a", "emails_sent:daily", 1, "")
+
+    usage_tracker.check_quota_and_decrement("firm-a", "emails_sent", 1)
+
+    assert not usage_tracker.check_quota("emails_sent", 1, tenant_id="firm-a")
+    assert usage_tracker.check_quota("emails_sent", 1, tenant_id="firm-b")
+
+
+def test_commit_after_expiry_still_records_usage(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    now = datetime(2024, 5, 10, 12)
+    limits = {"daily": 1000, "monthly": None}
+
+    reservation = db.reserve_quota("t", "openai_tokens", 400, limits, now=now)
+    # Another session's reservation sweeps the stale hold before the long generation finishes.
+    db.release_quota(db.reserve_quota("t", "openai_tokens", 1, limits, now=now + timedelta(minutes=20)))
+
+    later = now + timedelta(minutes=21)
+    committed = db.commit_quota(reservation, 350, now=later, tenant_id="t", event_type="openai_tokens")
+
+    assert committed is False
+    assert db.get_usage_totals("t") == {"openai_tokens": 350}
+    assert db.get_quota_usage("t", "openai_tokens", now=later)["daily"] == {"used": 350, "reserved": 0}
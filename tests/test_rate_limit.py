@@ -0,0 +1,62 @@
+import threading
+import pytest
+from core import db, security
+from core.security import RateLimiter
+
+
+def test_burst_then_steady_refill():
+    limiter = RateLimiter(requests=5, window=10)
+
+    assert all(limiter.acquire("firm-a:u1", now=100.0) for _ in range(5))
+    assert not limiter.acquire("firm-a:u1", now=100.0)
+    assert limiter.acquire("firm-a:u2", now=100.0)
+
+    # One token refills every window / requests seconds.
+    assert limiter.acquire("firm-a:u1", now=102.0)
+    assert not limiter.acquire("firm-a:u1", now=102.5)
+    assert limiter.stats()["allowed"] == 7 and limiter.stats()["denied"] == 2
+
+
+def test_idle_keys_are_swept():
+    limiter = RateLimiter(requests=5, window=10)
+    for n in range(100):
+        limiter.acquire(f"key-{n}", now=100.0)
+    limiter.acquire("busy", now=105.0)
+
+    assert limiter.sweep(now=105.0) == 100
+    assert limiter.stats()["keys"] == 1
+
+
+def test_concurrent_acquires_never_exceed_capacity():
+    limiter = RateLimiter(requests=50, window=3600)
+    results = []
+
+    def worker():
+        results.extend(limiter.acquire("shared", now=1000.0) for _ in range(20))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results.count(True) == 50
+
+
+def test_sqlite_backend_is_shared(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "hub.db"))
+    db.init_db()
+    first = RateLimiter(requests=3, window=60, backend="sqlite")
+    second = RateLimiter(requests=3, window=60, backend="sqlite")  # another process
+
+    assert first.acquire("firm-a", now=0.0) and first.acquire("firm-a", now=0.0)
+    assert second.acquire("firm-a", now=0.0)
+    assert not second.acquire("firm-a", now=0.0)
+    assert second.sweep(now=61.0) == 1
+
+
+def test_rate_limit_raises_when_exhausted(monkeypatch):
+    monkeypatch.setattr(security, "_rate_limiter", RateLimiter(requests=1, window=60))
+    security.rate_limit("k")
+    with pytest.raises(RuntimeError):
+        security.rate_limit("k")
@@ -0,0 +1,83 @@
+import logging
+import random
+import re
+from core import security
+from core.security import mask_phi, redact_log, Redacted
+
+
+def legacy_mask_phi(text):
+    for field in security.PHI_FIELDS:
+        text = re.sub(rf"({field}\s*[:=].*?)(?=,|$)", "[REDACTED]", text, flags=re.IGNORECASE)
+    return text
+
+
+def legacy_redact_log(text):
+    return re.sub(r"(api|key|token|secret)[^\s\"']+", "***REDACTED***", text, flags=re.IGNORECASE)
+
+
+PIECES = [
+    "client", "Client", "CLIENT", "email", "phone", "narrative", "summary", "Summary",
+    "api", "Key", "token", "SECRET", "ſecret", "apı", ":", "=", " : ", ",", ", ", "\n",
+    "John Doe", "test@example.com", "555-0100", "'", '"', " ", "[REDACTED]", "é", "x",
+]
+
+
+def _corpus(n=3000, seed=7):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(PIECES) for _ in range(rng.randint(0, 14))) for _ in range(n)]
+
+
+def test_mask_phi_matches_sequential_substitutions():
+    for text in _corpus():
+        assert mask_phi(text) == legacy_mask_phi(text), text
+
+
+MULTILINE_PIECES = ["client", "Email", "summary", "phone", "api", "ſKEY", "K", "é", "=", ":", ",", "\n", "\t", " ", "x"]
+
+
+def test_mask_phi_matches_sequential_substitutions_across_lines():
+    # A replacement can swallow a newline and let an earlier field's match reach a comma.
+    for text in ["apisummary=client\n=x", "=é,summary=Email\n:=clientK", "Emailtokensummary=ſKEY\n=client:a,b"]:
+        assert mask_phi(text) == legacy_mask_phi(text), text
+
+    rng = random.Random(3)
+    for _ in range(5000):
+        text = "".join(rng.choice(MULTILINE_PIECES) for _ in range(rng.randint(1, 16)))
+        assert mask_phi(text) == legacy_mask_phi(text), text
+
+
+def test_redact_log_matches_original_pattern():
+    for text in _corpus(seed=11):
+        assert redact_log(text) == legacy_redact_log(text), text
+
+
+def test_clean_lines_skip_the_regex(monkeypatch):
+    class Boom:
+        def sub(self, *args):
+            raise AssertionError("pattern should not run")
+
+        finditer = sub
+
+    for name in ["_PHI_PATTERN", "_PHI_PATTERN_FOLDED", "_SECRET_PATTERN", "_SECRET_PATTERN_FOLDED"]:
+        monkeypatch.setattr(security, name, Boom())
+    line = "[METRIC] OpenAI latency: 1.20s for tenant=firm-a"
+    assert redact_log(mask_phi(line)) == line
+
+
+def test_redacted_is_lazy(caplog):
+    calls = []
+
+    class Spy:
+        def __str__(self):
+            calls.append(1)
+            return "client: Jane Roe, token=abc123"
+
+    log = logging.getLogger("redaction-test")
+    log.setLevel(logging.INFO)
+    log.debug(Redacted("%s", Spy()))
+    assert calls == []
+
+    with caplog.at_level(logging.INFO, logger="redaction-test"):
+        log.info(Redacted("payload %s", Spy()))
+    assert calls == [1]
+    assert caplog.records[-1].getMessage() == "payload [REDACTED], ***REDACTED***"
@@ -0,0 +1,59 @@
+import html
+import numpy as np
+import pandas as pd
+from core.security import sanitize_frame, sanitize_series, sanitize_text
+from services.email_service import EMAIL_MERGE_FIELDS, sanitize_merge_fields
+
+
+def _frame():
+    return pd.DataFrame({
+        "Status": pd.Categorical(["Open", "Closed", "Open", None]),
+        "Name": ["O'Brien & <Sons>", "Zoë Ål", None, "O'Brien & <Sons>"],
+        "Phone": [5550100, 5550101, 5550100, 5550102],
+        "Amount": [1.5, np.nan, 2.0, 1.5],
+        "Opened": pd.to_datetime(["2024-01-02", None, "2024-03-04 10:30", "2024-01-02"], format="ISO8601"),
+        "Notes": ['say "hi"; <b>now</b>', "tabs\there  ", "", np.nan],
+        "Flag": [True, False, True, True],
+    })
+
+
+def test_matches_scalar_apply_for_every_dtype():
+    df = _frame()
+    for col in df.columns:
+        expected = df[col].apply(lambda x: html.unescape(sanitize_text(str(x))))
+        pd.testing.assert_series_equal(sanitize_series(df[col], unescape=True), expected.astype(object))
+
+        expected = df[col].apply(lambda x: sanitize_text(str(x)))
+        pd.testing.assert_series_equal(sanitize_series(df[col]), expected.astype(object))
+
+
+def test_na_value_matches_batch_row_cleaning():
+    df = _frame()
+    cleaned = sanitize_frame(df, na_value="")
+
+    for i, row in df.astype(object).iterrows():
+        expected = [sanitize_text(str(v)) if pd.notnull(v) else "" for v in row]
+        assert list(cleaned.loc[i]) == expected
+
+
+def test_unhashable_cells_fall_back():
+    series = pd.Series([["a", "<b>"], {"k": 1}])
+    assert list(sanitize_series(series)) == [sanitize_text(str(v)) for v in series]
+
+
+def test_email_merge_fields_match_build_email():
+    df = _frame().rename(columns={"Name": EMAIL_MERGE_FIELDS["name"], "Phone": EMAIL_MERGE_FIELDS["ID"]})
+    fields = sanitize_merge_fields(df)
+
+    for i, row in df.iterrows():
+        expected = {f: sanitize_text(str(row.to_dict().get(col, ""))) for f, col in EMAIL_MERGE_FIELDS.items()}
+        assert fields.loc[i].to_dict() == expected
+
+
+def test_mixed_numeric_and_bool_cells_stay_distinct():
+    series = pd.Series([1, 1.0, True, "x", 0, 0.0, False, None, np.nan], dtype=object)
+    expected = series.apply(lambda x: sanitize_text(str(x)))
+
+    assert sanitize_series(series).tolist() == expected.tolist()
+    assert sanitize_series(series).tolist()[:7] == ["1", "1.0", "True", "x", "0", "0.0", "False"]
+    assert sanitize_series(series, na_value="").tolist()[-2:] == ["", ""]
@@ -0,0 +1,56 @@
+import json
+import threading
+from core import db, usage_tracker
+
+
+def _use_tmp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "hub.db"))
+    db.init_db()
+    monkeypatch.setattr(usage_tracker, "get_usage_log_path", lambda: str(tmp_path / "usage_log.json"))
+    monkeypatch.setattr(usage_tracker, "_legacy_checked", False)
+
+
+def test_concurrent_logging_keeps_totals_exact(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+
+    def worker(n):
+        for _ in range(50):
+            usage_tracker.log_usage("emails_sent", 2, tenant_id="firm-a", user_id=f"u{n % 2}")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert usage_tracker.get_usage_summary("firm-a") == {"emails_sent": 800}
+    assert usage_tracker.get_usage_summary("firm-a", "u1") == {"emails_sent": 400}
+    assert usage_tracker.get_usage_summary("firm-b") == {}
+    with db.pooled_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM usage_ledger").fetchone()[0] == 400
+
+
+def test_quota_reads_running_total(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    monkeypatch.setitem(usage_tracker.USAGE_QUOTAS, "emails_sent", 3)
+
+    usage_tracker.check_quota_and_decrement("firm-a", "emails_sent", 3)
+
+    assert not usage_tracker.check_quota("emails_sent", 1, tenant_id="firm-a")
+    assert usage_tracker.check_quota("emails_sent", 3, tenant_id="firm-b")
+    assert usage_tracker.get_quota_status("firm-a")["emails_sent"]["remaining"] == 0
+
+
+def test_legacy_json_log_is_imported_once(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    legacy = [
+        {"timestamp": "2024-01-01T00:00:00", "event_type": "openai_tokens", "amount": 120, "metadata": {}},
+        {"timestamp": "2024-01-02T00:00:00", "event_type": "foia_requests", "amount": 1, "metadata": {"tenant_id": "firm-a"}},
+    ]
+    (tmp_path / "usage_log.json").write_text(json.dumps(legacy))
+
+    assert usage_tracker.get_usage_summary() == {"openai_tokens": 120}
+    assert usage_tracker.get_usage_summary("firm-a") == {"foia_requests": 1}
+    monkeypatch.setattr(usage_tracker, "_legacy_checked", False)
+    assert usage_tracker.get_usage_summary() == {"openai_tokens": 120}
+    assert (tmp_path / "usage_log.json.migrated").exists()
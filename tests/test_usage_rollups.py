@@ -0,0 +1,73 @@
+from datetime import datetime
+import pytest
+from core import db, usage_tracker
+
+
+def _use_tmp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "hub.db"))
+    db.init_db()
+    monkeypatch.setattr(usage_tracker, "get_usage_log_path", lambda: str(tmp_path / "usage_log.json"))
+    monkeypatch.setattr(usage_tracker, "_legacy_checked", False)
+
+
+def _call(model="gpt-4", prompt=1000, completion=500, latency=0.3, section="demand:facts", tenant="firm-a"):
+    return {
+        "tenant_id": tenant,
+        "user_id": "u1",
+        "event_type": "openai_tokens",
+        "amount": prompt + completion,
+        "metadata": {
+            "model": model,
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "latency": latency,
+            "section": section,
+        },
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+def test_rollups_are_incremental(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    db.record_usage_events([_call(), _call(), {**_call(), "event_type": "emails_sent", "amount": 1}])
+
+    assert db.refresh_usage_rollups() == 3
+    assert db.refresh_usage_rollups() == 0
+
+    db.record_usage_events([_call(latency=5.0)])
+    assert db.refresh_usage_rollups() == 1
+
+    (row,) = db.get_usage_rollups("firm-a")
+    assert row["requests"] == 3
+    assert row["total_tokens"] == 4500
+    # 0.3s lands in the 500 ms bucket, 5s in the 8000 ms bucket.
+    assert row["latency_histogram"][1] == 2 and row["latency_histogram"][5] == 1
+    assert db.get_usage_rollups("firm-b") == []
+
+
+def test_cost_uses_model_pricing(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    db.record_usage_events([_call(model="gpt-4"), _call(model="gpt-3.5-turbo", section=None)])
+
+    report = usage_tracker.get_usage_report("firm-a")
+
+    # gpt-4: 1000 * 0.03 / 1K + 500 * 0.06 / 1K
+    assert report["by_model"]["gpt-4"]["cost_usd"] == pytest.approx(0.06)
+    assert report["by_model"]["gpt-3.5-turbo"]["cost_usd"] == pytest.approx(0.00125)
+    assert set(report["by_section"]) == {"demand:facts", "(untagged)"}
+    assert report["totals"]["requests"] == 2
+
+
+def test_percentiles_from_histogram():
+    histogram = [90, 0, 0, 5, 5, 0, 0, 0, 0, 0]
+
+    assert usage_tracker._percentile(histogram, 0.5) == 250
+    assert usage_tracker._percentile(histogram, 0.95) == 2000
+    assert usage_tracker._percentile([0] * 10, 0.95) is None
+
+
+def test_section_tags_usage_metadata():
+    assert usage_tracker.get_usage_section() is None
+    with usage_tracker.usage_section("demand:damages"):
+        assert usage_tracker.get_usage_section() == "demand:damages"
+    assert usage_tracker.get_usage_section() is None
@@ -2,14 +2,63 @@ import streamlit as st
 import pandas as pd
 import datetime
 import json
+import os
 
 from core.auth import get_tenant_id, get_user_id, get_user_role, get_tenant_branding
-from core.audit import fetch_audit_events
+from core.audit import (
+    AUDIT_EXPORT_FORMATS,
+    export_audit_events,
+    fetch_audit_events,
+    get_audit_watermark,
+    search_audit_events,
+)
+from core.session_utils import get_session_temp_dir
 from core.error_handling import handle_error
 from core.usage_tracker import get_usage_summary
 from logger import logger
 
 
+EXPORT_LABELS = {"csv": "CSV", "jsonl.gz": "JSON Lines (gzip)"}
+EXPORT_MIME_TYPES = {"csv": "text/csv", "jsonl.gz": "application/gzip"}
+
+
+def _build_export(fmt: str, include_verification: bool, start: str, end: str) -> tuple:
+    """Stream the full history into a file in the session temp dir; returns (path, rows)."""
+    previous = st.session_state.pop("audit_export", None)
+    if previous and os.path.exists(previous["path"]):
+        os.remove(previous["path"])
+
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(get_session_temp_dir(), f"audit_export_{stamp}.{fmt}")
+    with open(path, "wb") as f:
+        rows = export_audit_events(f, fmt=fmt, include_verification=include_verification, start=start, end=end)
+    st.session_state["audit_export"] = {"path": path, "format": fmt, "rows": rows}
+    return path, rows
+
+
+def _render_full_export(start: str, end: str):
+    with st.expander("📦 Export Full Audit History"):
+        st.caption("Exports every event (including archived months) within the date filter, if one is set.")
+        fmt = st.radio(
+            "Format", AUDIT_EXPORT_FORMATS, format_func=EXPORT_LABELS.get, horizontal=True, key="audit_export_format"
+        )
+        include_verification = st.checkbox("Include chain-verification columns", key="audit_export_verify")
+        if st.button("Prepare Export"):
+            with st.spinner("Exporting audit history..."):
+                _build_export(fmt, include_verification, start, end)
+
+        export = st.session_state.get("audit_export")
+        if export and os.path.exists(export["path"]):
+            st.write(f"🔹 {export['rows']} events ready ({os.path.getsize(export['path']) / 1024:.0f} KB)")
+            with open(export["path"], "rb") as f:
+                st.download_button(
+                    label="⬇️ Download Full Export",
+                    data=f,
+                    file_name=os.path.basename(export["path"]),
+                    mime=EXPORT_MIME_TYPES[export["format"]]
+                )
+
+
 def run_ui():
     try:
         # Get tenant and branding info
@@ -26,8 +75,24 @@ def run_ui():
         else:
             user_id_filter = st.text_input("🔎 Filter by User ID (optional)")
 
+        search_text = st.text_input(
+            "🔍 Search events (file names, case IDs, template names…)",
+            help="Every word must match; words match as prefixes."
+        )
         action_filter = st.text_input("🔎 Filter by Action (optional)")
-        limit = st.slider("Results Limit", min_value=10, max_value=200, value=50, step=10)
+        limit = st.slider("Results per page", min_value=10, max_value=200, value=50, step=10)
+
+        start, end = None, None
+        if st.checkbox("📅 Filter by date range"):
+            today = datetime.date.today()
+            date_range = st.date_input(
+                "Date range (UTC)",
+                value=(today - datetime.timedelta(days=30), today)
+            )
+            if isinstance(date_range, (tuple, list)) and len(date_range) == 2:
+                start = date_range[0].isoformat()
+                # End date is inclusive in the UI, exclusive in the query
+                end = (date_range[1] + datetime.timedelta(days=1)).isoformat()
 
         # Metrics section
         with st.expander("📊 Audit Log Metrics"):
@@ -40,21 +105,78 @@ def run_ui():
                 logger.warning(f"[AUDIT_UI] Failed to load audit metrics: {metric_err}")
                 st.write("⚠️ Unable to load audit metrics.")
 
-        # Load audit logs - remove tenant_id arg if fetch_audit_events doesn't support it
+        user_id_filter = user_id_filter.strip() if isinstance(user_id_filter, str) else user_id_filter
+        action_filter = action_filter.strip() or None
+
+        # Keyset pagination: a stack of (timestamp, id) cursors, one per page already visited.
+        # Any filter change starts again from the newest page.
+        search_text = search_text.strip()
+        filter_key = (tenant_id, search_text, user_id_filter, action_filter, limit, start, end)
+        if st.session_state.get("audit_page_filters") != filter_key:
+            st.session_state["audit_page_filters"] = filter_key
+            st.session_state["audit_page_cursors"] = []
+        cursors = st.session_state["audit_page_cursors"]
+        before_timestamp, before_id = cursors[-1] if cursors else (None, None)
+
         with st.spinner("Loading audit logs..."):
-            logs = fetch_audit_events(
-                user_id=user_id_filter.strip() if isinstance(user_id_filter, str) else user_id_filter,
-                action=action_filter.strip() or None,
-                limit=limit
-            )
+            # One extra row tells us whether an older page exists
+            if search_text:
+                logs = search_audit_events(
+                    search_text,
+                    user_id=user_id_filter,
+                    action=action_filter,
+                    limit=limit + 1,
+                    before_id=before_id,
+                    start=start,
+                    end=end
+                )
+            else:
+                logs = fetch_audit_events(
+                    user_id=user_id_filter,
+                    action=action_filter,
+                    limit=limit + 1,
+                    before_timestamp=before_timestamp,
+                    before_id=before_id,
+                    start=start,
+                    end=end
+                )
 
         # Enforce tenant-level isolation here (in case the fetch function doesn't filter by tenant)
         if logs:
             logs = [log for log in logs if log.get("tenant_id") == tenant_id]
+        has_older = len(logs or []) > limit
+        logs = (logs or [])[:limit]
+
+        nav_newer, nav_page, nav_older = st.columns([1, 2, 1])
+        with nav_newer:
+            if st.button("⬅️ Newer", disabled=not cursors):
+                cursors.pop()
+                st.rerun()
+        with nav_page:
+            st.caption(f"Page {len(cursors) + 1}")
+        with nav_older:
+            if st.button("Older ➡️", disabled=not has_older):
+                cursors.append((logs[-1]["timestamp"], logs[-1]["id"]))
+                st.rerun()
+
+        # Chain integrity (verified in the background, not on page load)
+        watermark = get_audit_watermark()
+        if watermark["broken_at_id"] is not None:
+            st.error(
+                f"🚨 Audit chain integrity check failed at event #{watermark['broken_at_id']}. "
+                "Events from that point on may have been altered or removed."
+            )
+        elif watermark["verified_through_id"]:
+            st.caption(
+                f"🔒 Hash chain verified through event #{watermark['verified_through_id']} "
+                f"(checked {watermark['verified_at']} UTC). Newer events are verified shortly."
+            )
+        else:
+            st.caption("🔒 Hash chain verification is pending.")
 
         # Display results
         if logs:
-            st.success(f"✅ Found {len(logs)} audit events")
+            st.success(f"✅ Showing {len(logs)} audit events")
             st.dataframe(logs, use_container_width=True)
 
             export_ready = []
@@ -89,6 +211,8 @@ def run_ui():
         else:
             st.info("No audit events match your filter.")
 
+        _render_full_export(start, end)
+
     except Exception as e:
         # Log and show user-friendly error
         logger.exception(f"[AUDIT_UI] Unexpected error: {e}")
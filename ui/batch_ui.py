@@ -9,13 +9,16 @@ from io import BytesIO
 from utils.docx_utils import replace_text_in_docx_all
 from core.session_utils import get_session_temp_dir
 from utils.file_utils import clean_temp_dir
-from core.security import sanitize_text, redact_log, mask_phi
+from core.security import sanitize_text, sanitize_frame, redact_log, mask_phi
 from utils.file_utils import sanitize_filename
+from utils.excel_utils import read_excel_columns
 from core.error_handling import handle_error
 from logger import logger
 from core.audit import log_audit_event
 from core.auth import get_tenant_id
 from core.cache_utils import clear_caches
+from core.constants import DROPBOX_BATCH_OUTPUT_DIR
+from services.dropbox_client import upload_files_to_dropbox
 
 
 clean_temp_dir()
@@ -37,7 +40,7 @@ def run_ui():
             uploaded_excel = st.file_uploader("📊 Upload Excel Sheet (.xlsx)", type=["xlsx"])
             if uploaded_excel:
                 try:
-                    df = pd.read_excel(uploaded_excel)
+                    df = read_excel_columns(uploaded_excel)
                     if df.empty:
                         st.error("❌ Spreadsheet is empty.")
                         df = None
@@ -186,20 +189,29 @@ def run_ui():
                     st.warning("⚠️ No templates found matching your search.")
 
             if selected_templates and template_mode != "Template Options":
+                push_to_dropbox = st.checkbox("☁️ Also save generated documents to Dropbox")
+                dropbox_folder = st.text_input(
+                    "Dropbox destination folder",
+                    value=f"{DROPBOX_BATCH_OUTPUT_DIR}/{datetime.utcnow().strftime('%Y%m%d_%H%M')}",
+                    disabled=not push_to_dropbox
+                )
+
                 if st.button("⚙️ Generate Documents"):
                     with st.spinner("Generating documents..."):
                         try:
                             temp_dir = get_session_temp_dir()
                             zip_buffer = BytesIO()
                             total_success, total_fail = 0, 0
+                            dropbox_outputs = {}
+
+                            # Sanitize once per column (repeated values are cleaned once), not per cell.
+                            clean_df = sanitize_frame(df, na_value="")
+                            keys = [str(k).strip() for k in clean_df.columns]
 
                             with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_out:
-                                for i, row in df.iterrows():
+                                for i, values in zip(clean_df.index, clean_df.itertuples(index=False, name=None)):
                                     try:
-                                        replacements = {
-                                            str(k).strip(): sanitize_text(str(v)) if pd.notnull(v) else ""
-                                            for k, v in row.items()
-                                        }
+                                        replacements = dict(zip(keys, values))
                                         replacements["index"] = str(i + 1)
 
                                         folder_name = folder_pattern
@@ -218,7 +230,10 @@ def run_ui():
 
                                             zip_entry_path = os.path.join(folder_name, output_filename)
                                             with open(output_path, "rb") as f:
-                                                zip_out.writestr(zip_entry_path, f.read())
+                                                doc_bytes = f.read()
+                                            zip_out.writestr(zip_entry_path, doc_bytes)
+                                            if push_to_dropbox:
+                                                dropbox_outputs[f"{dropbox_folder.rstrip('/')}/{zip_entry_path}"] = doc_bytes
 
                                             total_success += 1
                                     except Exception as doc_err:
@@ -235,6 +250,20 @@ def run_ui():
                                 )
 
                                 st.caption("⚠️ Files will be deleted after 1 hour. Please download promptly.")
+
+                                if dropbox_outputs:
+                                    try:
+                                        with st.spinner("☁️ Uploading documents to Dropbox..."):
+                                            uploaded = upload_files_to_dropbox(dropbox_outputs)
+                                        st.success(f"☁️ Saved {len(uploaded)} documents to {dropbox_folder}")
+                                        log_audit_event("Batch Docs Uploaded", {
+                                            "document_count": len(uploaded),
+                                            "folder": dropbox_folder,
+                                            "tenant_id": TENANT_ID,
+                                            "module": "batch_generator"
+                                        })
+                                    except Exception as upload_err:
+                                        st.error(handle_error(upload_err, code="BATCH_UI_004"))
                                 log_audit_event("Batch Docs Generated", {
                                     "rows_processed": len(df),
                                     "template_count": len(template_paths),
@@ -2,8 +2,17 @@ import streamlit as st
 import pandas as pd
 import html  
 import plotly.express as px
-from services.dropbox_client import DropboxClient
-from core.security import sanitize_text, redact_log, mask_phi
+from services.dropbox_client import download_dashboard_df
+from services.dashboard_service import (
+    CAMPAIGN_COL,
+    NAME_COL,
+    REFERRAL_COL,
+    STATUS_COL,
+    DASHBOARD_PAGE_SIZE,
+    empty_query,
+    get_dashboard_model,
+)
+from core.security import sanitize_text, sanitize_frame, redact_log, mask_phi
 from utils.file_utils import clean_temp_dir
 from core.error_handling import handle_error
 from logger import logger
@@ -11,10 +20,12 @@ import time
 
 clean_temp_dir()
 
-@st.cache_data(ttl=300)
+CHANGED_ROW_STYLE = "background-color: #fff3cd"
+
 def load_dashboard_data():
-    client = DropboxClient()
-    return client.download_dashboard_df()
+    # The parsed sheet is cached per Dropbox revision and shared across sessions;
+    # the dashboard model copies it once per revision before deriving columns.
+    return download_dashboard_df()
 
 def run_ui():
     st.title("📊 Litigation Dashboard")
@@ -37,90 +48,66 @@ def run_ui():
         return
 
     try:
-        df.columns = df.columns.str.strip()
-        CAMPAIGN_COL = "Case Type"
-        STATUS_COL = "Class Code Title"
-        REFERRAL_COL = "Referred By Name (Full - Last, First)"
-        NAME_COL = "Case Details First Party Name (First, Last)"
-
-        required_cols = [
-            NAME_COL,
-            "Case Details First Party Name (Full - Last, First)",
-            "Case Details First Party Details Default Phone Number",
-            "Case Details First Party Details Default Email Account Address",
-            "Date Opened"
-        ]
-        for col in required_cols:
-            if col not in df.columns:
-                df[col] = ""
+        model = get_dashboard_model(df)
+
+        # "Changed since last view": cases inserted/updated in revisions this session has not seen yet.
+        view = st.session_state.get("dashboard_view")
+        if view is None:
+            view = {"generation": model.generation, "baseline": model.generation}
+        elif view["generation"] != model.generation:
+            view = {"generation": model.generation, "baseline": view["generation"]}
+        st.session_state.dashboard_view = view
+        changed = model.changed_since(view["baseline"])
+        if changed.any():
+            st.info(f"🆕 {int(changed.sum())} cases changed since your last view (highlighted in the table).")
 
         # Campaign selector
         st.markdown("### 🎯 Select Campaign")
-        campaign_list = sorted(df[CAMPAIGN_COL].dropna().unique())
-        selected_campaign = st.selectbox("Campaign", ["(All Campaigns)"] + campaign_list)
-        if selected_campaign != "(All Campaigns)":
-            df = df[df[CAMPAIGN_COL] == selected_campaign]
+        selected_campaign = st.selectbox("Campaign", ["(All Campaigns)"] + model.campaigns)
+        campaign = None if selected_campaign == "(All Campaigns)" else selected_campaign
+        positions = model.campaign_positions(campaign)
 
         # Flagged cases section for selected campaign
-        flagged_cases_for_campaign = df[df[STATUS_COL].astype(str).str.contains("FLAGGED", case=False, na=False)]
-        if not flagged_cases_for_campaign.empty:
+        flagged_positions = model.flagged_positions(positions)
+        if len(flagged_positions):
             st.markdown("### 🚩 Flagged Cases for Selected Campaign")
-            st.dataframe(flagged_cases_for_campaign[[NAME_COL, STATUS_COL]].reset_index(drop=True), use_container_width=True)
+            st.dataframe(model.rows(flagged_positions)[[NAME_COL, STATUS_COL]].reset_index(drop=True), use_container_width=True)
 
-        # Smart case categories
-        flagged_cases = df[df[STATUS_COL].astype(str).str.contains("FLAGGED", case=False, na=False)]
-        litigation_cases = df[df[STATUS_COL].astype(str).str.contains("LITIGATION", case=False, na=False)]
-
-        # KPIs
+        # KPIs (precomputed per campaign)
+        kpis = model.kpis(campaign)
         st.markdown("### 📊 Key Metrics")
-        st.metric("📁 Total Cases", len(df))
-        st.metric("✅ Questionnaire Received", df[STATUS_COL].eq("Questionnaire Received").sum())
-        st.metric("🚩 Flagged Cases", len(flagged_cases))
-        st.metric("⚖️ Litigation Cases", len(litigation_cases))
+        st.metric("📁 Total Cases", kpis["total"])
+        st.metric("✅ Questionnaire Received", kpis["questionnaire"])
+        st.metric("🚩 Flagged Cases", kpis["flagged"])
+        st.metric("⚖️ Litigation Cases", kpis["litigation"])
 
         # Cumulative trendline
         st.markdown("### 📈 Cumulative Cases Over Time")
-        df_sorted = df.sort_values("Date Opened").dropna(subset=["Date Opened"])
-        df_sorted["Cumulative"] = range(1, len(df_sorted) + 1)
-        st.plotly_chart(px.line(df_sorted, x="Date Opened", y="Cumulative", markers=True), use_container_width=True)
-
-        # Contact health score
-        def contact_score(row):
-            phone = row.get("Case Details First Party Details Default Phone Number", "")
-            email = row.get("Case Details First Party Details Default Email Account Address", "")
-            if phone and email:
-                return "✅ Full"
-            elif phone or email:
-                return "⚠️ Partial"
-            return "❌ Missing"
-        df["Contact Health"] = df.apply(contact_score, axis=1)
+        st.plotly_chart(px.line(model.cumulative(campaign), x="Date Opened", y="Cumulative", markers=True), use_container_width=True)
 
         # Sidebar filters
         st.sidebar.header("🔍 Base Filters")
-        campaign_filter = st.sidebar.multiselect("📁 Campaign", sorted(df[CAMPAIGN_COL].dropna().unique()))
-        referring_filter = st.sidebar.multiselect("👤 Referring Attorney", sorted(df[REFERRAL_COL].dropna().unique()))
-        status_filter = st.sidebar.multiselect("📌 Case Status", sorted(df[STATUS_COL].dropna().unique()))
-
-        filtered_df = df.copy()
-        if campaign_filter:
-            filtered_df = filtered_df[filtered_df[CAMPAIGN_COL].isin(campaign_filter)]
-        if referring_filter:
-            filtered_df = filtered_df[filtered_df[REFERRAL_COL].isin(referring_filter)]
-        if status_filter:
-            filtered_df = filtered_df[filtered_df[STATUS_COL].isin(status_filter)]
+        campaign_filter = st.sidebar.multiselect("📁 Campaign", model.options(CAMPAIGN_COL, positions))
+        referring_filter = st.sidebar.multiselect("👤 Referring Attorney", model.options(REFERRAL_COL, positions))
+        status_filter = st.sidebar.multiselect("📌 Case Status", model.options(STATUS_COL, positions))
+
+        base_filters = {CAMPAIGN_COL: campaign_filter, REFERRAL_COL: referring_filter, STATUS_COL: status_filter}
+        filtered_positions = model.filter_positions(positions, base_filters)
 
         # Charts for filtered view
         st.subheader("📌 Case Status Overview")
-        if STATUS_COL in filtered_df.columns:
-            status_counts = filtered_df[STATUS_COL].value_counts().reset_index()
-            status_counts.columns = ["Case Status", "Count"]
-            st.plotly_chart(px.bar(status_counts, x="Case Status", y="Count", text="Count"), use_container_width=True)
+        status_counts = model.value_counts(STATUS_COL, filtered_positions)
+        status_counts.columns = ["Case Status", "Count"]
+        st.plotly_chart(px.bar(status_counts, x="Case Status", y="Count", text="Count"), use_container_width=True)
 
         st.subheader("👤 Referring Attorney Overview")
-        if REFERRAL_COL in filtered_df.columns:
-            referral_counts = filtered_df[REFERRAL_COL].value_counts().reset_index()
-            referral_counts.columns = ["Referring Attorney", "Count"]
-            st.plotly_chart(px.bar(referral_counts, x="Referring Attorney", y="Count", text="Count"), use_container_width=True)
+        referral_counts = model.value_counts(REFERRAL_COL, filtered_positions)
+        referral_counts.columns = ["Referring Attorney", "Count"]
+        st.plotly_chart(px.bar(referral_counts, x="Referring Attorney", y="Count", text="Count"), use_container_width=True)
+
+        query = empty_query(campaign)
+        query["filters"] = base_filters
+        engine = model.query_engine()
 
         # Optional columns
         st.subheader("➕ Add Optional Columns")
@@ -129,7 +116,7 @@ def run_ui():
 
         with st.expander("Show/Filter Additional Columns"):
             candidate_cols = [
-                col for col in df.columns
+                col for col in model.df.columns
                 if col not in [CAMPAIGN_COL, STATUS_COL, REFERRAL_COL]
                 and col not in [
                     "Date Opened",
@@ -143,22 +130,21 @@ def run_ui():
             for col in selected_display_cols:
                 optional_display_cols.append(col)
                 try:
-                    if 1 < df[col].nunique() < 50:
-                        vals = df[col].dropna().astype(str).unique().tolist()
-                        selected_vals = st.multiselect(f"Filter values for {col}", sorted(vals), key=col)
+                    vals = engine.distinct(col, campaign)
+                    if 1 < len(vals) < 50:
+                        selected_vals = st.multiselect(f"Filter values for {col}", vals, key=col)
                         if selected_vals:
-                            filtered_df = filtered_df[filtered_df[col].astype(str).isin(selected_vals)]
+                            query["values"][col] = selected_vals
                             optional_filtered_cols.append(col)
                     else:
                         search_term = st.text_input(f"Search for value in {col} (contains)", key=f"{col}_search")
                         if search_term:
-                            filtered_df = filtered_df[filtered_df[col].astype(str).str.contains(search_term, case=False, na=False)]
+                            query["contains"][col] = search_term
                             optional_filtered_cols.append(col)
                 except Exception as e:
                     logger.warning(redact_log(mask_phi(f"⚠️ Could not filter column {col}: {e}")))
 
-        # Case table
-        st.subheader(f"📋 Case Table ({len(filtered_df)} records)")
+        # Case table: filtered and paged by the query engine, only the visible page is materialized
         base_display_cols = [
             "Case Type",
             "Class Code Title",
@@ -170,12 +156,28 @@ def run_ui():
             "Case Details First Party Details Default Email Account Address",
             "Contact Health"
         ]
-        all_display_cols = [col for col in base_display_cols if col in filtered_df.columns] + optional_display_cols
-        clean_df = filtered_df[all_display_cols].copy()
-        for col in clean_df.columns:
-            clean_df[col] = clean_df[col].apply(lambda x: html.unescape(sanitize_text(str(x))))
-
-        st.dataframe(clean_df.reset_index(drop=True), use_container_width=True)
+        all_display_cols = [col for col in base_display_cols if col in model.df.columns] + optional_display_cols
+
+        page_number = st.session_state.get("dashboard_page", 1)
+        page_df, total = engine.page(query, all_display_cols, page_number - 1, DASHBOARD_PAGE_SIZE)
+        page_count = max(1, -(-total // DASHBOARD_PAGE_SIZE))
+        if page_number > page_count:
+            # The filters shrank the result below the current page.
+            page_number = st.session_state["dashboard_page"] = page_count
+            page_df, total = engine.page(query, all_display_cols, page_number - 1, DASHBOARD_PAGE_SIZE)
+
+        st.subheader(f"📋 Case Table ({total} records)")
+        table = sanitize_frame(page_df, unescape=True).reset_index(drop=True)
+        page_changed = changed[page_df.index.to_numpy()]
+        if page_changed.any():
+            table = table.style.apply(
+                lambda row: [CHANGED_ROW_STYLE if page_changed[row.name] else ""] * len(row), axis=1
+            )
+        st.dataframe(table, use_container_width=True)
+        st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, key="dashboard_page")
+
+        def filtered_results():
+            return model.rows(engine.positions(query))[all_display_cols].copy()
 
         # Filter preset buttons
         st.markdown("### 🧷 Filter Presets")
@@ -191,19 +193,26 @@ def run_ui():
                 st.success(f"Loaded preset for campaign: {selected_campaign}")
 
         if st.button("📤 Send to Batch Generator"):
-            st.session_state.dashboard_df = filtered_df[all_display_cols].copy()
+            st.session_state.dashboard_df = filtered_results()
             st.success("✅ Data sent! Go to the '📄 Batch Doc Generator' to merge.")
 
         if st.button("📧 Send to Email Tool"):
-            st.session_state.dashboard_df = filtered_df[all_display_cols].copy()
+            st.session_state.dashboard_df = filtered_results()
             st.success("✅ Filtered clients sent! Go to the '📧 Welcome Email Sender' to continue.")
 
-        st.download_button(
-            label="⬇️ Download Filtered Results as CSV",
-            data=filtered_df[all_display_cols].to_csv(index=False).encode("utf-8"),
-            file_name="filtered_dashboard.csv",
-            mime="text/csv"
-        )
+        # The full export is materialized on request and kept until the query changes.
+        export_key = (model.revision, engine.name, repr(query), tuple(all_display_cols))
+        if st.session_state.get("dashboard_export_key") != export_key:
+            if st.button("🗂️ Prepare CSV Export"):
+                st.session_state.dashboard_export_csv = filtered_results().to_csv(index=False).encode("utf-8")
+                st.session_state.dashboard_export_key = export_key
+        if st.session_state.get("dashboard_export_key") == export_key:
+            st.download_button(
+                label="⬇️ Download Filtered Results as CSV",
+                data=st.session_state.dashboard_export_csv,
+                file_name="filtered_dashboard.csv",
+                mime="text/csv"
+            )
 
 
     except Exception as e:
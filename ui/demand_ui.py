@@ -15,7 +15,7 @@ from core.usage_tracker import log_usage, check_quota, decrement_quota
 from core.auth import get_user_id, get_tenant_id
 from core.audit import log_audit_event
 from logger import logger
-from core.cache_utils import clear_caches
+from core.cache_utils import clear_caches, content_key, get_cache, set_cache
 from core.error_handling import handle_error
 from utils.file_utils import clean_temp_dir
 from utils.thread_utils import run_async  # To safely handle async tasks
@@ -148,10 +148,6 @@ def run_ui():
         damages = st.text_area("Damages Summary")
         submitted = st.form_submit_button("⚙️ Generate Demand Letter")
 
-    # Demand cache
-    if "demand_cache" not in st.session_state:
-        st.session_state.demand_cache = {}
-
     if submitted:
         errors = []
         if not client_name.strip():
@@ -181,15 +177,20 @@ def run_ui():
             defendant = sanitize_text(defendant)
             location = sanitize_text(location)
 
-            example_hash = hashlib.md5(example_text.encode()).hexdigest() if example_text else "noexample"
-            fingerprint = "|".join([
-                tenant_id, user_id, full_name, formatted_date,
-                summary, damages, example_hash, selected_template
-            ])
-            form_key = hashlib.md5(fingerprint.encode()).hexdigest()
+            # Not keyed by user: colleagues on the same case share the letters (the cache is tenant-scoped).
+            form_key = content_key("demand", {
+                "client_name": full_name,
+                "defendant": defendant,
+                "location": location,
+                "incident_date": formatted_date,
+                "summary": summary,
+                "damages": damages,
+                "template": selected_template,
+                "example": hashlib.sha256(example_text.encode()).hexdigest() if example_text else None,
+            })
 
-            if form_key in st.session_state.demand_cache:
-                paths = st.session_state.demand_cache[form_key]
+            letters = get_cache(form_key)
+            if letters:
                 st.info("🔄 Using previously generated demand letter from cache.")
             else:
                 with st.spinner("🧠 Generating demand letter..."):
@@ -218,8 +219,16 @@ def run_ui():
                         example_text=example_text
                     )
 
-                    st.session_state.demand_cache[form_key] = paths
-                    time.sleep(1)
+                    # Cache the documents themselves: temp files do not outlive this session.
+                    try:
+                        letters = {
+                            kind: (os.path.basename(paths[kind]), load_with_retry(paths[kind]))
+                            for kind in ("unpolished", "polished")
+                        }
+                    except FileNotFoundError as e:
+                        st.error(f"❌ Demand letters could not be located: {e}")
+                        return
+                    set_cache(form_key, letters)
 
                     try:
                         log_usage(
@@ -233,20 +242,10 @@ def run_ui():
             decrement_quota("demand_letters", amount=1)
             st.success("✅ Demand letters generated!")
 
-            unpolished_path = paths["unpolished"]
-            polished_path = paths["polished"]
-
-            try:
-                unpolished_data = load_with_retry(unpolished_path)
-                polished_data = load_with_retry(polished_path)
-            except FileNotFoundError as e:
-                st.error(f"❌ Demand letters could not be located: {e}")
-                return
-
             zip_buffer = BytesIO()
             with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-                zipf.writestr(os.path.basename(unpolished_path), unpolished_data)
-                zipf.writestr(os.path.basename(polished_path), polished_data)
+                for name, data in letters.values():
+                    zipf.writestr(name, data)
             zip_buffer.seek(0)
 
             st.download_button(
@@ -4,8 +4,9 @@ import os
 import asyncio
 from datetime import datetime
 
-from services.email_service import build_email, send_email_and_update
+from services.email_service import build_email, send_email_and_update, sanitize_merge_fields
 from services.dropbox_client import download_dashboard_df, download_template_file
+from utils.excel_utils import read_excel_header, read_excel_columns
 from core.security import redact_log, mask_phi
 from core.usage_tracker import log_usage, check_quota_and_decrement, get_usage_summary
 from core.auth import get_user_id, get_tenant_id, get_tenant_branding
@@ -28,12 +29,21 @@ def run_ui():
     branding = get_tenant_branding(tenant_id)
     st.header(f"📧 Welcome Email Sender – {branding.get('firm_name', tenant_id)}")
 
+    essential_columns = [
+        "Case Details First Party Name (First, Last)",
+        "Case Details First Party Details Default Email Account Address",
+        "Case Number",
+        "Referred By Name (Full - Last, First)",
+        "CaseID",
+        "Status",
+        "Class Code Title"
+    ]
+
     uploaded_excel = st.file_uploader("📂 Upload Excel with Client Data (Optional)", type=["xlsx"])
     if uploaded_excel:
         try:
-            df = pd.read_excel(uploaded_excel)
-            st.session_state.dashboard_df = df.copy()
-            st.success("✅ Excel uploaded successfully. Using uploaded data.")
+            # Only the header is parsed here; rows are read for the chosen columns below.
+            all_columns = read_excel_header(uploaded_excel)
         except Exception as e:
             st.error(f"❌ Failed to read Excel: {e}")
             return
@@ -44,28 +54,29 @@ def run_ui():
                     st.session_state.dashboard_df = download_dashboard_df().copy()
                     st.success("✅ Loaded dashboard data from Dropbox.")
             df = st.session_state.dashboard_df.copy()
+            all_columns = list(df.columns)
         except Exception as e:
             msg = handle_error(e, code="EMAIL_UI_001")
             st.error(msg)
             return
 
     st.markdown("### 📂 Choose Columns to Keep (Optional)")
-    all_columns = list(df.columns)
-    essential_columns = [
-        "Case Details First Party Name (First, Last)",
-        "Case Details First Party Details Default Email Account Address",
-        "Case Number",
-        "Referred By Name (Full - Last, First)",
-        "CaseID",
-        "Status",
-        "Class Code Title"
-    ]
     selected_columns = st.multiselect(
         "Select which columns to keep for email building:",
         options=all_columns,
         default=[col for col in essential_columns if col in all_columns]
     )
-    df = df[selected_columns]
+
+    if uploaded_excel:
+        try:
+            df = read_excel_columns(uploaded_excel, columns=selected_columns)
+            st.session_state.dashboard_df = df.copy()
+            st.success("✅ Excel uploaded successfully. Using uploaded data.")
+        except Exception as e:
+            st.error(f"❌ Failed to read Excel: {e}")
+            return
+    else:
+        df = df[selected_columns]
 
     NAME_COLUMN = next((col for col in NAME_COLUMN_OPTIONS if col in df.columns), None)
 
@@ -148,9 +159,10 @@ def run_ui():
         st.session_state.email_previews = []
         st.session_state.email_status = {}
 
-        for i, (_, row) in enumerate(
-            filtered_df[filtered_df[NAME_COLUMN].isin(selected_clients)].iterrows()
-        ):
+        selected_df = filtered_df[filtered_df[NAME_COLUMN].isin(selected_clients)]
+        merge_fields = sanitize_merge_fields(selected_df)
+
+        for i, (_, row) in enumerate(selected_df.iterrows()):
             try:
                 row_data = row.to_dict()
                 row_data["Client Name"] = row_data.get(NAME_COLUMN, "")
@@ -162,7 +174,7 @@ def run_ui():
 
                 # Build email synchronously by calling asyncio.run once here:
                 subject, body, cc, sanitized, _, recipient_email = asyncio.run(
-                    build_email(row_data, template_path, attachments)
+                    build_email(row_data, template_path, attachments, sanitized=merge_fields.iloc[i].to_dict())
                 )
 
                 combined_cc = list(filter(None, cc + global_cc))
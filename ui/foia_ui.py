@@ -5,7 +5,7 @@ from datetime import datetime
 import asyncio
 
 from core.session_utils import get_session_temp_dir
-from core.security import sanitize_text, sanitize_filename, redact_log, mask_phi
+from core.security import sanitize_text, sanitize_filename, redact_log, mask_phi, Redacted
 from services.foia_service import generate_foia_request
 from core.usage_tracker import log_usage, check_quota, decrement_quota
 from core.auth import get_user_id, get_tenant_id, get_user_role
@@ -13,7 +13,7 @@ from core.audit import log_audit_event
 from logger import logger
 from utils.file_utils import clean_temp_dir
 from core.foia_constants import STATE_CITATIONS, STATE_RESPONSE_TIMES
-from core.cache_utils import clear_caches
+from core.cache_utils import clear_caches, content_key, get_cache, set_cache
 from core.error_handling import handle_error
 from services.dropbox_client import DropboxClient
 from core.constants import DROPBOX_TEMPLATES_ROOT
@@ -140,8 +140,6 @@ def run_ui():
 
         # ==================== FOIA GENERATION ==================== #
         if submitted:
-            clear_caches()
-
             if not TEMPLATE_FOIA:
                 st.error("❌ You must select or upload a FOIA template before generating letters.")
                 return
@@ -188,23 +186,18 @@ def run_ui():
                     "state_response_time": STATE_RESPONSE_TIMES.get(state, ""),
                 }
 
-                logger.debug(mask_phi(f"🧾 FOIA form data payload: {data}"))
-
-                fingerprint = "|".join([
-                    data["client_id"],
-                    data["recipient_abbrev"],
-                    data["recipient_name"],
-                    data["synopsis"],
-                    example_text.strip()[:100]
-                ])
-                form_key = f"{tenant_id}|{user_id}|" + hashlib.md5(fingerprint.encode()).hexdigest()
+                logger.debug(Redacted("🧾 FOIA form data payload: %s", data))
 
-                if "foia_cache" not in st.session_state:
-                    st.session_state.foia_cache = {}
+                # Shared by the tenant's sessions, so colleagues reuse the same letter.
+                form_key = content_key("foia", {
+                    "data": data,
+                    "template": selected_template,
+                    "example": hashlib.sha256(example_text.encode()).hexdigest() if example_text else None,
+                })
 
-                if form_key in st.session_state.foia_cache:
-                    file_path, metadata = st.session_state.foia_cache[form_key]
-                    bullet_list = metadata.get("bullet_list", [])
+                cached = get_cache(form_key)
+                if cached:
+                    output_filename, docx_bytes, bullet_list = cached
                 else:
                     with st.spinner("📄 Generating FOIA letter..."):
                         check_quota("foia_letters", amount=1)
@@ -224,11 +217,11 @@ def run_ui():
                         )
 
                         decrement_quota("foia_letters", amount=1)
-                        st.session_state.foia_cache[form_key] = (file_path, {"bullet_list": bullet_list})
+                        with open(file_path, "rb") as f:
+                            docx_bytes = f.read()
+                        set_cache(form_key, (output_filename, docx_bytes, bullet_list))
 
                 st.success("✅ FOIA letter generated!")
-                with open(file_path, "rb") as f:
-                    docx_bytes = f.read()
 
                 st.subheader("📋 FOIA Request Bullet Points (Plain Text)")
                 st.text_area(
@@ -240,7 +233,7 @@ def run_ui():
                 st.download_button(
                     label="⬇️ Download Letter (.docx)",
                     data=docx_bytes,
-                    file_name=os.path.basename(file_path),
+                    file_name=output_filename,
                     mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
                 )
 
@@ -6,7 +6,7 @@ from datetime import datetime
 from utils.file_utils import clean_temp_dir, get_session_temp_dir, sanitize_filename
 from io import BytesIO
 from core.security import sanitize_text, redact_log, mask_phi
-from core.cache_utils import clear_caches
+from core.cache_utils import clear_caches, get_cache, set_cache
 from core.audit import log_audit_event
 from core.auth import get_tenant_id, get_user_id
 from core.error_handling import handle_error
@@ -141,9 +141,6 @@ def run_ui():
             action = st.radio("Choose Action", ["🔍 Preview Party Paragraphs", "📂 Generate Memo"])
             submitted = st.form_submit_button("⚙️ Run")
 
-        if "memo_cache" not in st.session_state:
-            st.session_state.memo_cache = {}
-
         if not submitted:
             return
 
@@ -175,16 +172,19 @@ def run_ui():
             return
 
         # === GENERATE MEMO ===
+        # Not keyed by user: colleagues on the same case reuse each other's memo (the cache is tenant-scoped).
         input_fingerprint = "|".join([
-            tenant_id, user_id, court, case_number, complaint_narrative, party_info,
+            court, case_number, complaint_narrative, party_info,
             settlement_summary, medical_summary, future_medical_bills, raw_depo,
             ",".join(plaintiffs), ",".join(defendants), ",".join(quote_categories),
             example_text, template_path or ""
         ])
-        form_key = hashlib.md5(input_fingerprint.encode()).hexdigest()
+        form_key = "memo::" + hashlib.sha256(input_fingerprint.encode()).hexdigest()
 
-        if form_key in st.session_state.memo_cache:
-            memo_bytes, memo_data, raw_quotes = st.session_state.memo_cache[form_key]
+        cached = get_cache(form_key)
+        if cached:
+            # Shared entry: hand this session its own buffer and field dict to edit.
+            memo_bytes, memo_data, raw_quotes = BytesIO(cached[0]), dict(cached[1]), cached[2]
         else:
             with st.spinner("🔄 Processing..."):
                 try:
@@ -220,7 +220,8 @@ def run_ui():
                     temp_dir = get_session_temp_dir()
                     memo_bytes, memo_data = generate_memo_from_fields(data, template_path)
 
-                    st.session_state.memo_cache[form_key] = (memo_bytes, memo_data, raw_quotes)
+                    set_cache(form_key, (memo_bytes, dict(memo_data), raw_quotes))
+                    memo_bytes = BytesIO(memo_bytes)
 
                     st.session_state.party_edits = {}
                     decrement_quota("memo_generation", amount=1)
@@ -9,7 +9,14 @@ from core.audit import log_audit_event
 from core.cache_utils import clear_caches
 from core.error_handling import handle_error
 from logger import logger
-from core.db import get_templates, get_examples
+from core.db import (
+    get_templates,
+    get_examples,
+    delete_templates,
+    move_templates,
+    delete_examples,
+    move_examples,
+)
 from utils.docx_utils import replace_text_in_docx_all
 from services.dropbox_client import DropboxClient
 from core.constants import (
@@ -76,6 +83,116 @@ def normalize_filename(name: str, category: str) -> str:
     return name
 
 
+def _load_listing(listing_key: str, loader, refresh: bool = False) -> list:
+    """
+    Return the cached file listing for a folder, listing Dropbox only on first use or refresh.
+    Changes made from this page patch the cached list in place instead of re-listing.
+    """
+    if refresh or listing_key not in st.session_state:
+        st.session_state[listing_key] = loader()
+    return st.session_state[listing_key]
+
+
+def _patch_listing(listing_key: str, removed: list = (), added: list = ()):
+    """
+    Drop `removed` names from a cached listing and append `added` entries ({"name", "path"}).
+    """
+    if listing_key not in st.session_state:
+        return
+    removed = set(removed)
+    listing = [item for item in st.session_state[listing_key] if item.get("name") not in removed]
+    st.session_state[listing_key] = listing + list(added)
+
+
+def _render_bulk_actions(
+    items: list,
+    category: str,
+    folder_map: dict,
+    move_targets: dict,
+    listing_prefix: str,
+    normalize_as,
+    delete_fn,
+    move_fn,
+    audit_label: str,
+    error_code: str,
+):
+    """
+    Multi-select delete / move / find-and-replace rename backed by Dropbox batch jobs.
+    """
+    with st.expander("🧰 Bulk Actions"):
+        selected = st.multiselect(
+            "Select files", [item.get("name", "") for item in items], key=f"{listing_prefix}_bulk_select"
+        )
+        actions = ["🗑️ Delete", "✏️ Rename (find & replace)"]
+        if move_targets:
+            actions.insert(1, "📦 Move to category")
+        action = st.radio("Action", actions, horizontal=True, key=f"{listing_prefix}_bulk_action")
+
+        target_category = None
+        find_text = replace_text = ""
+        if action == "📦 Move to category":
+            target_label = st.selectbox("Move to", list(move_targets.keys()), key=f"{listing_prefix}_bulk_target")
+            target_category = move_targets[target_label]
+        elif action == "✏️ Rename (find & replace)":
+            find_text = st.text_input("Find", key=f"{listing_prefix}_bulk_find")
+            replace_text = st.text_input("Replace with", key=f"{listing_prefix}_bulk_replace")
+
+        if not st.button(f"Apply to {len(selected)} selected", key=f"{listing_prefix}_bulk_apply", disabled=not selected):
+            return
+
+        try:
+            listing_key = f"{listing_prefix}_{category}"
+            if action == "🗑️ Delete":
+                outcome = delete_fn(category, selected)
+                _patch_listing(listing_key, removed=outcome["succeeded"])
+                audit_action = f"{audit_label} Bulk Deleted"
+                renames = {}
+            else:
+                if action == "📦 Move to category":
+                    renames = {name: name for name in selected}
+                else:
+                    if not find_text:
+                        st.warning("⚠️ Enter the text to find.")
+                        return
+                    renames = {
+                        name: normalize_as(name.replace(find_text, replace_text), category)
+                        for name in selected
+                        if name.replace(find_text, replace_text) != name
+                    }
+                    if not renames:
+                        st.info("No selected names contain that text.")
+                        return
+
+                outcome = move_fn(category, renames, target_category)
+                destination = target_category or category
+                moved = [
+                    {"name": renames[name], "path": f"{folder_map[destination]}/{renames[name]}"}
+                    for name in outcome["succeeded"]
+                ]
+                _patch_listing(listing_key, removed=outcome["succeeded"])
+                _patch_listing(f"{listing_prefix}_{destination}", added=moved)
+                audit_action = f"{audit_label} Bulk Moved" if target_category else f"{audit_label} Bulk Renamed"
+
+            clear_caches()
+            log_audit_event(audit_action, {
+                "category": category,
+                "target_category": target_category or category,
+                "files": outcome["succeeded"],
+                "renamed_to": [renames.get(name, name) for name in outcome["succeeded"]] if renames else [],
+                "failed": len(outcome["failed"]),
+                "module": "template_manager"
+            })
+
+            if outcome["succeeded"]:
+                st.success(f"✅ {len(outcome['succeeded'])} file(s) updated.")
+            for name, error in outcome["failed"].items():
+                st.error(f"❌ {name}: {error}")
+            if outcome["succeeded"]:
+                st.rerun()
+        except Exception as e:
+            st.error(handle_error(e, code=error_code))
+
+
 def run_ui():
     st.header("📪 Template & Style Example Manager")
 
@@ -103,6 +220,7 @@ def run_ui():
             )
             selected_category = CATEGORIES[selected_category_label]
             category_path = CATEGORY_PATH_MAP[selected_category]
+            listing_key = f"template_manager_templates_{selected_category}"
 
             st.subheader(f"📁 {selected_category_label} Templates")
 
@@ -124,6 +242,7 @@ def run_ui():
                     client.dbx.files_upload(uploaded_template.getvalue(), dropbox_path, mode=WriteMode.overwrite)
 
                     st.success(f"✅ Uploaded template: {versioned_name}")
+                    _patch_listing(listing_key, added=[{"name": versioned_name, "path": dropbox_path}])
                     clear_caches()
 
                     log_audit_event("Template Uploaded", {
@@ -156,8 +275,30 @@ def run_ui():
             st.markdown("---")
             search_filter = st.text_input("🔍 Search by name or tag").lower()
 
-            # Load template list
-            templates = get_templates(tenant_id=tenant_id, category=selected_category)
+            # Load template list (listed from Dropbox once, then patched in place)
+            refresh = st.button("🔄 Refresh List", key="refresh_templates")
+            templates = _load_listing(
+                listing_key,
+                lambda: get_templates(tenant_id=tenant_id, category=selected_category),
+                refresh=refresh
+            )
+
+            file_family = {"email"} if selected_category == "email" else set(CATEGORIES.values()) - {"email"}
+            _render_bulk_actions(
+                items=templates,
+                category=selected_category,
+                folder_map=CATEGORY_PATH_MAP,
+                move_targets={
+                    label: cat for label, cat in CATEGORIES.items()
+                    if cat in file_family and cat != selected_category
+                },
+                listing_prefix="template_manager_templates",
+                normalize_as=normalize_filename,
+                delete_fn=delete_templates,
+                move_fn=move_templates,
+                audit_label="Templates",
+                error_code="TEMPLATE_UI_012"
+            )
             matched_templates = [
                 t for t in templates
                 if search_filter in t.get("name", "").lower() or
@@ -190,6 +331,7 @@ def run_ui():
 
                                 client.dbx.files_move_v2(old_path, new_path, autorename=False)
                                 st.success(f"✅ Renamed to {clean_new_name}")
+                                _patch_listing(listing_key, removed=[name], added=[{"name": clean_new_name, "path": new_path}])
                                 clear_caches()
 
                                 log_audit_event("Template Renamed", {"from": name, "to": clean_new_name})
@@ -202,6 +344,7 @@ def run_ui():
                             try:
                                 client.dbx.files_delete_v2(f"{category_path}/{name}")
                                 st.success(f"✅ Deleted {name}")
+                                _patch_listing(listing_key, removed=[name])
                                 clear_caches()
 
                                 log_audit_event("Template Deleted", {
@@ -224,6 +367,7 @@ def run_ui():
             )
             example_category = CATEGORIES[selected_example_label]
             example_path = EXAMPLES_PATH_MAP.get(example_category)
+            example_listing_key = f"template_manager_examples_{example_category}"
 
             st.subheader(f"🖋️ {selected_example_label} Style Examples")
 
@@ -237,6 +381,7 @@ def run_ui():
                     client.dbx.files_upload(uploaded_example.getvalue(), dropbox_path, mode=WriteMode.overwrite)
 
                     st.success(f"✅ Uploaded example: {normalized_name}")
+                    _patch_listing(example_listing_key, added=[{"name": normalized_name, "path": dropbox_path}])
                     clear_caches()
 
                     log_audit_event("Style Example Uploaded", {
@@ -251,8 +396,29 @@ def run_ui():
             st.markdown("---")
             search_filter = st.text_input("🔍 Search by name").lower()
 
-            # Load style examples list from Dropbox
-            examples = get_examples(tenant_id=tenant_id, category=example_category.replace("_memo", ""))
+            # Load style examples list from Dropbox (listed once, then patched in place)
+            refresh_examples = st.button("🔄 Refresh List", key="refresh_examples")
+            examples = _load_listing(
+                example_listing_key,
+                lambda: get_examples(tenant_id=tenant_id, category=example_category.replace("_memo", "")),
+                refresh=refresh_examples
+            )
+
+            _render_bulk_actions(
+                items=examples,
+                category=example_category,
+                folder_map=EXAMPLES_PATH_MAP,
+                move_targets={
+                    label: CATEGORIES[label] for label in ["Mediation Memo", "Demand Letter", "FOIA Letter"]
+                    if CATEGORIES[label] != example_category
+                },
+                listing_prefix="template_manager_examples",
+                normalize_as=lambda name, _category: normalize_filename(name, "email"),
+                delete_fn=delete_examples,
+                move_fn=move_examples,
+                audit_label="Style Examples",
+                error_code="TEMPLATE_UI_013"
+            )
 
             if examples:
                 for ex in examples:
@@ -278,6 +444,9 @@ def run_ui():
                                 client.dbx.files_move_v2(old_path, new_path, autorename=False)
 
                                 st.success(f"✅ Renamed to {clean_new_name}")
+                                _patch_listing(
+                                    example_listing_key, removed=[filename], added=[{"name": clean_new_name, "path": new_path}]
+                                )
                                 clear_caches()
                                 log_audit_event("Style Example Renamed", {
                                     "from": filename,
@@ -296,6 +465,7 @@ def run_ui():
                                 client.dbx.files_delete_v2(f"{example_path}/{filename}")
 
                                 st.success(f"✅ Deleted {filename}")
+                                _patch_listing(example_listing_key, removed=[filename])
                                 clear_caches()
                                 log_audit_event("Style Example Deleted", {
                                     "filename": filename,
@@ -1,6 +1,6 @@
 def run_ui():
     import streamlit as st
-    from services.dropbox_client import download_file_from_dropbox
+    from services.dropbox_client import get_temporary_link
     from core.constants import DROPBOX_TRAINING_VIDEO_DIR
     from core.error_handling import handle_error
 
@@ -23,9 +23,11 @@ def run_ui():
     video_path = TRAINING_VIDEOS[selected]
 
     try:
-        video_bytes = download_file_from_dropbox(video_path)
-        if video_bytes:
-            st.video(video_bytes)
+        # Stream from a temporary Dropbox link so playback starts immediately
+        # and the video is never loaded into server memory.
+        video_url = get_temporary_link(video_path)
+        if video_url:
+            st.video(video_url)
         else:
             st.warning("⚠️ Video not available. Please contact admin.")
     except Exception as e:
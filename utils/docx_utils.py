@@ -7,7 +7,7 @@ from io import BytesIO
 from lxml import etree
 from utils.template_engine import render_docx_placeholders
 from docx import Document
-from core.security import mask_phi, redact_log
+from core.security import mask_phi, redact_log, Redacted
 from core.error_handling import handle_error
 from utils.file_utils import validate_file_size
 from core.audit import log_audit_event
@@ -165,9 +165,7 @@ def replace_text_in_docx_all(docx_path: str, replacements: dict, save_path_or_bu
                 "version_hash": version_hash,
                 "tenant_id": get_tenant_id()
             })
-            logger.info(redact_log(mask_phi(
-                f"✅ DOCX replace completed for {save_path}, version: {version_hash}"
-            )))
+            logger.info(Redacted("✅ DOCX replace completed for %s, version: %s", save_path, version_hash))
             return save_path
         else:
             # When saving to BytesIO, simply return a success marker
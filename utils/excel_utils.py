@@ -0,0 +1,191 @@
+import datetime
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from core.error_handling import handle_error
+from logger import logger
+
+try:
+    # Rust-backed reader; an order of magnitude faster than openpyxl on large sheets.
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+# Rows materialized per DataFrame chunk while streaming a worksheet.
+DEFAULT_CHUNK_SIZE = 5000
+
+# Campaign and status columns repeat a handful of labels across every case,
+# so they are stored as categoricals instead of one Python string per cell.
+CATEGORICAL_COLUMNS = ["Case Type", "Class Code Title", "Status"]
+
+# Only convert when the column actually repeats (unique values / rows).
+CATEGORY_MAX_RATIO = 0.5
+
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def _calamine_rows(source, sheet_name=None):
+    if isinstance(source, str) or hasattr(source, "__fspath__"):
+        wb = CalamineWorkbook.from_path(str(source))
+    else:
+        wb = CalamineWorkbook.from_filelike(source)
+    if sheet_name is None:
+        ws = wb.get_sheet_by_index(0)
+    elif isinstance(sheet_name, int):
+        ws = wb.get_sheet_by_index(sheet_name)
+    else:
+        ws = wb.get_sheet_by_name(sheet_name)
+
+    for row in ws.iter_rows():
+        # Calamine reports blank cells as "", whole numbers as floats and midnight dates as
+        # datetime.date (next to datetime.datetime); normalize so columns match read_excel.
+        yield tuple(_calamine_cell(v) for v in row)
+
+
+def _calamine_cell(value):
+    if value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, datetime.date):
+        return pd.Timestamp(value)
+    return value
+
+
+def _openpyxl_rows(source, sheet_name=None):
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        if sheet_name is None:
+            ws = wb.worksheets[0]
+        elif isinstance(sheet_name, int):
+            ws = wb.worksheets[sheet_name]
+        else:
+            ws = wb[sheet_name]
+        # Some exporters write a bogus <dimension>; read every row that is actually present.
+        ws.reset_dimensions()
+        yield from ws.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _iter_sheet_rows(source, sheet_name=None):
+    """
+    Yield raw row tuples (header first) using the fastest available engine.
+    """
+    _rewind(source)
+    if CalamineWorkbook is not None:
+        return _calamine_rows(source, sheet_name)
+    return _openpyxl_rows(source, sheet_name)
+
+
+def _header_names(header_row) -> list:
+    """
+    Build column names the way pandas.read_excel does: blank headers become
+    "Unnamed: N" and repeated headers get ".1", ".2" suffixes.
+    """
+    names, seen = [], {}
+    for i, value in enumerate(header_row or ()):
+        name = f"Unnamed: {i}" if value is None else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def read_excel_header(source, sheet_name=None) -> list:
+    """
+    Return the column names of a worksheet without parsing its data rows.
+    """
+    try:
+        rows = _iter_sheet_rows(source, sheet_name)
+        try:
+            return _header_names(next(rows, ()))
+        finally:
+            rows.close()
+    except Exception as e:
+        handle_error(e, code="EXCEL_HEADER_001", raise_it=True)
+
+
+def iter_excel_chunks(source, sheet_name=None, columns: list = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Stream a worksheet as DataFrame chunks of at most `chunk_size` rows.
+    Only `columns` (by header name) are materialized; unknown names are ignored.
+    Fully empty rows are skipped.
+    """
+    rows = _iter_sheet_rows(source, sheet_name)
+    try:
+        names = _header_names(next(rows, ()))
+
+        if columns is None:
+            positions = list(range(len(names)))
+        else:
+            wanted = set(columns)
+            positions = [i for i, name in enumerate(names) if name in wanted]
+        selected = [names[i] for i in positions]
+
+        buffer, emitted = [], False
+        for row in rows:
+            if not any(v is not None for v in row):
+                continue
+            width = len(row)
+            buffer.append([row[i] if i < width else None for i in positions])
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame(buffer, columns=selected)
+                buffer, emitted = [], True
+
+        # Always yield at least one (possibly empty) frame so callers see the columns.
+        if buffer or not emitted:
+            yield pd.DataFrame(buffer, columns=selected)
+    finally:
+        rows.close()
+
+
+def compact_dtypes(df: pd.DataFrame, categorical_columns: list = None) -> pd.DataFrame:
+    """
+    Shrink a freshly parsed frame in place: repeated labels in the campaign/status
+    columns become categoricals and integer columns are downcast.
+    """
+    categorical_columns = CATEGORICAL_COLUMNS if categorical_columns is None else categorical_columns
+    rows = len(df)
+    for col in df.columns:
+        series = df[col]
+        if col in categorical_columns and series.dtype == object and rows:
+            if series.nunique(dropna=True) / rows <= CATEGORY_MAX_RATIO:
+                df[col] = series.astype("category")
+        elif pd.api.types.is_integer_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            df[col] = pd.to_numeric(series, downcast="integer")
+    return df
+
+
+def read_excel_columns(
+    source,
+    sheet_name=None,
+    columns: list = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    categorical_columns: list = None,
+) -> pd.DataFrame:
+    """
+    Read a worksheet (optionally only `columns`) into a compact DataFrame.
+    Drop-in replacement for pd.read_excel on dashboard and batch spreadsheets.
+    """
+    try:
+        chunks = list(iter_excel_chunks(source, sheet_name, columns, chunk_size))
+        df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+        if columns is not None:
+            df = df[[col for col in columns if col in df.columns]]
+        # Let pandas settle numeric/datetime columns the way read_excel would.
+        df = df.infer_objects()
+        # Blank cells arrive as None from both engines; read_excel reports them as NaN.
+        for col in df.columns[df.dtypes == object]:
+            df[col] = df[col].where(df[col].notna(), np.nan)
+        df = compact_dtypes(df, categorical_columns)
+        logger.info(f"[EXCEL_READ] 📊 Parsed {len(df)} rows x {len(df.columns)} columns")
+        return df
+    except Exception as e:
+        handle_error(e, code="EXCEL_READ_001", raise_it=True)
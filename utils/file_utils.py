@@ -74,7 +74,7 @@ def replace_text_in_docx_all(docx_path: str, replacements: dict, save_path: str)
     Replace placeholders in all major parts of a Word template,
     write to a new versioned file, and log the version.
     """
-    from core.security import mask_phi, redact_log
+    from core.security import mask_phi, redact_log, Redacted
 
     try:
         if not isinstance(replacements, dict):
@@ -146,9 +146,7 @@ def replace_text_in_docx_all(docx_path: str, replacements: dict, save_path: str)
             "tenant_id": tenant_id,
             "user_id": user_id
         })
-        logger.info(redact_log(mask_phi(
-            f"✅ DOCX replacement completed for {save_path}, version {version_hash}"
-        )))
+        logger.info(Redacted("✅ DOCX replacement completed for %s, version %s", save_path, version_hash))
         return save_path
 
     except Exception as e:
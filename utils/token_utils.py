@@ -5,3 +5,10 @@ def trim_to_token_limit(text: str, max_tokens: int = 4000) -> str:
     """
     max_chars = max_tokens * 4
     return text[:max_chars]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count using the same 4-characters-per-token rule as trim_to_token_limit.
+    """
+    return (len(text or "") + 3) // 4